@@ -0,0 +1,450 @@
+"""
+HTTP API - Async service exposing brand analysis, creatives, captions and full pipelines
+Uses: Tornado (ships with Streamlit); blocking pipeline work runs on a thread pool
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import tornado.iostream
+import tornado.web
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from main import CreativeStudio
+from src.exporter import resolve_presets
+from src.quota import QuotaExceeded
+
+MAX_LOGO_BYTES = 10 * 1024 * 1024
+UPLOAD_TTL = 24 * 3600
+SSE_KEEPALIVE = 15
+MAX_FINISHED_JOBS = 500
+
+
+class Job:
+    """One queued or running request; its events are replayable for late subscribers"""
+
+    def __init__(self, kind: str, params: dict, loop: asyncio.AbstractEventLoop):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.events = []
+        self._loop = loop
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def push(self, event: dict):
+        """Add an event from any thread"""
+        self._loop.call_soon_threadsafe(self._append, event)
+
+    def _append(self, event: dict):
+        self.events.append({"time": round(time.time(), 3), **event})
+        # Wake every waiting subscriber, then arm a fresh event for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def finish(self, status: str, error: dict = None):
+        """Mark the job finished (on the event loop, so subscribers see status and event together)"""
+        self.status = status
+        self.error = error
+        self._append({"event": "job_finished", "status": status, "error": error})
+
+    async def wait_for_events(self, cursor: int, timeout: float):
+        """Return once there are events past cursor, the job finished, or timeout passed"""
+        if len(self.events) > cursor or self.finished:
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created": self.created,
+            "events": len(self.events),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def job_uploads(params: dict) -> set:
+    """Uploaded files (logo and brand images) one API job reads"""
+    return {Path(p).resolve() for p in [params.get("logo_path"), *(params.get("image_paths") or [])] if p}
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool against one shared CreativeStudio"""
+
+    def __init__(self, studio: CreativeStudio, max_workers: int = 8):
+        self.studio = studio
+        self.jobs = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-job")
+
+    def submit(self, kind: str, params: dict) -> Job:
+        loop = asyncio.get_running_loop()
+        job = Job(kind, params, loop)
+        self.jobs[job.id] = job
+        self._prune()
+        job.push({"event": "job_queued", "kind": kind})
+        loop.create_task(self._run(job))
+        return job
+
+    async def _run(self, job: Job):
+        runner = getattr(self, f"_run_{job.kind}")
+        loop = asyncio.get_running_loop()
+        try:
+            job.result = await loop.run_in_executor(self.executor, self._start, job, runner)
+            job.finish("done")
+        except QuotaExceeded as e:
+            job.finish("failed", {"message": str(e), "retry_at": e.retry_at})
+        except Exception as e:
+            job.finish("failed", {"message": str(e)})
+        finally:
+            self._release_uploads(job)
+
+    def _release_uploads(self, job: Job):
+        """Delete a finished job's uploads, like worker.release_uploads, unless a running job still reads them"""
+        in_use = set()
+        for other in self.jobs.values():
+            if not other.finished:
+                in_use.update(job_uploads(other.params))
+        for path in job_uploads(job.params) - in_use:
+            path.unlink(missing_ok=True)
+
+    def _start(self, job: Job, runner):
+        job.status = "running"
+        job.push({"event": "job_started"})
+        return runner(job)
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond MAX_FINISHED_JOBS"""
+        finished = [j for j in self.jobs.values() if j.finished]
+        for job in sorted(finished, key=lambda j: j.created)[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.id]
+
+    def _run_analyze(self, job: Job) -> dict:
+        from src.brand_analyzer import BrandAnalyzer
+        return BrandAnalyzer(job.params["logo_path"], images=job.params.get("image_paths")).analyze()
+
+    def _run_captions(self, job: Job) -> dict:
+        p = job.params
+        writer = self.studio.shared_writer().for_session(lane=p.get("priority", "interactive"))
+        return writer.generate_captions(
+            brand_name=p["brand_name"],
+            product_name=p["product_name"],
+            tone=p.get("tone", "luxury"),
+            target_audience=p.get("target_audience", "general consumers"),
+            num_variations=int(p.get("num_variations", 3))
+        )
+
+    def _run_creatives(self, job: Job) -> dict:
+        return self._pipeline(job, captions=False, composite=False)
+
+    def _run_pipeline(self, job: Job) -> dict:
+        return self._pipeline(job, captions=True, composite=bool(job.params.get("composite", True)))
+
+    def _pipeline(self, job: Job, captions: bool, composite: bool) -> dict:
+        p = job.params
+        result = self.studio.run_pipeline(
+            logo_path=p["logo_path"],
+            brand_name=p["brand_name"],
+            product_name=p["product_name"],
+            tone=p.get("tone", "luxury"),
+            target_audience=p.get("target_audience", "general consumers"),
+            num_variations=int(p.get("num_variations", 3)),
+            aspect_ratios=p.get("aspect_ratios"),
+            composite=composite,
+            defer_on_quota=bool(p.get("defer_on_quota", False)),
+            priority=p.get("priority", "interactive"),
+            oversample=int(p.get("oversample", 1)),
+            captions=captions,
+            progress=lambda event: job.push(event.to_dict()),
+            reuse=bool(p.get("reuse", True)),
+            exports=p.get("exports"),
+            brand_images=p.get("image_paths")
+        )
+        session = Path(result["session_folder"]).name
+        return {
+            "session": session,
+            "num_creatives": result["num_creatives"],
+            "brand_profile": result["brand_profile"],
+            "captions": result["captions"],
+            "files": [
+                f"/api/sessions/{session}/files/{Path(c['filepath']).relative_to(result['session_folder']).as_posix()}"
+                for c in result["creatives"] if "filepath" in c
+            ],
+            "zip": f"/api/sessions/{session}/zip",
+        }
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    """JSON helpers shared by the API handlers"""
+
+    def initialize(self, manager: JobManager):
+        self.manager = manager
+
+    def write_json(self, data, status: int = 200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(data, default=str))
+
+    def write_error(self, status_code: int, **kwargs):
+        self.write_json({"error": self._reason}, status_code)
+
+    def json_body(self) -> dict:
+        try:
+            return json.loads(self.request.body or b"{}")
+        except json.JSONDecodeError:
+            raise tornado.web.HTTPError(400, reason="Body must be JSON")
+
+
+@tornado.web.stream_request_body
+class LogoUploadHandler(BaseHandler):
+    """POST /api/logos - raw image body streamed to disk, never held in memory"""
+
+    def prepare(self):
+        self.upload_dir = self.manager.studio.output_dir / ".uploads"
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self.logo_id = uuid.uuid4().hex[:12]
+        self.path = self.upload_dir / f"{self.logo_id}.img"
+        self.received = 0
+        self.file = open(self.path, "wb")
+        self.request.connection.set_max_body_size(MAX_LOGO_BYTES)
+
+    def data_received(self, chunk: bytes):
+        self.received += len(chunk)
+        self.file.write(chunk)
+
+    def post(self):
+        self.file.close()
+        if not self.received:
+            self.path.unlink(missing_ok=True)
+            raise tornado.web.HTTPError(400, reason="Empty upload")
+        self._expire_old_uploads()
+        self.write_json({"logo_id": self.logo_id, "bytes": self.received}, 201)
+
+    def on_connection_close(self):
+        if not self.file.closed:
+            self.file.close()
+            self.path.unlink(missing_ok=True)
+
+    def _expire_old_uploads(self):
+        """Drop uploads older than UPLOAD_TTL that no job ever used, unless a pending job still needs them"""
+        cutoff = time.time() - UPLOAD_TTL
+        stale = [upload for upload in self.upload_dir.iterdir() if upload.stat().st_mtime < cutoff]
+        if not stale:
+            return
+
+        # API jobs that haven't finished, and queue jobs (possibly deferred for quota) sharing this output
+        in_use = set()
+        for job in self.manager.jobs.values():
+            if not job.finished:
+                in_use.update(job_uploads(job.params))
+        queue_path = self.manager.studio.output_dir / ".queue.db"
+        if queue_path.exists():
+            from src.job_queue import SQLiteBroker
+            from worker import upload_paths
+            for payload in SQLiteBroker(queue_path).active_payloads():
+                in_use.update(path.resolve() for path in upload_paths(payload))
+
+        for upload in stale:
+            if upload.resolve() not in in_use:
+                upload.unlink(missing_ok=True)
+
+
+class JobCreateHandler(BaseHandler):
+    """POST /api/{analyze,captions,creatives,pipeline} - start a job, 202 with its id"""
+
+    REQUIRED = {
+        "analyze": ["logo_id"],
+        "captions": ["brand_name", "product_name"],
+        "creatives": ["logo_id", "brand_name", "product_name"],
+        "pipeline": ["logo_id", "brand_name", "product_name"],
+    }
+
+    def post(self, kind: str):
+        params = self.json_body()
+        missing = [k for k in self.REQUIRED[kind] if not params.get(k)]
+        if missing:
+            raise tornado.web.HTTPError(400, reason=f"Missing fields: {', '.join(missing)}")
+
+        if "logo_id" in params:
+            logo_path = self.manager.studio.output_dir / ".uploads" / f"{Path(params['logo_id']).name}.img"
+            if not logo_path.exists():
+                raise tornado.web.HTTPError(404, reason="Unknown logo_id (upload it to /api/logos first)")
+            params["logo_path"] = str(logo_path)
+
+        # Product shots / past campaigns, uploaded to /api/logos like the logo itself
+        params["image_paths"] = []
+        for image_id in params.get("image_ids") or []:
+            image_path = self.manager.studio.output_dir / ".uploads" / f"{Path(image_id).name}.img"
+            if not image_path.exists():
+                raise tornado.web.HTTPError(404, reason=f"Unknown image_id {image_id}")
+            params["image_paths"].append(str(image_path))
+
+        if params.get("exports"):
+            try:
+                resolve_presets(params["exports"])
+            except ValueError as e:
+                raise tornado.web.HTTPError(400, reason=str(e))
+
+        job = self.manager.submit(kind, params)
+        self.set_header("Location", f"/api/jobs/{job.id}")
+        self.write_json({"job_id": job.id, "status": job.status, "events": f"/api/jobs/{job.id}/events"}, 202)
+
+
+class JobHandler(BaseHandler):
+    """GET /api/jobs/<id> - status and, once finished, the result"""
+
+    def get(self, job_id: str):
+        job = self.manager.jobs.get(job_id)
+        if job is None:
+            raise tornado.web.HTTPError(404, reason="Unknown job")
+        self.write_json(job.summary())
+
+
+class JobEventsHandler(BaseHandler):
+    """GET /api/jobs/<id>/events - server-sent events, resumable with Last-Event-ID"""
+
+    async def get(self, job_id: str):
+        job = self.manager.jobs.get(job_id)
+        if job is None:
+            raise tornado.web.HTTPError(404, reason="Unknown job")
+
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("X-Accel-Buffering", "no")
+        cursor = int(self.request.headers.get("Last-Event-ID", -1)) + 1
+
+        try:
+            while True:
+                for index in range(cursor, len(job.events)):
+                    event = job.events[index]
+                    self.write(f"id: {index}\nevent: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n")
+                sent_all = cursor == len(job.events)
+                cursor = len(job.events)
+                if job.finished and sent_all:
+                    break
+                if sent_all:
+                    self.write(": keep-alive\n\n")
+                await self.flush()
+                await job.wait_for_events(cursor, SSE_KEEPALIVE)
+        except tornado.iostream.StreamClosedError:
+            return  # Client went away; the job keeps running
+        self.finish()
+
+
+class SessionFileHandler(tornado.web.StaticFileHandler):
+    """GET /api/sessions/<name>/files/<path> - artifacts with Range and ETag support"""
+
+    async def get(self, session: str, path: str, include_body: bool = True):
+        return await super().get(f"{session}/{path}", include_body)
+
+    def validate_absolute_path(self, root: str, absolute_path: str):
+        # Tornado's containment check first, so traversal attempts get its 403 rather than a 500
+        validated = super().validate_absolute_path(root, absolute_path)
+        if validated is None:
+            return None
+        # Shared state (.blobs, .quota.json, .uploads) is never served
+        try:
+            relative = Path(validated).relative_to(os.path.abspath(root))
+        except ValueError:
+            raise tornado.web.HTTPError(404)
+        if any(part.startswith(".") for part in relative.parts):
+            raise tornado.web.HTTPError(404)
+        return validated
+
+
+class SessionZipHandler(tornado.web.StaticFileHandler):
+    """GET /api/sessions/<name>/zip - package built from the blob store, then served with Range support"""
+
+    async def get(self, session: str, include_body: bool = True):
+        studio = self.settings["studio"]
+        folder = studio.output_dir / Path(session).name
+        if session.startswith(".") or not (folder / "manifest.json").exists():
+            raise tornado.web.HTTPError(404)
+
+        # Reuse the archive while it is newer than everything in the session
+        zip_path = studio.output_dir / f"{folder.name}.zip"
+        newest = max(p.stat().st_mtime for p in folder.rglob("*"))
+        if not zip_path.exists() or zip_path.stat().st_mtime < newest:
+            tmp_path = zip_path.with_name(f".{zip_path.name}.{uuid.uuid4().hex[:6]}")
+            await asyncio.get_running_loop().run_in_executor(None, studio.build_zip, folder, tmp_path)
+            os.replace(tmp_path, zip_path)
+
+        self.set_header("Content-Disposition", f'attachment; filename="{zip_path.name}"')
+        return await super().get(zip_path.name, include_body)
+
+
+class StatusHandler(BaseHandler):
+    """GET /api/status - quota, job counts and backend readiness"""
+
+    def get(self):
+        from src.backend_stats import default_readiness, default_timeouts, default_tracker
+        from src.metrics import metrics
+
+        jobs = list(self.manager.jobs.values())
+        self.write_json({
+            "jobs": {status: sum(1 for j in jobs if j.status == status) for status in ("queued", "running", "done", "failed")},
+            "quota": self.manager.studio.quota.snapshot(),
+            "readiness": default_readiness.snapshot(),
+            "backends": default_timeouts.snapshot(default_tracker),
+            "metrics": metrics.snapshot(),
+        })
+
+
+def make_app(studio: CreativeStudio = None, max_workers: int = 8) -> tornado.web.Application:
+    """Build the Tornado application around one shared studio"""
+    studio = studio or CreativeStudio()
+    manager = JobManager(studio, max_workers)
+    root = str(studio.output_dir.resolve())
+    deps = {"manager": manager}
+
+    return tornado.web.Application([
+        (r"/api/status", StatusHandler, deps),
+        (r"/api/logos", LogoUploadHandler, deps),
+        (r"/api/(analyze|captions|creatives|pipeline)", JobCreateHandler, deps),
+        (r"/api/jobs/([0-9a-f]+)", JobHandler, deps),
+        (r"/api/jobs/([0-9a-f]+)/events", JobEventsHandler, deps),
+        (r"/api/sessions/([^/]+)/zip", SessionZipHandler, {"path": root}),
+        (r"/api/sessions/([^/]+)/files/(.+)", SessionFileHandler, {"path": root}),
+    ], studio=studio, manager=manager)
+
+
+async def serve(port: int, max_workers: int, hedging: bool):
+    from src.scheduler import PriorityScheduler
+
+    studio = CreativeStudio(hedging=hedging, scheduler=PriorityScheduler(max_concurrent=4))
+    app = make_app(studio, max_workers)
+    app.listen(port)
+    studio.janitor.start()
+    print(f"🌐 AI Creative Studio API listening on http://localhost:{port}/api/status")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AI Creative Studio - HTTP API")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=8, help="Jobs running at once (more are queued)")
+    parser.add_argument("--hedge", action="store_true", help="Race the next backend when one is unusually slow")
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.port, args.workers, args.hedge))
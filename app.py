@@ -9,6 +9,31 @@ from PIL import Image
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from main import CreativeStudio
+from src.exporter import EXPORT_PRESETS
+from src.submission import run_submission
+from src.events import BackendFallback, CaptionReady, CreativeGenerated, RetryWait, StageFinished, StageStarted
+
+# Share of the progress bar at the start and end of each pipeline stage
+STAGE_PROGRESS = {
+    "analysis": (0.0, 0.05),
+    "generation": (0.05, 0.8),
+    "normalize": (0.8, 0.85),
+    "captions": (0.85, 0.92),
+    "compositing": (0.92, 0.95),
+    "export": (0.95, 0.97),
+    "storage": (0.97, 0.99),
+    "report": (0.99, 1.0),
+}
+STAGE_LABELS = {
+    "analysis": "🎨 Analyzing brand style...",
+    "generation": "🖼️ Generating creatives...",
+    "normalize": "📐 Resizing to platform formats...",
+    "captions": "✍️ Writing captions...",
+    "compositing": "🧩 Overlaying logo & captions...",
+    "export": "📏 Exporting platform sizes...",
+    "storage": "💾 Saving assets...",
+    "report": "📝 Writing report...",
+}
 
 # Page config
 st.set_page_config(
@@ -65,6 +90,45 @@ st.markdown("""
 st.markdown('<h1 class="main-header">🎨 AI Creative Studio</h1>', unsafe_allow_html=True)
 st.markdown('<p class="tagline">Generate brand-consistent marketing creatives in seconds • 100% FREE</p>', unsafe_allow_html=True)
 
+# One scheduler per server process so every browser session shares the backends fairly
+@st.cache_resource
+def get_scheduler():
+    from src.scheduler import PriorityScheduler
+    return PriorityScheduler(max_concurrent=4)
+
+
+# One studio per server process: sessions share its API clients, pools and caches
+@st.cache_resource
+def get_studio():
+    return CreativeStudio(scheduler=get_scheduler())
+
+
+# Streamlit reruns the script on every click; keep recent archives instead of rebuilding them
+@st.cache_data(max_entries=8, show_spinner=False)
+def session_zip(session_folder: str) -> bytes:
+    return get_studio().build_zip(session_folder)
+
+
+# Warm up image models once per server process, off the request path
+@st.cache_resource
+def start_warm_up():
+    try:
+        return get_studio().warm_up(background=True)
+    except ValueError:
+        return None  # No HuggingFace key yet
+
+
+start_warm_up()
+
+
+# Old sessions are pruned in small background passes instead of growing output/ forever
+@st.cache_resource
+def start_retention():
+    return get_studio().janitor.start()
+
+
+start_retention()
+
 # Initialize session state
 if 'generated' not in st.session_state:
     st.session_state.generated = False
@@ -78,6 +142,12 @@ with st.sidebar:
     with st.form("input_form"):
         # File uploads
         logo_file = st.file_uploader("Upload Brand Logo", type=['png', 'jpg', 'jpeg'])
+        brand_files = st.file_uploader(
+            "Product Shots / Past Campaigns (Optional)",
+            type=['png', 'jpg', 'jpeg'],
+            accept_multiple_files=True,
+            help="Blended with the logo to learn the brand palette and mood"
+        )
         
         # Text inputs
         brand_name = st.text_input("Brand Name", value="MyBrand", placeholder="e.g., TechStyle")
@@ -104,6 +174,21 @@ with st.sidebar:
         
         num_variations = st.slider("Number of Variations", 1, 3, 2)
         
+        oversample = st.slider("Candidates per creative", 1, 4, 1, help="Render extra candidates and keep the one closest to your brand palette (uses more API quota)")
+        
+        composite = st.checkbox("Overlay logo & caption", value=True)
+        
+        regenerate = st.checkbox("Regenerate images", value=False, help="Render new images even if this brief was generated before (unchanged briefs reuse earlier images otherwise; uses API quota)")
+        
+        exports = st.multiselect(
+            "Platform export sizes",
+            list(EXPORT_PRESETS),
+            format_func=lambda name: f"{name.replace('_', ' ').title()} ({EXPORT_PRESETS[name]['size'][0]}×{EXPORT_PRESETS[name]['size'][1]})",
+            help="Cropped and resized locally from the generated creatives, no extra API calls"
+        )
+        
+        profile = st.checkbox("Profile this run", value=False, help="Adds a per-stage timing breakdown and flamegraph trace to the session")
+        
         # Submit button
         submitted = st.form_submit_button("🚀 Generate Creatives")
     
@@ -127,15 +212,28 @@ with st.sidebar:
         st.success("✅ Gemini API")
     else:
         st.warning("⚠️ Gemini API not set")
+    
+    # Remaining free-tier budget
+    quota = get_studio().quota.snapshot()
+    quota_cols = st.columns(2)
+    for col, (backend, label) in zip(quota_cols, [("huggingface", "HF left (month)"), ("gemini", "Gemini left (today)")]):
+        col.metric(label, quota[backend]["remaining"])
+    
+    from src.metrics import metrics
+    from src.backend_stats import default_readiness, default_timeouts, default_tracker
+    with st.expander("📈 Backend Metrics"):
+        st.write("**Model readiness**")
+        st.json(default_readiness.snapshot())
+        st.write("**Timeouts & retries** (learned from recent latency and errors)")
+        st.json(default_timeouts.snapshot(default_tracker))
+        st.write("**Scheduler lanes**")
+        st.json(get_scheduler().stats())
+        st.write("**Counters**")
+        st.json(metrics.snapshot())
 
 # Main Content Area
 if submitted and logo_file and brand_name and product_name:
     
-    # Save uploaded logo temporarily
-    temp_logo_path = Path("temp_logo.png")
-    with open(temp_logo_path, "wb") as f:
-        f.write(logo_file.read())
-    
     # Determine aspect ratios
     aspect_ratios = []
     if format_1x1:
@@ -148,30 +246,63 @@ if submitted and logo_file and brand_name and product_name:
     if not aspect_ratios:
         st.error("⚠️ Please select at least one output format!")
     else:
-        # Show progress
-        with st.spinner("🎨 Analyzing brand style..."):
-            studio = CreativeStudio()
-            
-            try:
-                result = studio.run_pipeline(
-                    logo_path=str(temp_logo_path),
-                    brand_name=brand_name,
-                    product_name=product_name,
-                    tone=tone,
-                    target_audience=target_audience,
-                    num_variations=num_variations,
-                    aspect_ratios=aspect_ratios
+        # The pipeline runs on a worker thread; src.submission hands its events back to this script thread
+        studio = get_studio()
+        live = st.empty()
+        with live.container():
+            progress_bar = st.progress(0.0, text="🎨 Analyzing brand style...")
+            notice = st.empty()
+            gallery = st.columns(3)
+        
+        def show(event):
+            if isinstance(event, StageStarted):
+                progress_bar.progress(STAGE_PROGRESS.get(event.stage, (0, 0))[0], text=STAGE_LABELS.get(event.stage, event.stage))
+            elif isinstance(event, StageFinished):
+                progress_bar.progress(STAGE_PROGRESS.get(event.stage, (0, 0))[1], text=STAGE_LABELS.get(event.stage, event.stage))
+            elif isinstance(event, CreativeGenerated):
+                start, end = STAGE_PROGRESS["generation"]
+                progress_bar.progress(
+                    start + (end - start) * event.index / event.total,
+                    text=f"🖼️ {event.index}/{event.total} creatives ready"
                 )
-                
-                st.session_state.result = result
-                st.session_state.generated = True
-                
-                # Cleanup
-                temp_logo_path.unlink()
-                
-            except Exception as e:
-                st.error(f"❌ Error: {str(e)}")
-                st.error("Please check your API keys in .env file")
+                # First images show up while the rest are still rendering
+                with gallery[(event.index - 1) % 3]:
+                    st.image(str(studio.output_dir / event.session / event.path), caption=f"{event.aspect_ratio}{' ♻️' if event.reused else ''}", use_column_width=True)
+            elif isinstance(event, BackendFallback):
+                notice.info(f"🔁 {event.from_backend} {event.reason}, switching to {event.to_backend}")
+            elif isinstance(event, RetryWait):
+                notice.info(f"⏳ {event.backend} {event.reason}, retrying in {event.seconds:.0f}s ({event.attempt}/{event.retries})")
+            elif isinstance(event, CaptionReady):
+                notice.success(f"✍️ {event.variations} caption variations ready")
+        
+        try:
+            result = run_submission(
+                studio,
+                form={
+                    "brand_name": brand_name,
+                    "product_name": product_name,
+                    "tone": tone,
+                    "target_audience": target_audience,
+                    "num_variations": num_variations,
+                    "aspect_ratios": aspect_ratios,
+                    "composite": composite,
+                    "profile": profile,
+                    "oversample": oversample,
+                    "exports": exports,
+                    "reuse": not regenerate,
+                },
+                logo=(logo_file.read(), Path(logo_file.name).suffix),
+                brand_files=[(brand_file.read(), Path(brand_file.name).suffix) for brand_file in brand_files or []],
+                on_event=show
+            )
+        except Exception as e:
+            live.empty()
+            st.error(f"❌ Error: {str(e)}")
+            st.error("Please check your API keys in .env file")
+        else:
+            live.empty()
+            st.session_state.result = result
+            st.session_state.generated = True
 
 elif submitted:
     st.warning("⚠️ Please fill in all required fields (logo, brand name, product name)")
@@ -180,27 +311,38 @@ elif submitted:
 if st.session_state.generated and st.session_state.result:
     result = st.session_state.result
     
+    # Keep the session on disk while this page can still show or download it
+    get_studio().janitor.pin(result['session_folder'], ttl=3600)
+    
     st.success(f"✅ Successfully generated {result['num_creatives']} creatives!")
     
-    # Download button
+    # Unchanged steps come from earlier runs; say what was reused so edits feel as fast as they are
+    reused = result.get('reused', {})
+    reused_parts = [f"{reused['creatives']} images"] if reused.get('creatives') else []
+    reused_parts += [part for part, hit in [("brand profile", reused.get('profile')), ("captions", reused.get('captions'))] if hit]
+    if reused_parts:
+        st.caption(f"♻️ Reused from earlier runs: {', '.join(reused_parts)} (tick “Regenerate images” for new ones)")
+    
+    # Download button (archive assembled in memory from the blob store, nothing extra on disk)
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if Path(result['zip_path']).exists():
-            with open(result['zip_path'], 'rb') as f:
-                st.download_button(
-                    label="📦 Download All Creatives (ZIP)",
-                    data=f.read(),
-                    file_name=Path(result['zip_path']).name,
-                    mime="application/zip",
-                    use_container_width=True
-                )
+        session_folder = Path(result['session_folder'])
+        if session_folder.exists():
+            st.download_button(
+                label="📦 Download All Creatives (ZIP)",
+                data=session_zip(str(session_folder)),
+                file_name=f"{session_folder.name}.zip",
+                mime="application/zip",
+                use_container_width=True
+            )
     
     st.divider()
     
     # Brand Profile
     st.subheader("🎨 Brand Profile")
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
+    confidence = result['brand_profile'].get('confidence', {})
     
     with col1:
         st.metric("Dominant Color", result['brand_profile']['dominant_color']['hex'])
@@ -211,6 +353,13 @@ if st.session_state.generated and st.session_state.result:
     with col3:
         st.metric("Brightness", result['brand_profile']['brightness'].title())
     
+    with col4:
+        st.metric(
+            "Confidence",
+            f"{confidence.get('overall', 0):.0%}",
+            help=f"Palette {confidence.get('palette', 0):.0%} · mood margin {confidence.get('mood', 0):.0%} · images analyzed {confidence.get('coverage', 0):.0%}"
+        )
+    
     # Color palette
     st.write("**Color Palette:**")
     palette_cols = st.columns(5)
@@ -220,7 +369,7 @@ if st.session_state.generated and st.session_state.result:
                 f'<div style="background-color:{color["hex"]}; height:50px; border-radius:5px; border:1px solid #ddd;"></div>',
                 unsafe_allow_html=True
             )
-            st.caption(color['hex'])
+            st.caption(f"{color['hex']} · {color['weight']:.0%}" if 'weight' in color else color['hex'])
     
     st.divider()
     
@@ -231,10 +380,13 @@ if st.session_state.generated and st.session_state.result:
     
     # Group by aspect ratio
     for ratio in ["1x1", "9x16", "16x9"]:
-        ratio_folder = session_folder / ratio
+        # Prefer the versions with logo and caption overlaid when they exist
+        ratio_folder = session_folder / "composited" / ratio
+        if not ratio_folder.exists():
+            ratio_folder = session_folder / ratio
         
         if ratio_folder.exists():
-            images = list(ratio_folder.glob("*.png"))
+            images = sorted(p for p in ratio_folder.iterdir() if p.suffix.lower() in CreativeStudio.PRECOMPRESSED)
             
             if images:
                 st.write(f"**{ratio.replace('x', ':')} Format** ({len(images)} images)")
@@ -259,6 +411,20 @@ if st.session_state.generated and st.session_state.result:
                 st.write(f"**CTA:** {caption['cta']}")
                 st.write(f"**Long Caption:** {caption['long_caption']}")
                 st.write(f"**Hashtags:** {' '.join(caption['hashtags'])}")
+    
+    # Profile (only when the run was profiled)
+    if result.get('profile'):
+        st.divider()
+        st.subheader("⏱️ Pipeline Profile")
+        st.table([{"Stage": t["stage"], "Wall (s)": t["wall_s"], "CPU (s)": t["cpu_s"]} for t in result['timings']])
+        folded_path = Path(result['profile']['folded'])
+        if folded_path.exists():
+            st.download_button(
+                label="🔥 Download flamegraph stacks (profile.folded)",
+                data=folded_path.read_bytes(),
+                file_name=folded_path.name,
+                mime="text/plain"
+            )
 
 else:
     # Welcome message
@@ -0,0 +1,108 @@
+"""
+Import-time benchmark - Measures cold-start cost of the CLI, app and pipeline modules
+Uses: python -X importtime (stdlib), each sample runs in a fresh interpreter
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Committed medians every run is checked against; refresh with --update-baseline when a cost is intended
+BASELINE = ROOT / "benchmarks" / "import_baseline.json"
+
+# Module -> what it represents for startup time
+TARGETS = {
+    "main": "CLI / batch worker",
+    "src.brand_analyzer": "brand analysis only",
+    "src.creative_generator": "image generation",
+    "src.caption_writer": "caption generation",
+}
+
+
+def measure_import(module: str) -> int:
+    """Cumulative import time of one module in microseconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    # importtime lines: "import time: self [us] | cumulative | imported package"
+    for line in reversed(result.stderr.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def run_benchmark(repeat: int = 5) -> dict:
+    """Median cumulative import time per target"""
+    results = {}
+    for module, label in TARGETS.items():
+        samples = [measure_import(module) for _ in range(repeat)]
+        results[module] = {
+            "label": label,
+            "median_ms": round(statistics.median(samples) / 1000, 1),
+            "samples_ms": [round(s / 1000, 1) for s in samples]
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 1.25, min_delta_ms: float = 5.0) -> list:
+    """Return the modules that got slower than baseline x tolerance (ignoring a few ms of noise)"""
+    regressions = []
+    for module, data in results.items():
+        if module not in baseline:
+            continue
+        before = baseline[module]["median_ms"]
+        if data["median_ms"] > before * tolerance and data["median_ms"] - before > min_delta_ms:
+            regressions.append(module)
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark module import time")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", default=str(BASELINE), help="Compare against a previous JSON result")
+    parser.add_argument("--update-baseline", action="store_true", help="Save these results as the committed baseline")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.repeat)
+
+    print(f"{'module':<26} {'median ms':>10}  use case")
+    for module, data in results.items():
+        print(f"{module:<26} {data['median_ms']:>10}  {data['label']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to: {args.output}")
+
+    if args.update_baseline:
+        with open(BASELINE, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline updated: {BASELINE.relative_to(ROOT)}")
+        sys.exit(0)
+
+    if not Path(args.baseline).is_file():
+        print(f"\n❌ No baseline at {args.baseline} (record one with --update-baseline)")
+        sys.exit(1)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline)
+    if regressions:
+        for module in regressions:
+            print(f"❌ {module}: {results[module]['median_ms']} ms vs {baseline[module]['median_ms']} ms baseline")
+        print(f"\n❌ Import time regressed: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\n✅ No import time regressions")
@@ -0,0 +1,332 @@
+"""
+Web front end load test - Simulated users submit the app's form while concurrency ramps up
+Uses: src.submission (app.py's submit path: temp uploads, pipeline thread, event drain) plus the
+ZIP download on one shared studio with stub backends; RSS of this process, which hosts the studio
+like a Streamlit server does, from /proc; JSON reports that can be compared between releases
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from stress_sessions import TONES, build_studio
+from src.events import CreativeGenerated
+from src.scheduler import PriorityScheduler
+from src.submission import run_submission
+
+# 2: RSS is reported as growth over the step instead of the harness process's absolute peak
+REPORT_VERSION = 2
+
+AUDIENCES = ["young professionals", "parents", "students", "fitness enthusiasts", "retirees"]
+RATIO_CHOICES = [["1:1"], ["1:1", "9:16"], ["1:1", "9:16", "16:9"], ["16:9"]]
+EXPORT_CHOICES = [[], [], ["instagram_square"], ["display"]]
+
+# Compared metrics and whether a higher value is worse
+COMPARED = {
+    "ttfi_p95_s": True,
+    "ttz_p95_s": True,
+    "rss_growth_mb": True,
+    "error_rate": True,
+    "placeholder_rate": True,
+    "throughput_per_min": False,
+}
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process (studio plus harness) in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak, on systems without /proc
+
+
+class RssSampler:
+    """Samples RSS on a background thread and keeps the peak"""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+class DiscardOutput(io.TextIOBase):
+    """stdout for pipeline logs during a step; keeps nothing, so it adds nothing to the measured RSS"""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def percentile(values: list, q: float) -> float:
+    """q-th percentile (0-1) by nearest rank, None for no values"""
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(round(q * (len(values) - 1))))], 3)
+
+
+def random_logo(rng: np.random.Generator) -> tuple:
+    """(bytes, suffix) of a logo with random size, colors, shapes and format, like real uploads"""
+    size = int(rng.integers(96, 640))
+    background = tuple(int(c) for c in rng.integers(0, 256, 3))
+    image = Image.new("RGB", (size, size), background)
+    draw = ImageDraw.Draw(image)
+    for _ in range(int(rng.integers(1, 4))):
+        x0, y0 = (int(v) for v in rng.integers(0, size // 2, 2))
+        x1, y1 = x0 + int(rng.integers(size // 8, size // 2)), y0 + int(rng.integers(size // 8, size // 2))
+        fill = tuple(int(c) for c in rng.integers(0, 256, 3))
+        (draw.ellipse if rng.random() < 0.5 else draw.rectangle)((x0, y0, x1, y1), fill=fill)
+
+    image_format = "PNG" if rng.random() < 0.6 else "JPEG"
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue(), ".png" if image_format == "PNG" else ".jpg"
+
+
+def random_form(rng: np.random.Generator, user: int, submission: int) -> dict:
+    """Form fields one user submits; brand names are unique so the step cache can't hide the load"""
+    return {
+        "brand_name": f"Load{user}x{submission}",
+        "product_name": f"Product {int(rng.integers(1000))}",
+        "tone": TONES[int(rng.integers(len(TONES)))],
+        "target_audience": AUDIENCES[int(rng.integers(len(AUDIENCES)))],
+        "num_variations": int(rng.integers(1, 4)),
+        "aspect_ratios": RATIO_CHOICES[int(rng.integers(len(RATIO_CHOICES)))],
+        "composite": bool(rng.random() < 0.5),
+        "oversample": 2 if rng.random() < 0.2 else 1,
+        "exports": EXPORT_CHOICES[int(rng.integers(len(EXPORT_CHOICES)))],
+    }
+
+
+def submit_form(studio, form: dict, logo: bytes, suffix: str) -> dict:
+    """One form submission through app.py's submit path, then its ZIP download; timings are from the click"""
+    started = time.perf_counter()
+    sample = {"ok": False, "error": None, "ttfi_s": None, "ttz_s": None, "creatives": 0, "placeholders": 0}
+
+    def on_event(event):
+        if isinstance(event, CreativeGenerated):
+            if sample["ttfi_s"] is None:
+                sample["ttfi_s"] = time.perf_counter() - started
+            sample["creatives"] += 1
+            sample["placeholders"] += event.backend == "placeholder"
+
+    try:
+        result = run_submission(studio, form, (logo, suffix), on_event=on_event, poll=0.05)
+        # The download button's archive
+        studio.build_zip(result["session_folder"])
+        sample["ttz_s"] = time.perf_counter() - started
+        sample["ok"] = True
+    except Exception as e:
+        sample["error"] = f"{type(e).__name__}: {e}"
+    return sample
+
+
+def run_step(studio, users: int, submissions: int, think_time: float, seed: int) -> dict:
+    """users concurrent users, each submitting the form submissions times"""
+    samples = []
+    lock = threading.Lock()
+
+    def user_loop(user):
+        rng = np.random.default_rng([seed, users, user])
+        for submission in range(submissions):
+            form = random_form(rng, user, submission)
+            logo, suffix = random_logo(rng)
+            sample = submit_form(studio, form, logo, suffix)
+            with lock:
+                samples.append(sample)
+            time.sleep(think_time * rng.uniform(0.5, 1.5))
+
+    rss_start = rss_mb()
+    started = time.perf_counter()
+    with RssSampler() as sampler:
+        threads = [threading.Thread(target=user_loop, args=(u,), name=f"user-{u}") for u in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    ok = [s for s in samples if s["ok"]]
+    creatives = sum(s["creatives"] for s in samples)
+    errors = sorted({s["error"] for s in samples if s["error"]})
+    return {
+        "users": users,
+        "submissions": len(samples),
+        "wall_s": round(elapsed, 2),
+        "throughput_per_min": round(len(ok) / elapsed * 60, 2),
+        "ttfi_p50_s": percentile([s["ttfi_s"] for s in samples if s["ttfi_s"] is not None], 0.5),
+        "ttfi_p95_s": percentile([s["ttfi_s"] for s in samples if s["ttfi_s"] is not None], 0.95),
+        "ttz_p50_s": percentile([s["ttz_s"] for s in ok], 0.5),
+        "ttz_p95_s": percentile([s["ttz_s"] for s in ok], 0.95),
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else None,
+        "placeholder_rate": round(sum(s["placeholders"] for s in samples) / creatives, 4) if creatives else None,
+        # The harness shares the process; its own footprint is in rss_start, so growth is the load's
+        "rss_start_mb": round(rss_start, 1),
+        "rss_peak_mb": round(sampler.peak, 1),
+        "rss_growth_mb": round(sampler.peak - rss_start, 1),
+        "rss_end_mb": round(rss_mb(), 1),
+        "errors": errors[:5],
+    }
+
+
+def revision() -> str:
+    """Short git commit of the tree under test, if it is a checkout"""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_ramp(
+    levels: list,
+    submissions: int = 2,
+    latency: float = 0.05,
+    fail_rate: float = 0.0,
+    think_time: float = 0.5,
+    max_error_rate: float = 0.05,
+    max_ttz: float = 30.0,
+    seed: int = 0,
+    label: str = None
+) -> dict:
+    """Ramp concurrent users through levels on one shared studio, stopping once the SLO breaks"""
+    config = {
+        "levels": levels, "submissions_per_user": submissions, "latency_s": latency, "fail_rate": fail_rate,
+        "think_time_s": think_time, "max_error_rate": max_error_rate, "max_ttz_s": max_ttz, "seed": seed,
+    }
+    steps = []
+    sustained = 0
+
+    with tempfile.TemporaryDirectory(prefix="load_test_") as tmp:
+        # Same sharing as the app: one scheduler and one studio per server process
+        studio, client = build_studio(Path(tmp) / "output", latency, PriorityScheduler(max_concurrent=4), fail_rate)
+
+        for users in levels:
+            # Pipeline logs from dozens of threads would drown the report; errors still reach stderr
+            with contextlib.redirect_stdout(DiscardOutput()):
+                step = run_step(studio, users, submissions, think_time, seed)
+            steps.append(step)
+
+            within = step["error_rate"] <= max_error_rate and step["ttz_p95_s"] is not None and step["ttz_p95_s"] <= max_ttz
+            print(f"👥 {users:>3} users: first image p95 {step['ttfi_p95_s']}s, ZIP p95 {step['ttz_p95_s']}s, "
+                  f"errors {step['error_rate']:.1%}, RSS +{step['rss_growth_mb']} MB {'✅' if within else '❌'}")
+            if not within:
+                break
+            sustained = users
+
+    return {
+        "version": REPORT_VERSION,
+        "label": label,
+        "revision": revision(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": config,
+        "backend_calls": client.calls,
+        "injected_failures": client.failures,
+        "max_users_within_slo": sustained,
+        "steps": steps,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.1) -> list:
+    """Per-level metric changes from baseline to current; regressions exceed tolerance (relative)"""
+    if baseline.get("version") != current.get("version"):
+        raise ValueError(f"Report versions differ ({baseline.get('version')} vs {current.get('version')})")
+
+    base_steps = {s["users"]: s for s in baseline["steps"]}
+    rows = []
+    for step in current["steps"]:
+        base = base_steps.get(step["users"])
+        if base is None:
+            continue
+        for metric, higher_is_worse in COMPARED.items():
+            old, new = base.get(metric), step.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else (0.0 if new == old else float("inf"))
+            worse = change > tolerance if higher_is_worse else change < -tolerance
+            # Rates near zero swing wildly in relative terms; also require a real absolute move
+            if metric.endswith("_rate"):
+                worse = worse and new - old > 0.01
+            rows.append({"users": step["users"], "metric": metric, "baseline": old, "current": new,
+                         "change": round(change, 3), "regression": worse})
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load-test the web front end's submit path with simulated users")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Concurrent users per ramp step")
+    parser.add_argument("--submissions", type=int, default=2, help="Form submissions per user per step")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub backend latency in seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of stub image calls that fail")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean pause between a user's submissions")
+    parser.add_argument("--max-error-rate", type=float, default=0.05, help="SLO: stop ramping above this error rate")
+    parser.add_argument("--max-ttz", type=float, default=30.0, help="SLO: stop ramping above this p95 time-to-ZIP")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", help="Release name stored in the report")
+    parser.add_argument("--output", default="load_report.json", help="Where to write the JSON report")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two reports instead of running")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, current = (json.loads(Path(path).read_text()) for path in args.compare)
+        rows = compare(baseline, current, args.tolerance)
+        print(f"📊 {baseline.get('label') or baseline.get('revision')} → {current.get('label') or current.get('revision')}")
+        for row in rows:
+            mark = "❌" if row["regression"] else "  "
+            print(f"{mark} {row['users']:>3} users  {row['metric']:<20} {row['baseline']:>10} → {row['current']:<10} ({row['change']:+.1%})")
+        print(f"👥 Max users within SLO: {baseline['max_users_within_slo']} → {current['max_users_within_slo']}")
+        regressions = [row for row in rows if row["regression"]]
+        if regressions or current["max_users_within_slo"] < baseline["max_users_within_slo"]:
+            print(f"\n❌ {len(regressions)} regressions")
+            sys.exit(1)
+        print("\n✅ No regressions")
+        sys.exit(0)
+
+    report = run_ramp(
+        args.levels, args.submissions, args.latency, args.fail_rate, args.think_time,
+        args.max_error_rate, args.max_ttz, args.seed, args.label
+    )
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"\n👥 Max users within SLO: {report['max_users_within_slo']}")
+    print(f"💾 Report saved to: {args.output}")
@@ -0,0 +1,130 @@
+"""
+Queue worker crash test - Several worker processes drain a shared queue while one is SIGKILLed
+Uses: worker.py processes with stub backends, the SQLite broker and a temporary output store
+"""
+
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from stress_sessions import TONES, build_studio, make_logo
+from src.job_queue import SQLiteBroker
+from worker import enqueue_job, worker_main
+
+LATENCY = 0.8
+
+
+def stub_studio(output_dir: str):
+    """Worker-process studio whose backends are stubs (no network, no quota)"""
+    studio, _ = build_studio(Path(output_dir), LATENCY)
+    return studio
+
+
+def run_crash_test(jobs: int = 8, processes: int = 3, lease_seconds: float = 3.0, timeout: float = 120.0) -> dict:
+    """Drain a queue with worker processes, killing one mid-job; every job must still finish"""
+    with tempfile.TemporaryDirectory(prefix="queue_workers_") as tmp:
+        tmp = Path(tmp)
+        output_dir, queue_path = tmp / "output", tmp / "output" / ".queue.db"
+        output_dir.mkdir()
+        logo = tmp / "logo.png"
+        make_logo(logo)
+
+        broker = SQLiteBroker(queue_path)
+        job_ids = [
+            enqueue_job(
+                broker, str(output_dir), str(logo),
+                brand_name=f"Brand{i}", product_name=f"Product {i}", tone=TONES[i % len(TONES)],
+                num_variations=1, aspect_ratios=["1:1"], composite=False
+            )
+            for i in range(jobs)
+        ]
+
+        workers = {}
+        for i in range(processes):
+            process = multiprocessing.Process(target=worker_main, args=(str(queue_path), str(output_dir), lease_seconds, 0.2, False, stub_studio), name=f"queue-worker-{i}")
+            process.start()
+            workers[process.pid] = process
+
+        # Kill whichever worker is first seen holding a lease, so its job has to be retried
+        start = time.perf_counter()
+        killed_job = None
+        while killed_job is None and time.perf_counter() - start < timeout:
+            for job_id in job_ids:
+                job = broker.get(job_id)
+                pid = int(job["lease_owner"].split("-")[-2]) if job["status"] == "leased" else None
+                if pid in workers:
+                    os.kill(pid, signal.SIGKILL)
+                    workers[pid].join()
+                    killed_job = job_id
+                    print(f"💥 Killed worker {pid} while it held job {job_id}")
+                    break
+            time.sleep(0.05)
+
+        while time.perf_counter() - start < timeout:
+            stats = broker.stats()
+            if stats["done"] + stats["failed"] == jobs:
+                break
+            time.sleep(0.2)
+        elapsed = time.perf_counter() - start
+
+        for process in workers.values():
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+        final = {job_id: broker.get(job_id) for job_id in job_ids}
+        problems = []
+        for job_id, job in final.items():
+            if job["status"] != "done":
+                problems.append(f"job {job_id} ended {job['status']}: {job['error']}")
+                continue
+            folder = Path(job["result"]["session_folder"])
+            if not (folder / "manifest.json").is_file():
+                problems.append(f"job {job_id}: {folder} has no manifest")
+            elif json.loads((folder / "manifest.json").read_text())["brand"] != job["payload"]["brand_name"]:
+                problems.append(f"job {job_id}: manifest belongs to another brand")
+        leftover = list((output_dir / ".uploads").iterdir())
+        if leftover:
+            problems.append(f"{len(leftover)} uploads left behind by finished jobs")
+        if killed_job is None:
+            problems.append("no worker was caught holding a lease")
+        elif final[killed_job]["attempts"] < 2:
+            problems.append(f"killed job {killed_job} was not retried")
+
+        return {
+            "jobs": jobs,
+            "processes": processes,
+            "elapsed_s": round(elapsed, 2),
+            "stats": broker.stats(),
+            "killed_job": killed_job,
+            "killed_job_attempts": final[killed_job]["attempts"] if killed_job else None,
+            "sessions": len([p for p in output_dir.iterdir() if p.is_dir() and not p.name.startswith(".")]),
+            "problems": problems,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Queue workers survive a crashed worker")
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=3)
+    parser.add_argument("--lease", type=float, default=3.0)
+    args = parser.parse_args()
+
+    report = run_crash_test(args.jobs, args.processes, args.lease)
+    print(json.dumps({k: v for k, v in report.items() if k != "problems"}, indent=2))
+    for problem in report["problems"]:
+        print(f"❌ {problem}")
+    if report["problems"]:
+        sys.exit(1)
+    print("✅ Every job finished despite the crashed worker")
@@ -0,0 +1,74 @@
+"""
+Scoring benchmark - Images per second for BrandScorer on realistic JPEG creatives
+Uses: synthetic 1024px JPEGs in memory (no API calls)
+"""
+
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.brand_scorer import BrandScorer, thumbnail
+from src.encoded_image import EncodedImage
+
+PROFILE = {
+    "palette": [
+        {"rgb": (20, 40, 160)}, {"rgb": (230, 180, 30)}, {"rgb": (245, 245, 245)},
+        {"rgb": (30, 30, 30)}, {"rgb": (200, 60, 60)},
+    ]
+}
+
+
+def make_images(count: int, size: int = 1024) -> list:
+    """Blocky noise JPEGs at the size the image backends return"""
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(count):
+        blocks = rng.integers(0, 255, (size // 64, size // 64, 3), dtype=np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(blocks).resize((size, size), Image.BICUBIC).save(buffer, format="JPEG", quality=90)
+        images.append(EncodedImage(buffer.getvalue()))
+    return images
+
+
+def run_benchmark(count: int = 200, batch: int = 64) -> dict:
+    """Time decode+score end to end, and scoring of ready thumbnails alone"""
+    scorer = BrandScorer(PROFILE)
+    images = make_images(count)
+
+    started = time.perf_counter()
+    for i in range(0, count, batch):
+        scorer.score_batch(images[i:i + batch])
+    end_to_end = time.perf_counter() - started
+
+    pixels = np.stack([thumbnail(image, scorer.thumb_size) for image in images])
+    started = time.perf_counter()
+    for i in range(0, count, batch):
+        scorer.score_pixels(pixels[i:i + batch])
+    scoring_only = time.perf_counter() - started
+
+    return {
+        "images": count,
+        "batch": batch,
+        "end_to_end_per_s": round(count / end_to_end, 1),
+        "scoring_only_per_s": round(count / scoring_only, 1),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark brand scoring throughput")
+    parser.add_argument("--images", type=int, default=200, help="Images to score")
+    parser.add_argument("--batch", type=int, default=64, help="Images per score_batch call")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.images, args.batch)
+    print(f"🖼️ {result['images']} JPEGs (1024px), batches of {result['batch']}")
+    print(f"⚡ Decode + score: {result['end_to_end_per_s']} images/s")
+    print(f"⚡ Score only:     {result['scoring_only_per_s']} images/s")
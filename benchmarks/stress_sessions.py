@@ -0,0 +1,222 @@
+"""
+Session stress test - Runs dozens of concurrent pipelines on one shared CreativeStudio
+Uses: stub image/caption backends injected into the shared clients (no network, no API quota)
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from main import CreativeStudio
+from src.caption_writer import CaptionWriter
+from src.creative_generator import CreativeGenerator
+
+TONES = ["luxury", "playful", "minimal", "bold"]
+
+
+class StubImageClient:
+    """Stands in for InferenceClient: a noisy JPEG derived from the seed after a short delay
+
+    fail_rate injects upstream 500s into that share of calls (seeded, so runs are repeatable).
+    """
+
+    def __init__(self, latency: float = 0.02, fail_rate: float = 0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self.failures = 0
+        self._rng = np.random.default_rng(0)
+        self._lock = threading.Lock()
+
+    def post(self, json=None, model=None, task=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            failing = self.fail_rate > 0 and self._rng.random() < self.fail_rate
+            self.failures += failing
+        if failing:
+            time.sleep(self.latency)
+            raise RuntimeError("500 Server Error: stub upstream failure")
+        params = json["parameters"]
+        rng = np.random.default_rng(params["seed"])
+        blocks = rng.integers(0, 255, (params["height"] // 32, params["width"] // 32, 3), dtype=np.uint8)
+        image = Image.fromarray(blocks).resize((params["width"], params["height"]), Image.NEAREST)
+        time.sleep(self.latency)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        return buffer.getvalue()
+
+
+class StubCaptionModel:
+    """Stands in for the Gemini model with a fixed JSON answer"""
+
+    class Response:
+        text = json.dumps({"captions": [
+            {"variation": i, "headline": f"Headline {i}", "subheadline": "Sub", "cta": "Shop",
+             "long_caption": "Caption", "hashtags": ["#stress"]}
+            for i in range(1, 4)
+        ]})
+
+    def generate_content(self, prompt):
+        time.sleep(0.01)
+        return self.Response()
+
+
+def make_logo(path: Path):
+    """Small two-color logo for brand analysis"""
+    image = Image.new("RGB", (128, 128), (20, 40, 160))
+    image.paste((230, 180, 30), (32, 32, 96, 96))
+    image.save(path)
+
+
+def build_studio(output_dir: Path, latency: float, scheduler=None, fail_rate: float = 0.0) -> tuple:
+    """Shared studio whose generator and writer talk to stubs"""
+    os.environ.setdefault("HUGGINGFACE_API_KEY", "stress-test")
+    os.environ.setdefault("GEMINI_API_KEY", "stress-test")
+
+    client = StubImageClient(latency, fail_rate)
+    generator = CreativeGenerator(scheduler=scheduler)
+    generator._client = client
+    writer = CaptionWriter(scheduler=scheduler)
+    writer.model = StubCaptionModel()
+
+    studio = CreativeStudio(output_dir=str(output_dir), scheduler=scheduler, generator=generator, writer=writer)
+    return studio, client
+
+
+def check_session(studio: CreativeStudio, request: dict, result: dict, aspect_ratios: list) -> list:
+    """Problems found in one session's outputs (empty if consistent)"""
+    problems = []
+    folder = Path(result["session_folder"])
+    manifest = json.loads((folder / "manifest.json").read_text())
+
+    if manifest["brand"] != request["brand_name"] or manifest["product"] != request["product_name"]:
+        problems.append(f"{folder.name}: manifest belongs to {manifest['brand']}/{manifest['product']}")
+
+    expected = request["num_variations"] * len(aspect_ratios)
+    if len(manifest["creatives"]) != expected:
+        problems.append(f"{folder.name}: {len(manifest['creatives'])} creatives in manifest, expected {expected}")
+
+    for entry in manifest["creatives"]:
+        if entry["filepath"] is None:
+            problems.append(f"{folder.name}: creative {entry['id']} not saved ({entry['flag']})")
+            continue
+        path = folder / entry["filepath"]
+        if not path.is_file():
+            problems.append(f"{folder.name}: missing {entry['filepath']}")
+        elif hashlib.sha256(path.read_bytes()).hexdigest() != entry["sha256"]:
+            problems.append(f"{folder.name}: checksum mismatch for {entry['filepath']}")
+
+    if not (folder / "captions.json").is_file():
+        problems.append(f"{folder.name}: captions.json missing")
+
+    with zipfile.ZipFile(io.BytesIO(studio.build_zip(folder))) as zipf:
+        names = set(zipf.namelist())
+    for entry in manifest["creatives"]:
+        if entry["filepath"] and entry["filepath"] not in names:
+            problems.append(f"{folder.name}: {entry['filepath']} missing from ZIP")
+
+    return problems
+
+
+def run_stress(sessions: int = 24, workers: int = 12, variations: int = 2, latency: float = 0.02) -> dict:
+    """Run concurrent sessions and verify each one's folder, manifest and ZIP"""
+    aspect_ratios = ["1:1", "9:16", "16:9"]
+
+    with tempfile.TemporaryDirectory(prefix="stress_sessions_") as tmp:
+        tmp = Path(tmp)
+        logo = tmp / "logo.png"
+        make_logo(logo)
+        studio, client = build_studio(tmp / "output", latency)
+
+        # Every fourth brief repeats, so coalescing is exercised alongside distinct work
+        requests = [
+            {
+                "brand_name": f"Brand{i % (sessions - sessions // 4)}",
+                "product_name": f"Product {i % (sessions - sessions // 4)}",
+                "tone": TONES[i % len(TONES)],
+                "num_variations": variations,
+            }
+            for i in range(sessions)
+        ]
+
+        def run_one(request):
+            started = time.perf_counter()
+            result = studio.run_pipeline(
+                logo_path=str(logo),
+                aspect_ratios=aspect_ratios,
+                **request
+            )
+            return result, time.perf_counter() - started
+
+        # Pipeline progress from dozens of threads would drown the report
+        real_stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(run_one, requests))
+        finally:
+            sys.stdout.close()
+            sys.stdout = real_stdout
+        elapsed = time.perf_counter() - started
+
+        problems = []
+        folders = [result["session_folder"] for result, _ in outcomes]
+        if len(set(folders)) != len(folders):
+            problems.append(f"{len(folders) - len(set(folders))} sessions shared a folder")
+        for request, (result, _) in zip(requests, outcomes):
+            problems.extend(check_session(studio, request, result, aspect_ratios))
+
+        durations = sorted(duration for _, duration in outcomes)
+        storage = studio.blobs.stats()
+        return {
+            "sessions": sessions,
+            "workers": workers,
+            "creatives_expected": sessions * variations * len(aspect_ratios),
+            "backend_calls": client.calls,
+            "wall_s": round(elapsed, 2),
+            "session_p50_s": round(durations[len(durations) // 2], 2),
+            "session_max_s": round(durations[-1], 2),
+            "blob_mb": round(storage["stored_bytes"] / 1e6, 1),
+            "shared_mb": round(storage["saved_bytes"] / 1e6, 1),
+            "problems": problems,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stress-test concurrent sessions on one shared studio")
+    parser.add_argument("--sessions", type=int, default=24, help="Pipelines to run")
+    parser.add_argument("--workers", type=int, default=12, help="Sessions running at once")
+    parser.add_argument("--variations", type=int, default=2, help="Variations per session")
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub backend latency in seconds")
+    args = parser.parse_args()
+
+    report = run_stress(args.sessions, args.workers, args.variations, args.latency)
+
+    print(f"🧪 {report['sessions']} sessions on {report['workers']} threads in {report['wall_s']}s "
+          f"(p50 {report['session_p50_s']}s, max {report['session_max_s']}s)")
+    print(f"🖼️ {report['creatives_expected']} creatives from {report['backend_calls']} backend calls")
+    print(f"💾 {report['blob_mb']} MB in the blob store, {report['shared_mb']} MB shared across sessions")
+
+    if report["problems"]:
+        print(f"\n❌ {len(report['problems'])} problems:")
+        for problem in report["problems"]:
+            print(f"   - {problem}")
+        sys.exit(1)
+    print("\n✅ Every session produced a complete, isolated output")
@@ -2,9 +2,14 @@
 Main Orchestrator - Coordinates the entire creative generation pipeline
 """
 
+import atexit
+import hashlib
 import json
 import os
 import sys
+import threading
+from contextlib import contextmanager
+from io import BytesIO
 from pathlib import Path
 from datetime import datetime
 import zipfile
@@ -12,28 +17,148 @@ import zipfile
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
+from src.blob_store import BlobStore
 from src.brand_analyzer import BrandAnalyzer
 from src.creative_generator import CreativeGenerator
 from src.caption_writer import CaptionWriter
+from src.exporter import PlatformExporter, export_pool, resolve_presets
+from src.profiler import PipelineProfiler, StageTimer
+from src.quota import QuotaExceeded, QuotaLedger
+from src.retention import RetentionPolicy, SessionJanitor
+from src.step_cache import StepCache
 
 
-class CreativeStudio:
-    """Main orchestration class for AI Creative Studio"""
+class PipelineSession:
+    """Everything one pipeline run produces, so a shared studio can run many at once"""
     
-    def __init__(self, output_dir: str = "output"):
-        self.output_dir = Path(output_dir)
-        self.session_dir = None
+    def __init__(
+        self,
+        folder: Path,
+        brand_name: str,
+        product_name: str,
+        tone: str,
+        target_audience: str,
+        aspect_ratios: list,
+        logo_path: str
+    ):
+        self.folder = folder
+        self.brand_name = brand_name
+        self.product_name = product_name
+        self.tone = tone
+        self.target_audience = target_audience
+        self.aspect_ratios = aspect_ratios
+        self.logo_path = logo_path
         self.brand_profile = None
         self.creatives = []
         self.captions = None
+        self.timings = StageTimer()
+        self.progress = None
+        self.reuse = True
+        self.brand_images = []
+        self.export_presets = {}
+        self.reused = {"profile": False, "creatives": 0, "captions": False}
+    
+    def emit(self, event):
+        """Tag a typed event with this session, count it, and pass it to the caller's callback
+        
+        Called from generator and hedge threads too, so callbacks must be thread-safe.
+        """
+        # src.events (dataclasses) loads with the first run, not with `import main`
+        from src.events import record_metrics
+        event.session = self.folder.name
+        record_metrics(event)
+        if self.progress is not None:
+            self.progress(event)
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time one pipeline stage and report its start and end"""
+        from src.events import StageFinished, StageStarted
+        self.emit(StageStarted(name))
+        with self.timings.stage(name):
+            yield
+        timing = self.timings.stages[-1]
+        self.emit(StageFinished(name, timing["wall_s"], timing["cpu_s"]))
+    
+    @property
+    def saved_creatives(self) -> list:
+        """Creatives that were written to disk"""
+        return [c for c in self.creatives if "filepath" in c]
+
+
+class CreativeStudio:
+    """Main orchestration class for AI Creative Studio
+    
+    One instance can serve many concurrent sessions: per-run state lives in a
+    PipelineSession, while API clients, pools and caches are shared.
+    """
+    
+    PRECOMPRESSED = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+    
+    def __init__(
+        self,
+        output_dir: str = "output",
+        hedging: bool = False,
+        quota: QuotaLedger = None,
+        scheduler=None,
+        generator: CreativeGenerator = None,
+        writer: CaptionWriter = None,
+        retention: RetentionPolicy = None
+    ):
+        self.output_dir = Path(output_dir)
+        self.hedging = hedging
+        self.quota = quota or QuotaLedger(self.output_dir / ".quota.json")
+        self.scheduler = scheduler
+        self.blobs = BlobStore(self.output_dir / ".blobs")
+        self.janitor = SessionJanitor(self.output_dir, retention, self.blobs)
+        self.cache = StepCache(self.output_dir / ".cache", self.blobs)
+        self._generator = generator
+        self._writer = writer
+        self._export_pool = None
+        self._lock = threading.Lock()
+    
+    def shared_generator(self) -> CreativeGenerator:
+        """Image generator shared by every session (created on first use)"""
+        with self._lock:
+            if self._generator is None:
+                self._generator = CreativeGenerator(hedging=self.hedging, quota=self.quota, scheduler=self.scheduler)
+            return self._generator
+    
+    def shared_writer(self) -> CaptionWriter:
+        """Caption writer shared by every session (created on first use)"""
+        with self._lock:
+            if self._writer is None:
+                self._writer = CaptionWriter(quota=self.quota, scheduler=self.scheduler)
+            return self._writer
+    
+    def export_pool(self):
+        """Process pool for platform exports, shared by every session (started on first use)"""
+        with self._lock:
+            if self._export_pool is None:
+                self._export_pool = export_pool()
+                # Stop the workers before interpreter teardown rather than during it
+                atexit.register(self._export_pool.shutdown)
+            return self._export_pool
+    
+    def warm_up(self, background: bool = False):
+        """Probe image backends so the first request goes to a warm one"""
+        return self.shared_generator().warm_up(background=background)
     
     def create_session_folder(self, brand_name: str) -> Path:
-        """Create timestamped session folder"""
+        """Create timestamped session folder (suffixed if another session got the same second)"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         session_name = f"{brand_name}_{timestamp}".replace(" ", "_")
+        self.output_dir.mkdir(parents=True, exist_ok=True)
         
         session_path = self.output_dir / session_name
-        session_path.mkdir(parents=True, exist_ok=True)
+        attempt = 1
+        while True:
+            try:
+                session_path.mkdir()
+                break
+            except FileExistsError:
+                attempt += 1
+                session_path = self.output_dir / f"{session_name}_{attempt}"
         
         # Create subfolders
         (session_path / "creatives").mkdir(exist_ok=True)
@@ -41,7 +166,6 @@ class CreativeStudio:
         (session_path / "9x16").mkdir(exist_ok=True)
         (session_path / "16x9").mkdir(exist_ok=True)
         
-        self.session_dir = session_path
         return session_path
     
     def run_pipeline(
@@ -52,141 +176,520 @@ class CreativeStudio:
         tone: str,
         target_audience: str = "general consumers",
         num_variations: int = 3,
-        aspect_ratios: list = None
+        aspect_ratios: list = None,
+        composite: bool = True,
+        defer_on_quota: bool = False,
+        priority: str = "interactive",
+        package: bool = False,
+        profile: bool = False,
+        oversample: int = 1,
+        captions: bool = True,
+        progress=None,
+        reuse: bool = True,
+        exports: list = None,
+        brand_images: list = None
     ) -> dict:
-        """Run the complete creative generation pipeline"""
+        """Run the complete creative generation pipeline
+        
+        progress, if given, is called with every src.events event (stages, creatives as
+        they are saved, backend fallbacks, retry waits, captions, ZIP), possibly from worker threads.
+        With reuse, steps whose inputs match an earlier run (brand profile, image slots,
+        captions) come from the step cache and only the affected ones are recomputed.
+        exports lists src.exporter preset or group names ("social", "display", "all") to
+        crop/resize every creative into, under exports/<platform>/.
+        brand_images (product shots, past campaigns) are fused with the logo into the brand profile.
+        """
         
         if aspect_ratios is None:
             aspect_ratios = ["1:1", "9:16", "16:9"]
+        export_presets = resolve_presets(exports)
+        
+        # Check the budget before any work: reroute images, or defer the whole job
+        quota_plan = self.quota.plan_job(self.quota.estimate_job(num_variations, aspect_ratios, oversample))
+        if not quota_plan["fits"] and defer_on_quota:
+            raise QuotaExceeded("; ".join(quota_plan["reasons"]), quota_plan["defer_until"])
+        for reason in quota_plan["reasons"]:
+            print(f"⚠️ Quota: {reason}")
         
         print("\n" + "="*60)
         print("🚀 AI CREATIVE STUDIO - PIPELINE STARTED")
         print("="*60 + "\n")
         
         # Create session folder
-        session_folder = self.create_session_folder(brand_name)
-        print(f"📁 Session folder: {session_folder}\n")
+        session = PipelineSession(
+            self.create_session_folder(brand_name),
+            brand_name, product_name, tone, target_audience, aspect_ratios, logo_path
+        )
+        session.progress = progress
+        session.reuse = reuse
+        session.export_presets = export_presets
+        session.brand_images = list(brand_images or [])
+        print(f"📁 Session folder: {session.folder}\n")
+        
+        # Retention must not delete a session while it is being written
+        with self.janitor.pinned(session.folder):
+            if not profile:
+                return self._run_session(session, num_variations, composite, quota_plan, priority, package, oversample, captions)
+            
+            with PipelineProfiler() as profiler:
+                result = self._run_session(session, num_variations, composite, quota_plan, priority, package, oversample, captions)
+            result["profile"] = profiler.write(session.folder, session.timings)
+            print(f"⏱️ Profile saved to: {', '.join(Path(p).name for p in result['profile'].values())}\n")
+            return result
+    
+    def _run_session(
+        self,
+        session: PipelineSession,
+        num_variations: int,
+        composite: bool,
+        quota_plan: dict,
+        priority: str,
+        package: bool,
+        oversample: int,
+        captions: bool
+    ) -> dict:
+        """Pipeline steps for one session"""
+        from src.events import CaptionReady, CreativeGenerated, ZipReady
         
         # Step 1: Analyze Brand
-        print("STEP 1/3: Brand Analysis")
+        print("STEP 1/4: Brand Analysis")
         print("-" * 40)
-        analyzer = BrandAnalyzer(logo_path)
-        self.brand_profile = analyzer.analyze()
-        
-        profile_path = session_folder / "brand_profile.json"
-        analyzer.save_profile(str(profile_path))
+        with session.stage("analysis"):
+            session.brand_profile = self._analyze_brand(session)
         print()
         
         # Step 2: Generate Creatives
-        print("STEP 2/3: Creative Generation")
+        print("STEP 2/4: Creative Generation")
         print("-" * 40)
         
         try:
-            generator = CreativeGenerator()
-            self.creatives = generator.generate_creative_set(
-                brand_profile=self.brand_profile,
-                product_name=product_name,
-                tone=tone,
-                num_variations=num_variations,
-                aspect_ratios=aspect_ratios
-            )
-            
-            # Save images
-            for creative in self.creatives:
-                ratio = creative["aspect_ratio"]
-                creative_id = creative["id"]
-                
-                filename = f"creative_{creative_id}_{ratio.replace(':', 'x')}.png"
-                filepath = session_folder / ratio.replace(":", "x") / filename
-                
-                creative["image"].save(filepath)
-                creative["filepath"] = str(filepath)
-                print(f"💾 Saved: {filename}")
+            generator = self.shared_generator().for_session(lane=priority, excluded_buckets=quota_plan["reroute"], events=session.emit)
+            total = min(num_variations, len(CreativeGenerator.VARIATION_MODIFIERS)) * len(session.aspect_ratios)
             
-            print(f"\n✅ Generated {len(self.creatives)} creatives across {len(aspect_ratios)} formats\n")
+            # Each image is written as soon as it arrives; only metadata stays in memory.
+            # Seeds are per session; only duplicates already in flight share upstream calls.
+            with session.stage("generation"):
+                for creative in generator.iter_creatives(
+                    brand_profile=session.brand_profile,
+                    product_name=session.product_name,
+                    tone=session.tone,
+                    num_variations=num_variations,
+                    aspect_ratios=session.aspect_ratios,
+                    session_id=session.folder.name,
+                    oversample=oversample,
+                    memo=self.cache,
+                    reuse=session.reuse
+                ):
+                    self._save_creative(creative, session)
+                    session.creatives.append(creative)
+                    session.reused["creatives"] += bool(creative.get("reused"))
+                    if "filepath" in creative:
+                        session.emit(CreativeGenerated(
+                            creative["id"],
+                            creative["aspect_ratio"],
+                            Path(creative["filepath"]).relative_to(session.folder).as_posix(),
+                            index=len(session.creatives),
+                            total=total,
+                            backend=creative.get("backend"),
+                            brand_score=creative.get("brand_score", {}).get("score"),
+                            reused=bool(creative.get("reused"))
+                        ))
+            
+            with session.stage("normalize"):
+                self._normalize_creatives(session)
+            
+            print(f"\n✅ Generated {len(session.creatives)} creatives across {len(session.aspect_ratios)} formats\n")
             
         except Exception as e:
             print(f"⚠️ Creative generation error: {e}")
             print("Continuing with caption generation...\n")
         
         # Step 3: Generate Captions
-        print("STEP 3/3: Caption Generation")
-        print("-" * 40)
-        
-        try:
-            writer = CaptionWriter()
-            self.captions = writer.generate_captions(
-                brand_name=brand_name,
-                product_name=product_name,
-                tone=tone,
-                target_audience=target_audience,
-                num_variations=num_variations
-            )
-            
-            # Save captions
-            captions_path = session_folder / "captions.json"
-            with open(captions_path, 'w') as f:
-                json.dump(self.captions, f, indent=2)
-            
-            print(f"\n💾 Captions saved to: captions.json\n")
+        if captions:
+            print("STEP 3/4: Caption Generation")
+            print("-" * 40)
             
-        except Exception as e:
-            print(f"⚠️ Caption generation error: {e}\n")
+            try:
+                writer = self.shared_writer().for_session(lane=priority)
+                with session.stage("captions"):
+                    session.captions = self._write_captions(writer, session, num_variations)
+            
+                # Save captions
+                captions_path = session.folder / "captions.json"
+                with open(captions_path, 'w') as f:
+                    json.dump(session.captions, f, indent=2)
+                session.emit(CaptionReady(len(session.captions.get("captions", [])), captions_path.name))
+            
+                print(f"\n💾 Captions saved to: captions.json\n")
+            
+            except Exception as e:
+                print(f"⚠️ Caption generation error: {e}\n")
+        
+        # Step 4: Composite captions and logo onto the creatives
+        if composite and session.captions and session.captions.get("captions"):
+            print("STEP 4/4: Compositing")
+            print("-" * 40)
+            with session.stage("compositing"):
+                self._composite_creatives(session)
+        
+        # Platform sizes are cut locally from the finished creatives, no extra generation calls
+        if session.export_presets and session.saved_creatives:
+            with session.stage("export"):
+                self._export_creatives(session)
+        
+        # Images are final now: share identical bytes with earlier sessions
+        with session.stage("storage"):
+            self._store_assets(session)
+            self._remember_creatives(session)
         
-        # Create summary report
-        self._create_summary_report(session_folder, brand_name, product_name, tone)
+        with session.stage("report"):
+            self._save_manifest(session)
+            
+            # Create summary report
+            self._create_summary_report(session)
         
-        # Create ZIP package
-        zip_path = self._create_zip_package(session_folder)
+        # ZIPs are built from the blob store on demand; only write one when asked
+        zip_path = None
+        if package:
+            with session.stage("zip"):
+                zip_path = self.build_zip(session.folder, self.output_dir / f"{session.folder.name}.zip")
+            session.emit(ZipReady(str(zip_path), zip_path.stat().st_size))
         
         print("\n" + "="*60)
         print("✅ PIPELINE COMPLETE!")
         print("="*60)
-        print(f"\n📦 Download Package: {zip_path}")
-        print(f"📁 Session Folder: {session_folder}\n")
+        if zip_path:
+            print(f"\n📦 Download Package: {zip_path}")
+        print(f"📁 Session Folder: {session.folder}\n")
         
         return {
-            "session_folder": str(session_folder),
-            "zip_path": str(zip_path),
-            "brand_profile": self.brand_profile,
-            "num_creatives": len(self.creatives),
-            "captions": self.captions
+            "session_folder": str(session.folder),
+            "zip_path": str(zip_path) if zip_path else None,
+            "brand_profile": session.brand_profile,
+            "num_creatives": len(session.saved_creatives),
+            "creatives": session.creatives,
+            "captions": session.captions,
+            "timings": session.timings.stages,
+            "quota": self.quota.snapshot(),
+            "reused": session.reused
+        }
+    
+
+    def _analyze_brand(self, session: PipelineSession) -> dict:
+        """Brand profile of the logo and brand images; identical inputs reuse the earlier analysis"""
+        
+        def digest(path):
+            # Unreadable files get a fixed marker; the analyzer skips them and reports it in sources
+            try:
+                return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+            except OSError:
+                return f"unreadable:{path}"
+        
+        key = self.cache.key(
+            "profile",
+            logo_sha256=digest(session.logo_path),
+            image_sha256s=[digest(path) for path in session.brand_images]
+        )
+        profile = self.cache.get("profile", key) if session.reuse else None
+        
+        if profile is not None:
+            print("♻️ Reusing brand profile of identical brand images")
+            session.reused["profile"] = True
+        else:
+            profile = BrandAnalyzer(session.logo_path, images=session.brand_images).analyze()
+            self.cache.put("profile", key, profile)
+        
+        profile_path = session.folder / "brand_profile.json"
+        with open(profile_path, 'w') as f:
+            json.dump(profile, f, indent=2)
+        print(f"💾 Brand profile saved to: {profile_path}")
+        return profile
+    
+    def _write_captions(self, writer: CaptionWriter, session: PipelineSession, num_variations: int) -> dict:
+        """Caption sets for the brief; unchanged briefs reuse their earlier copy"""
+        
+        key = self.cache.key(
+            "captions",
+            brand_name=session.brand_name,
+            product_name=session.product_name,
+            tone=session.tone,
+            target_audience=session.target_audience,
+            num_variations=num_variations
+        )
+        captions = self.cache.get("captions", key) if session.reuse else None
+        if captions is not None:
+            print("♻️ Reusing captions written for the same brief")
+            session.reused["captions"] = True
+            return captions
+        
+        captions = writer.generate_captions(
+            brand_name=session.brand_name,
+            product_name=session.product_name,
+            tone=session.tone,
+            target_audience=session.target_audience,
+            num_variations=num_variations
+        )
+        # Template copy from a failed Gemini call is not worth keeping
+        if not captions.get("fallback"):
+            self.cache.put("captions", key, captions)
+        return captions
+    
+    def _remember_creatives(self, session: PipelineSession):
+        """Record each fully saved image slot in the step cache (after storage, so blobs exist)"""
+        
+        slots = {}
+        for creative in session.creatives:
+            if creative.get("cache_key"):
+                slots.setdefault(creative["cache_key"], []).append(creative)
+        
+        for key, creatives in slots.items():
+            if not all("filepath" in c and c.get("sha256") for c in creatives):
+                continue  # A placeholder or unresolved duplicate: generate the slot again next time
+            self.cache.put("image", key, [
+                {
+                    "sha256": c["sha256"],
+                    "extension": Path(c["filepath"]).suffix,
+                    "backend": c.get("backend"),
+                    "creative": {
+                        name: c[name]
+                        for name in ("variation", "aspect_ratio", "prompt", "seed", "backend", "brand_score", "candidates", "size", "original_size", "upscaled")
+                        if name in c
+                    }
+                }
+                for c in creatives
+            ])
+    
+    def _save_creative(self, creative: dict, session: PipelineSession):
+        """Encode a creative to disk and replace its image with lightweight metadata"""
+        
+        image = creative.pop("image")
+        try:
+            # Placeholders and unresolved duplicates are only reported
+            if creative.get("flag"):
+                print(f"⚠️ Skipped creative {creative['id']}: {creative['flag']}")
+                return
+            
+            ratio = creative["aspect_ratio"]
+            filename = f"creative_{creative['id']}_{ratio.replace(':', 'x')}{image.extension}"
+            filepath = session.folder / ratio.replace(":", "x") / filename
+            
+            # Backend bytes are written as-is, no decode/re-encode round trip
+            image.save(filepath)
+            creative["filepath"] = str(filepath)
+            creative["format"] = image.format
+            creative["size"] = list(image.size)
+            creative["sha256"] = hashlib.sha256(image.data).hexdigest()
+            print(f"💾 Saved: {filename}")
+        finally:
+            image.close()
+    
+    def _normalize_creatives(self, session: PipelineSession):
+        """Bring every saved creative to the exact platform size of its ratio"""
+        
+        from src.normalizer import ResolutionNormalizer
+        
+        saved = session.saved_creatives
+        normalizer = ResolutionNormalizer(CreativeGenerator.ASPECT_RATIOS)
+        results = normalizer.normalize_batch([(c["filepath"], c["aspect_ratio"]) for c in saved])
+        
+        for creative, result in zip(saved, results):
+            # Reused creatives were normalized when first generated and keep that record
+            if result["resized"] or "upscaled" not in creative:
+                creative["upscaled"] = result["upscaled"]
+            if result["resized"]:
+                creative["original_size"] = result["from"]
+                creative["size"] = result["to"]
+                creative["sha256"] = hashlib.sha256(Path(creative["filepath"]).read_bytes()).hexdigest()
+                print(f"📐 Resized creative {creative['id']}: {result['from'][0]}x{result['from'][1]} -> {result['to'][0]}x{result['to'][1]}{' (upscaled)' if result['upscaled'] else ''}")
+    
+    def _composite_creatives(self, session: PipelineSession):
+        """Render each creative with its matching caption variation and the logo"""
+        
+        from src.compositor import CreativeCompositor
+        
+        try:
+            compositor = CreativeCompositor(session.brand_profile, session.logo_path)
+            caption_sets = session.captions["captions"]
+            
+            saved = session.saved_creatives
+            jobs = []
+            for creative in saved:
+                ratio = creative["aspect_ratio"]
+                caption = caption_sets[(creative["variation"] - 1) % len(caption_sets)]
+                dest = session.folder / "composited" / ratio.replace(":", "x") / Path(creative["filepath"]).name
+                jobs.append((creative["filepath"], caption, ratio, str(dest)))
+            
+            for creative, dest in zip(saved, compositor.compose_batch(jobs)):
+                creative["composited_path"] = dest
+            
+            print(f"✅ Composited {len(jobs)} creatives\n")
+        
+        except Exception as e:
+            print(f"⚠️ Compositing error: {e}\n")
+    
+    def _export_creatives(self, session: PipelineSession):
+        """Render every selected platform preset for each variation on the export process pool"""
+        
+        exporter = PlatformExporter(session.export_presets, self.export_pool())
+        planned = exporter.plan(session.saved_creatives, session.folder)
+        
+        try:
+            results = exporter.render([job for _, job in planned])
+        except Exception as e:
+            print(f"⚠️ Export error: {e}\n")
+            return
+        
+        for (creative, _), export in zip(planned, results):
+            creative.setdefault("exports", []).append(export)
+            if not export["within_limit"]:
+                print(f"⚠️ {Path(export['path']).name} is {export['bytes'] / 1024:.0f} KB, over the {export['preset']} limit")
+        
+        platforms = sorted({export["platform"] for export in results})
+        print(f"✅ Exported {len(results)} files for {', '.join(platforms)}\n")
+    
+    def _store_assets(self, session: PipelineSession):
+        """Move finished images into the blob store, leaving hardlinks in the session folder"""
+        
+        try:
+            for creative in session.saved_creatives:
+                creative["sha256"] = self.blobs.ingest(creative["filepath"])
+                if "composited_path" in creative:
+                    creative["composited_sha256"] = self.blobs.ingest(creative["composited_path"])
+                for export in creative.get("exports", []):
+                    export["sha256"] = self.blobs.ingest(export["path"])
+        except OSError as e:
+            print(f"⚠️ Blob store error: {e}")
+    
+    def _save_manifest(self, session: PipelineSession):
+        """Record prompts and seeds so any creative can be re-rendered later"""
+        
+        session_folder = session.folder
+        manifest = {
+            "session_id": session_folder.name,
+            "brand": session.brand_name,
+            "product": session.product_name,
+            "tone": session.tone,
+            "creatives": [
+                {
+                    "id": c["id"],
+                    "variation": c["variation"],
+                    "aspect_ratio": c["aspect_ratio"],
+                    "prompt": c["prompt"],
+                    "seed": c["seed"],
+                    "backend": c.get("backend"),
+                    "size": c.get("size"),
+                    "original_size": c.get("original_size"),
+                    "upscaled": c.get("upscaled", False),
+                    "format": c.get("format"),
+                    "sha256": c.get("sha256"),
+                    "composited_sha256": c.get("composited_sha256"),
+                    "phash": c.get("phash"),
+                    "regenerated": c.get("regenerated", 0),
+                    "flag": c.get("flag"),
+                    "brand_score": c.get("brand_score"),
+                    "candidates": c.get("candidates", 1),
+                    "reused": c.get("reused", False),
+                    "exports": [
+                        {**{k: v for k, v in export.items() if k != "path"}, "path": str(Path(export["path"]).relative_to(session_folder))}
+                        for export in c.get("exports", [])
+                    ],
+                    "filepath": str(Path(c["filepath"]).relative_to(session_folder)) if "filepath" in c else None,
+                    "composited_path": str(Path(c["composited_path"]).relative_to(session_folder)) if "composited_path" in c else None
+                }
+                for c in session.creatives
+            ]
         }
+        
+        with open(session_folder / "manifest.json", 'w') as f:
+            json.dump(manifest, f, indent=2)
+    
+    def rerender_creative(self, session_folder: str, creative_id: int, scale: float = 2.0) -> Path:
+        """Re-render one creative from a past session at higher resolution"""
+        
+        session_folder = Path(session_folder)
+        with self.janitor.pinned(session_folder):
+            return self._rerender(session_folder, creative_id, scale)
+    
+    def _rerender(self, session_folder: Path, creative_id: int, scale: float) -> Path:
+        """Re-render steps for one creative"""
+        
+        manifest_path = session_folder / "manifest.json"
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        
+        entry = next((c for c in manifest["creatives"] if c["id"] == creative_id), None)
+        if entry is None:
+            raise ValueError(f"Creative {creative_id} not found in {manifest_path}")
+        
+        ratio = entry["aspect_ratio"]
+        width, height = CreativeGenerator.ASPECT_RATIOS[ratio]
+        size = (int(width * scale), int(height * scale))
+        
+        print(f"🔁 Re-rendering creative {creative_id} ({ratio}) at {size[0]}x{size[1]}...")
+        image = self.shared_generator().generate_image(entry["prompt"], ratio, seed=entry["seed"], size=size)
+        
+        # Only a real render at the requested size may be recorded as the hires version
+        if image.info.get("backend") == "placeholder":
+            raise RuntimeError(f"Re-rendering creative {creative_id} failed: every backend was unavailable")
+        if image.size[0] < size[0] or image.size[1] < size[1]:
+            raise RuntimeError(f"Re-rendering creative {creative_id} returned {image.size[0]}x{image.size[1]}, smaller than {size[0]}x{size[1]}")
+        
+        hires_dir = session_folder / "hires"
+        hires_dir.mkdir(exist_ok=True)
+        filepath = image.save(hires_dir / f"creative_{creative_id}_{ratio.replace(':', 'x')}_hires")
+        
+        entry["hires_path"] = str(filepath.relative_to(session_folder))
+        entry["hires_sha256"] = self.blobs.ingest(filepath)
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        
+        print(f"💾 Saved: {filepath.name}")
+        return filepath
     
-    def _create_summary_report(self, session_folder: Path, brand_name: str, product_name: str, tone: str):
+    def _create_summary_report(self, session: PipelineSession):
         """Create summary report"""
         
+        profile = session.brand_profile
+        num_captions = len((session.captions or {}).get("captions", []))
+        
         report = f"""
 # 🎨 AI Creative Studio - Generation Report
 
-**Brand:** {brand_name}
-**Product:** {product_name}
-**Tone:** {tone}
+**Brand:** {session.brand_name}
+**Product:** {session.product_name}
+**Tone:** {session.tone}
 **Generated:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 ---
 
 ## 📊 Brand Profile
 
-**Dominant Color:** {self.brand_profile['dominant_color']['hex']}
-**Mood:** {self.brand_profile['mood'].title()}
-**Brightness:** {self.brand_profile['brightness'].title()}
+**Dominant Color:** {profile['dominant_color']['hex']}
+**Mood:** {profile['mood'].title()}
+**Brightness:** {profile['brightness'].title()}
+**Confidence:** {profile.get('confidence', {}).get('overall', 0):.0%} (analyzed {sum(1 for s in profile.get('sources', []) if not s.get('skipped'))} of {len(profile.get('sources', [])) or 1} brand images)
 
 **Color Palette:**
-{chr(10).join([f"- {p['hex']}" for p in self.brand_profile['palette']])}
+{chr(10).join([f"- {p['hex']}" for p in profile['palette']])}
 
 ---
 
 ## 🎨 Generated Creatives
 
-Total: {len(self.creatives)} images
-Formats: 1:1, 9:16, 16:9
+Total: {len(session.saved_creatives)} images
+Formats: {', '.join(session.aspect_ratios)}
+
+{self._format_brand_score_section(session)}
+
+{self._format_quality_section(session)}
+
+{self._format_export_section(session)}
 
 ---
 
 ## ✍️ Caption Variations
 
-{len(self.captions.get('captions', []))} caption sets generated
+{num_captions} caption sets generated
 
 Check `captions.json` for full details.
 
@@ -195,51 +698,200 @@ Check `captions.json` for full details.
 Generated by AI Creative Studio
 """
         
-        report_path = session_folder / "REPORT.md"
+        report_path = session.folder / "REPORT.md"
         with open(report_path, 'w', encoding='utf-8') as f:
             f.write(report)
     
-    def _create_zip_package(self, session_folder: Path) -> Path:
-        """Create downloadable ZIP package"""
+    def _format_brand_score_section(self, session: PipelineSession) -> str:
+        """Average palette adherence and sharpness of the saved creatives"""
+        
+        scores = [c["brand_score"] for c in session.saved_creatives if c.get("brand_score")]
+        if not scores:
+            return "**Brand Consistency:** not measured"
+        
+        def average(key):
+            return sum(s[key] for s in scores) / len(scores)
+        
+        return (
+            f"**Brand Consistency:** {average('score'):.0%} "
+            f"(palette adherence {average('palette_adherence'):.0%}, "
+            f"palette coverage {average('palette_coverage'):.0%}, "
+            f"mean delta-E {average('mean_delta_e'):.1f})"
+        )
+    
+    def _format_export_section(self, session: PipelineSession) -> str:
+        """Files per platform under exports/, with any that missed their size limit"""
         
-        zip_path = self.output_dir / f"{session_folder.name}.zip"
+        exports = [e for c in session.saved_creatives for e in c.get("exports", [])]
+        if not exports:
+            return ""
         
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file in session_folder.rglob('*'):
-                if file.is_file():
-                    arcname = file.relative_to(session_folder)
-                    zipf.write(file, arcname)
+        platforms = {}
+        for export in exports:
+            platforms.setdefault(export["platform"], []).append(export)
+        lines = [
+            f"- `exports/{platform}/`: {len(files)} files ({sum(e['bytes'] for e in files) / 1024:.0f} KB)"
+            for platform, files in sorted(platforms.items())
+        ]
+        lines += [
+            f"- ⚠️ {Path(e['path']).name}: {e['bytes'] / 1024:.0f} KB exceeds the {e['preset']} limit"
+            for e in exports if not e["within_limit"]
+        ]
+        return "**Platform Exports:**\n" + "\n".join(lines)
+    
+    def _format_quality_section(self, session: PipelineSession) -> str:
+        """List regenerated, rejected and upscaled creatives for the report"""
         
-        print(f"📦 Created ZIP package: {zip_path.name}")
-        return zip_path
+        lines = []
+        for c in session.creatives:
+            if c.get("flag"):
+                lines.append(f"- Creative {c['id']} ({c['aspect_ratio']}): {c['flag']}, not saved")
+            elif c.get("regenerated"):
+                lines.append(f"- Creative {c['id']} ({c['aspect_ratio']}): regenerated {c['regenerated']}x")
+            if c.get("upscaled"):
+                size = c["original_size"]
+                lines.append(f"- Creative {c['id']} ({c['aspect_ratio']}): upscaled from {size[0]}x{size[1]}")
+        
+        if not lines:
+            return "**Quality Check:** all creatives unique and at native size"
+        return "**Quality Check:**\n" + "\n".join(lines)
+    
+    def build_zip(self, session_folder, dest=None):
+        """Package a session on demand, reading its images from the blob store
+        
+        Writes to dest (a path or file object) and returns it; with no dest the
+        archive is built in memory and its bytes are returned.
+        """
+        
+        session_folder = Path(session_folder)
+        assets = {}
+        manifest_path = session_folder / "manifest.json"
+        if manifest_path.exists():
+            with open(manifest_path) as f:
+                for entry in json.load(f)["creatives"]:
+                    for path_key, digest_key in [("filepath", "sha256"), ("composited_path", "composited_sha256"), ("hires_path", "hires_sha256")]:
+                        if entry.get(path_key) and entry.get(digest_key):
+                            assets[Path(entry[path_key])] = entry[digest_key]
+                    for export in entry.get("exports", []):
+                        if export.get("sha256"):
+                            assets[Path(export["path"])] = export["sha256"]
+        
+        target = BytesIO() if dest is None else dest
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            stored = set()
+            for arcname, digest in assets.items():
+                blob = self.blobs.path_for(digest, arcname.suffix)
+                if blob.exists():
+                    zipf.write(blob, arcname, compress_type=self._compression(arcname))
+                    stored.add(arcname)
+            
+            for file in sorted(session_folder.rglob('*')):
+                arcname = file.relative_to(session_folder)
+                if file.is_file() and arcname not in stored and not file.name.startswith("."):
+                    zipf.write(file, arcname, compress_type=self._compression(arcname))
+        
+        if dest is None:
+            return target.getvalue()
+        if isinstance(dest, (str, Path)):
+            print(f"📦 Created ZIP package: {Path(dest).name}")
+        return dest
+    
+    def _compression(self, path: Path) -> int:
+        """PNG/JPEG/WebP are already compressed; deflating them again only burns CPU"""
+        return zipfile.ZIP_STORED if path.suffix.lower() in self.PRECOMPRESSED else zipfile.ZIP_DEFLATED
 
 
 # CLI Interface
 if __name__ == "__main__":
     import argparse
+    from src.events import ConsoleProgress
     
     parser = argparse.ArgumentParser(description="AI Creative Studio - Generate marketing creatives")
-    parser.add_argument("--logo", required=True, help="Path to brand logo")
-    parser.add_argument("--brand", required=True, help="Brand name")
-    parser.add_argument("--product", required=True, help="Product name")
+    parser.add_argument("--logo", help="Path to brand logo")
+    parser.add_argument("--brand", help="Brand name")
+    parser.add_argument("--product", help="Product name")
+    parser.add_argument("--images", nargs="+", metavar="PATH", help="Product shots or past campaigns to learn the brand palette from, alongside the logo")
     parser.add_argument("--tone", default="luxury", choices=["luxury", "playful", "minimal", "bold"])
     parser.add_argument("--variations", type=int, default=2, help="Number of variations")
+    parser.add_argument("--oversample", type=int, default=1, help="Candidates rendered per creative; the best by brand score is kept")
     parser.add_argument("--demo", action="store_true", help="Run demo mode")
+    parser.add_argument("--fresh", action="store_true", help="Recompute every step instead of reusing results of earlier runs")
+    parser.add_argument("--no-composite", action="store_true", help="Skip logo/caption overlays")
+    parser.add_argument("--export", nargs="+", metavar="PRESET", help="Platform sizes to export: preset names or social / display / all")
+    parser.add_argument("--hedge", action="store_true", help="Race the next backend when one is unusually slow")
+    parser.add_argument("--profile", action="store_true", help="Write a stage breakdown and cProfile/flamegraph traces into the session folder")
+    parser.add_argument("--warmup", action="store_true", help="Probe and warm up image models before generating")
+    parser.add_argument("--quota", action="store_true", help="Show remaining API budget and exit")
+    parser.add_argument("--gc", action="store_true", help="Delete sessions outside the retention policy and exit")
+    parser.add_argument("--dry-run", action="store_true", help="With --gc, only report what would be deleted")
+    parser.add_argument("--rerender", type=int, metavar="ID", help="Re-render one creative of --session at higher resolution")
+    parser.add_argument("--session", help="Session folder to re-render or package")
+    parser.add_argument("--zip", action="store_true", help="Write a ZIP package (of the new run, or of --session)")
+    parser.add_argument("--scale", type=float, default=2.0, help="Resolution multiplier for --rerender")
     
     args = parser.parse_args()
     
+    if args.quota:
+        for backend, usage in CreativeStudio().quota.snapshot().items():
+            limit = usage["limit"] if usage["limit"] is not None else "unlimited"
+            print(f"📊 {backend}: {usage['used']}/{limit} used this {usage['window']} (resets {usage['resets']})")
+        sys.exit(0)
+    
+    if args.gc:
+        studio = CreativeStudio()
+        report = studio.janitor.collect(dry_run=args.dry_run)
+        verb = "Would remove" if args.dry_run else "Removed"
+        for name in report["deleted"]:
+            print(f"🗑️ {verb}: {name}")
+        print(f"🧹 {verb} {len(report['deleted'])} sessions, {report['reclaimed_bytes'] / 1e6:.1f} MB reclaimed; {report['remaining_sessions']} kept")
+        if not args.dry_run and studio.janitor.policy.max_age_days is not None:
+            pruned = studio.cache.prune(studio.janitor.policy.max_age_days * 86400)
+            print(f"🧹 Pruned {pruned} unused step cache entries")
+        sys.exit(0)
+    
+    if args.rerender is not None:
+        if not args.session:
+            parser.error("--rerender requires --session")
+        try:
+            filepath = CreativeStudio(Path(args.session).parent).rerender_creative(args.session, args.rerender, args.scale)
+        except RuntimeError as e:
+            print(f"\n❌ {e}")
+            sys.exit(1)
+        print(f"\n✅ All done! Check: {filepath}")
+        sys.exit(0)
+    
+    if args.zip and args.session:
+        session_folder = Path(args.session)
+        zip_path = CreativeStudio(session_folder.parent).build_zip(session_folder, session_folder.parent / f"{session_folder.name}.zip")
+        print(f"\n✅ All done! Check: {zip_path}")
+        sys.exit(0)
+    
+    if not (args.logo and args.brand and args.product):
+        parser.error("--logo, --brand and --product are required")
+    
     if args.demo:
         print("🎬 Running in DEMO mode...\n")
         print("⚠️ This will use placeholder images if APIs are not configured.\n")
     
-    studio = CreativeStudio()
+    studio = CreativeStudio(hedging=args.hedge)
+    
+    if args.warmup:
+        studio.warm_up()
     
     result = studio.run_pipeline(
         logo_path=args.logo,
         brand_name=args.brand,
         product_name=args.product,
         tone=args.tone,
-        num_variations=args.variations
+        num_variations=args.variations,
+        composite=not args.no_composite,
+        package=args.zip,
+        profile=args.profile,
+        oversample=args.oversample,
+        progress=ConsoleProgress(),
+        reuse=not args.fresh,
+        exports=args.export,
+        brand_images=args.images
     )
     
     print(f"\n✅ All done! Check: {result['session_folder']}")
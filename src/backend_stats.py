@@ -0,0 +1,229 @@
+"""
+Backend Stats - Rolling latency/error history, timeouts and readiness per image/caption backend
+Uses: stdlib only, shared by every generator in the process
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+from src.metrics import metrics
+from src.quota import backend_bucket
+
+
+class LatencyTracker:
+    """Keeps the most recent successful latencies and call outcomes for each backend"""
+
+    def __init__(self, window: int = 100, min_samples: int = 5):
+        self.window = window
+        self.min_samples = min_samples
+        self._latencies = {}
+        self._outcomes = {}
+        self._timeout_streaks = {}
+        self._lock = threading.Lock()
+
+    def record(self, backend: str, seconds: float):
+        """Store one successful call's latency"""
+        with self._lock:
+            self._latencies.setdefault(backend, deque(maxlen=self.window)).append(seconds)
+            self._outcomes.setdefault(backend, deque(maxlen=self.window)).append(False)
+            self._timeout_streaks[backend] = 0
+
+    def record_error(self, backend: str, timed_out: bool = False):
+        """Store one failed call; consecutive timeouts are counted separately"""
+        with self._lock:
+            self._outcomes.setdefault(backend, deque(maxlen=self.window)).append(True)
+            if timed_out:
+                self._timeout_streaks[backend] = self._timeout_streaks.get(backend, 0) + 1
+
+    def error_rate(self, backend: str) -> float:
+        """Share of recent calls that failed, or None without enough history"""
+        with self._lock:
+            outcomes = list(self._outcomes.get(backend, ()))
+
+        if len(outcomes) < self.min_samples:
+            return None
+        return sum(outcomes) / len(outcomes)
+
+    def timeout_streak(self, backend: str) -> int:
+        """Timeouts since the backend's last success"""
+        with self._lock:
+            return self._timeout_streaks.get(backend, 0)
+
+    def percentile(self, backend: str, q: float) -> float:
+        """q-th percentile (0-1) of recent latencies, or None without enough history"""
+        with self._lock:
+            samples = sorted(self._latencies.get(backend, ()))
+
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(q * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        """Sample count, median latency and error rate per backend"""
+        with self._lock:
+            backends = {b: sorted(self._latencies.get(b, ())) for b in self._outcomes}
+        return {
+            b: {"samples": len(s), "p50": s[len(s) // 2] if s else None, "error_rate": self.error_rate(b)}
+            for b, s in backends.items()
+        }
+
+
+class TimeoutPolicy:
+    """Per-backend call timeouts and retry budgets learned from a LatencyTracker"""
+
+    def __init__(
+        self,
+        percentile: float = 0.99,
+        factor: float = 2.0,
+        min_timeout: float = 10.0,
+        max_timeout: float = 120.0,
+        default_timeout: float = 60.0,
+        max_retries: int = 3,
+        target_success: float = 0.99,
+        give_up_rate: float = 0.5
+    ):
+        self.percentile = percentile
+        self.factor = factor
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.target_success = target_success
+        self.give_up_rate = give_up_rate
+
+    def timeout_for(self, backend: str, tracker: LatencyTracker) -> float:
+        """Latency percentile x factor, capped; the default until there is history"""
+        learned = tracker.percentile(backend, self.percentile)
+        timeout = self.default_timeout if learned is None else learned * self.factor
+        # Timed-out calls never reach the latency history, so back off or a tight limit locks itself in
+        timeout *= 2 ** tracker.timeout_streak(backend)
+        return min(self.max_timeout, max(self.min_timeout, timeout))
+
+    def retries_for(self, backend: str, tracker: LatencyTracker) -> int:
+        """Attempts needed to reach target_success at the recent error rate (at least one retry)
+
+        A backend failing more often than give_up_rate gets a single attempt so the
+        request moves on to the next backend instead of burning its deadline here.
+        """
+        rate = tracker.error_rate(backend)
+        if rate is None:
+            return self.max_retries
+        if rate >= self.give_up_rate:
+            return 1
+        if rate <= 0:
+            return min(2, self.max_retries)
+        needed = math.ceil(math.log(1 - self.target_success) / math.log(rate))
+        return max(min(2, self.max_retries), min(self.max_retries, needed))
+
+    def snapshot(self, tracker: LatencyTracker) -> dict:
+        """Current timeout and retry budget per backend with history"""
+        return {
+            b: {**stats, "timeout_s": round(self.timeout_for(b, tracker), 1), "retries": self.retries_for(b, tracker)}
+            for b, stats in tracker.snapshot().items()
+        }
+
+
+class HedgePolicy:
+    """Decides when to fire a hedge request; caps hedges at a share of requests and of quota"""
+
+    def __init__(self, percentile: float = 0.95, max_share: float = 0.1, default_delay: float = 30.0):
+        self.percentile = percentile
+        self.max_share = max_share
+        self.default_delay = default_delay
+        self.requests = 0
+        self.hedges = 0
+        self.spent = {}
+        self.wasted = 0
+        self._lock = threading.Lock()
+
+    def delay_for(self, backend: str, tracker: LatencyTracker) -> float:
+        """How long to wait on a backend before hedging"""
+        learned = tracker.percentile(backend, self.percentile)
+        return learned if learned is not None else self.default_delay
+
+    def record_request(self):
+        """Count one user-facing generation request"""
+        with self._lock:
+            self.requests += 1
+
+    def try_acquire(self, backend: str = None, quota=None) -> bool:
+        """Reserve a hedge on backend if it keeps hedges within max_share of requests
+
+        With a QuotaLedger, calls spent on hedges (winners and losers) must also stay
+        within max_share of the backend's budget, i.e. of those calls plus what is left.
+        """
+        remaining = quota.remaining(backend) if quota is not None and backend is not None else None
+        with self._lock:
+            if self.hedges + 1 > self.max_share * max(self.requests, 1):
+                return False
+            if remaining is not None:
+                spent = self.spent.get(backend_bucket(backend), 0)
+                if remaining < 1 or spent + 1 > self.max_share * (spent + remaining):
+                    return False
+            self.hedges += 1
+            return True
+
+    def record_spend(self, backend: str, calls: int):
+        """Count upstream calls a hedge made against its backend's quota share"""
+        with self._lock:
+            bucket = backend_bucket(backend)
+            self.spent[bucket] = self.spent.get(bucket, 0) + calls
+
+    def record_waste(self, backend: str, calls: int):
+        """Count calls of a losing backend: cancelled, but in flight and so still billed"""
+        with self._lock:
+            self.wasted += calls
+        metrics.incr(f"hedge.wasted_calls.{backend}", calls)
+
+    def stats(self) -> dict:
+        """Requests seen, hedges fired, calls they spent per quota bucket and calls lost to cancellation"""
+        with self._lock:
+            return {
+                "requests": self.requests, "hedges": self.hedges, "max_share": self.max_share,
+                "spent": dict(self.spent), "wasted_calls": self.wasted,
+            }
+
+
+class ModelReadiness:
+    """Last known warm/cold state of each backend"""
+
+    # Lower rank is tried first
+    RANKS = {"ready": 0, "unknown": 1, "loading": 2, "unavailable": 3}
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def mark(self, backend: str, state: str):
+        """Record a backend's state (ready, loading, unavailable)"""
+        with self._lock:
+            self._states[backend] = (state, time.time())
+
+    def state(self, backend: str) -> str:
+        """Last known state, 'unknown' if never probed"""
+        with self._lock:
+            return self._states.get(backend, ("unknown", None))[0]
+
+    def order(self, backends: list) -> list:
+        """Warm backends first, keeping the configured order within each state"""
+        return sorted(backends, key=lambda b: self.RANKS.get(self.state(b), 1))
+
+    def any_ready(self, backends: list) -> bool:
+        """True if at least one of the backends is known to be warm"""
+        return any(self.state(b) == "ready" for b in backends)
+
+    def snapshot(self) -> dict:
+        """State and seconds since last update per backend"""
+        with self._lock:
+            now = time.time()
+            return {b: {"state": s, "age_s": round(now - t, 1)} for b, (s, t) in self._states.items()}
+
+
+# Shared history so hedging delays, timeouts and readiness are learned across sessions in one process
+default_tracker = LatencyTracker()
+default_timeouts = TimeoutPolicy()
+default_readiness = ModelReadiness()
+
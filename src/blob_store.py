@@ -0,0 +1,100 @@
+"""
+Blob Store - Content-addressed storage for generated assets, shared by every session
+Uses: stdlib only; session files are hardlinks to sha256-named blobs, so identical bytes are stored once
+"""
+
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+from pathlib import Path
+
+
+class BlobStore:
+    """Stores each distinct file once under root/<aa>/<sha256><ext>"""
+
+    def __init__(self, root: str = "output/.blobs"):
+        self.root = Path(root)
+
+    def path_for(self, digest: str, extension: str) -> Path:
+        """Where the blob with this digest lives"""
+        return self.root / digest[:2] / f"{digest}{extension.lower()}"
+
+    def ingest(self, path) -> str:
+        """Move a finished file into the store and leave a hardlink in its place
+
+        The blob is made read-only because the session file shares its inode:
+        anything rewriting the file in place would silently change every
+        session that references the same bytes.
+        """
+        path = Path(path)
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        blob = self.path_for(digest, path.suffix)
+
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                # Adopt the file's inode as the blob: no bytes are copied
+                os.link(path, blob)
+                os.chmod(blob, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                return digest
+            except FileExistsError:
+                pass  # Another session stored the same bytes meanwhile
+            except OSError:
+                # No hardlinks here (e.g. FAT, some network drives): keep a plain copy in the store
+                self._copy_in(path, blob)
+                return digest
+
+        try:
+            self.link(digest, path.suffix, path)
+        except FileNotFoundError:
+            # Retention swept the blob between the check and the link: adopt this file instead
+            os.link(path, blob)
+            os.chmod(blob, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        return digest
+
+    def link(self, digest: str, extension: str, dest) -> Path:
+        """Point dest at a stored blob (hardlink, or a copy where links are unsupported)"""
+        dest = Path(dest)
+        blob = self.path_for(digest, extension)
+        if dest.exists() and os.path.samefile(blob, dest):
+            return dest
+
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(f".{dest.name}.tmp")
+        try:
+            os.link(blob, tmp_path)
+        except OSError:
+            shutil.copyfile(blob, tmp_path)
+        os.replace(tmp_path, dest)
+        return dest
+
+    def read(self, digest: str, extension: str) -> bytes:
+        """Bytes of a stored blob"""
+        return self.path_for(digest, extension).read_bytes()
+
+    def _copy_in(self, path: Path, blob: Path):
+        """Atomically place a copy of path at blob"""
+        # Unique per call: threads ingesting the same content share a pid
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{blob.name}.", suffix=".tmp", dir=blob.parent)
+        os.close(fd)
+        try:
+            shutil.copyfile(path, tmp_path)
+            os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp_path, blob)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def stats(self) -> dict:
+        """Blob count, stored bytes, and bytes saved by sharing across sessions"""
+        blobs = stored = saved = 0
+        for blob in self.root.rglob("*"):
+            if blob.is_file() and not blob.name.startswith("."):
+                info = blob.stat()
+                blobs += 1
+                stored += info.st_size
+                # Each extra link beyond the store and the first session is a copy avoided
+                saved += info.st_size * max(0, info.st_nlink - 2)
+        return {"blobs": blobs, "stored_bytes": stored, "saved_bytes": saved}
@@ -1,106 +1,325 @@
 """
-Brand Style Analyzer - Extracts colors and mood from logo/product images
-Uses: Colorthief (FREE, local processing)
+Brand Style Analyzer - Extracts colors and mood from a logo plus optional product/campaign images
+Uses: NumPy (batched weighted k-means in CIELAB, one pass for every image) and Pillow draft decoding
 """
 
 import json
-from colorthief import ColorThief
-from PIL import Image
-import numpy as np
+import math
+import time
 from pathlib import Path
 
+# NumPy and Pillow are imported where analysis runs, so importing this module stays cheap
+
+# How much each kind of image counts towards the fused profile
+ROLE_WEIGHTS = {"logo": 3.0, "product": 1.5, "campaign": 1.0}
+
+MOODS = ("luxury", "playful", "minimal", "bold")
+
+# Two palette colours closer than this (CIE76 delta-E) are "the same colour" across images
+AGREEMENT_DELTA_E = 20.0
+
+
+def batched_kmeans(points: "np.ndarray", weights: "np.ndarray", k: int, iterations: int = 12) -> tuple:
+    """Weighted k-means over M independent point sets at once
+
+    points (M, S, 3) and weights (M, S), with zero weight for padding. Returns
+    centers (M, K, 3), cluster mass (M, K) and labels (M, S). Seeding is
+    weighted farthest-point, so results are deterministic.
+    """
+    import numpy as np
+
+    m, s, _ = points.shape
+    rows = np.arange(m)
+    centers = np.empty((m, k, 3), dtype=np.float32)
+    centers[:, 0] = points[rows, weights.argmax(axis=1)]
+    nearest = ((points - centers[:, :1]) ** 2).sum(-1)
+    for j in range(1, k):
+        centers[:, j] = points[rows, (nearest * weights).argmax(axis=1)]
+        nearest = np.minimum(nearest, ((points - centers[:, j:j + 1]) ** 2).sum(-1))
+
+    point_sq = (points ** 2).sum(-1)[..., None]
+    for _ in range(iterations):
+        # Squared distances (M, S, K) as |x|^2 - 2 x.c + |c|^2, one batched matmul
+        dist = point_sq - 2 * (points @ centers.transpose(0, 2, 1)) + (centers ** 2).sum(-1)[:, None, :]
+        labels = dist.argmin(axis=2)
+        members = (labels[..., None] == np.arange(k)) * weights[..., None]
+        mass = members.sum(axis=1)
+        sums = members.transpose(0, 2, 1) @ points
+        updated = np.where(mass[..., None] > 0, sums / np.maximum(mass, 1e-12)[..., None], centers)
+        if np.abs(updated - centers).max() < 0.5:
+            centers = updated.astype(np.float32)
+            break
+        centers = updated.astype(np.float32)
+
+    dist = point_sq - 2 * (points @ centers.transpose(0, 2, 1)) + (centers ** 2).sum(-1)[:, None, :]
+    labels = dist.argmin(axis=2)
+    mass = ((labels[..., None] == np.arange(k)) * weights[..., None]).sum(axis=1)
+    return centers, mass, labels
+
 
 class BrandAnalyzer:
-    """Analyzes brand visual identity from logo/product images"""
-    
-    def __init__(self, logo_path: str):
+    """Analyzes brand visual identity from a logo and any number of brand images"""
+
+    def __init__(self, logo_path: str = None, images: list = None, num_colors: int = 5, time_budget: float = 1.5, max_samples: int = 4096):
+        """images: paths (counted as product shots) or {"path", "role", "weight"} dicts"""
         self.logo_path = logo_path
+        self.num_colors = num_colors
+        # Wall-clock budget for decoding and sampling, however many images are given
+        self.time_budget = time_budget
+        self.max_samples = max_samples
         self.brand_profile = {}
-    
-    def extract_color_palette(self, num_colors: int = 5):
-        """Extract dominant color palette from logo"""
-        try:
-            ct = ColorThief(self.logo_path)
-            palette = ct.get_palette(color_count=num_colors, quality=1)
-            dominant_color = ct.get_color(quality=1)
-            
-            return {
-                "palette": palette,
-                "dominant": dominant_color
-            }
-        except Exception as e:
-            print(f"Error extracting colors: {e}")
-            # Fallback to default palette
-            return {
-                "palette": [(64, 64, 64), (128, 128, 128), (192, 192, 192), (255, 255, 255), (0, 0, 0)],
-                "dominant": (64, 64, 64)
-            }
-    
+
+        self.sources = []
+        if logo_path:
+            self.sources.append({"path": str(logo_path), "role": "logo", "weight": ROLE_WEIGHTS["logo"]})
+        for image in images or []:
+            source = {"path": str(image), "role": "product"} if isinstance(image, (str, Path)) else dict(image)
+            source["path"] = str(source["path"])
+            source.setdefault("role", "product")
+            source.setdefault("weight", ROLE_WEIGHTS.get(source["role"], 1.0))
+            self.sources.append(source)
+        if not self.sources:
+            raise ValueError("BrandAnalyzer needs a logo_path or at least one image")
+
+    def _sample_pixels(self, path: str, samples: int, rng: "np.random.Generator") -> "np.ndarray":
+        """Up to samples opaque RGB pixels, decoded at the smallest scale that still has enough"""
+        import numpy as np
+        from PIL import Image
+
+        side = max(32, int(math.sqrt(samples * 4)))
+        with Image.open(path) as image:
+            image.draft("RGB", (side, side))
+            image.thumbnail((side, side), Image.BILINEAR)
+            pixels = np.asarray(image.convert("RGBA")).reshape(-1, 4)
+
+        rgb = pixels[pixels[:, 3] >= 128, :3]
+        # Like ColorThief, skip near-white background unless the image is mostly that
+        colored = ~(rgb > 250).all(axis=1)
+        if colored.sum() >= max(16, 0.05 * len(rgb)):
+            rgb = rgb[colored]
+        if len(rgb) > samples:
+            rgb = rgb[rng.choice(len(rgb), samples, replace=False)]
+        return rgb
+
+    def collect_samples(self) -> list:
+        """Sample every source within the time budget; heavier sources go first and get more pixels"""
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        deadline = time.perf_counter() + self.time_budget
+        min_samples = max(256, self.max_samples // 16)
+        ordered = sorted(self.sources, key=lambda s: s["weight"], reverse=True)
+
+        collected, spent = [], 0.0
+        for i, source in enumerate(ordered):
+            left = deadline - time.perf_counter()
+            if left <= 0 and collected:
+                collected.append({**source, "pixels": None, "skipped": "time budget"})
+                continue
+
+            # Shrink the sample as the budget runs out, based on what earlier images cost
+            samples = self.max_samples
+            if collected and spent > 0:
+                per_image = spent / len(collected)
+                samples = int(self.max_samples * min(1.0, left / (len(ordered) - i) / per_image))
+                samples = max(min_samples, samples)
+
+            started = time.perf_counter()
+            try:
+                pixels = self._sample_pixels(source["path"], samples, rng)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not read {source['path']}: {e}")
+                collected.append({**source, "pixels": None, "skipped": "unreadable"})
+                continue
+            spent += time.perf_counter() - started
+            collected.append({**source, "pixels": pixels if len(pixels) else None, "skipped": None if len(pixels) else "no opaque pixels"})
+        return collected
+
+    def fuse(self, collected: list) -> dict:
+        """Per-image palettes in one batched k-means, fused into a weighted brand palette"""
+        import numpy as np
+        from src.brand_scorer import rgb_to_lab
+
+        used = [c for c in collected if c["pixels"] is not None]
+        if not used:
+            raise ValueError("No readable brand images")
+        k = self.num_colors
+
+        # Pad every image to the same sample count; padding has zero weight
+        width = max(max(len(c["pixels"]) for c in used), k)
+        rgb = np.zeros((len(used), width, 3), dtype=np.uint8)
+        weights = np.zeros((len(used), width), dtype=np.float32)
+        for i, c in enumerate(used):
+            rgb[i, :len(c["pixels"])] = c["pixels"]
+            weights[i, :len(c["pixels"])] = 1.0 / len(c["pixels"])
+        lab = rgb_to_lab(rgb)
+
+        centers, mass, labels = batched_kmeans(lab, weights, k)
+        # RGB of each cluster as the mean of its members, so no Lab -> RGB round trip is needed
+        members = (labels[..., None] == np.arange(k)) * weights[..., None]
+        rgb_centers = (members.transpose(0, 2, 1) @ rgb.astype(np.float32)) / np.maximum(mass, 1e-12)[..., None]
+
+        # How tightly pixels sit around their cluster centre (delta-E), per image
+        spread = np.sqrt(((lab - np.take_along_axis(centers, labels[..., None], axis=1)) ** 2).sum(-1))
+        spread = (spread * weights).sum(axis=1)
+
+        # Fuse: every image's clusters become weighted points of one more k-means
+        image_weight = np.array([c["weight"] for c in used], dtype=np.float32)
+        cluster_weight = (mass * image_weight[:, None]).reshape(1, -1)
+        fused, fused_mass, fused_labels = batched_kmeans(centers.reshape(1, -1, 3), cluster_weight, k)
+        fused, fused_mass, fused_labels = fused[0], fused_mass[0], fused_labels[0]
+        fused_rgb = np.zeros((k, 3), dtype=np.float32)
+        np.add.at(fused_rgb, fused_labels, rgb_centers.reshape(-1, 3) * cluster_weight[0][:, None])
+        fused_rgb /= np.maximum(fused_mass, 1e-12)[:, None]
+
+        # Agreement: weighted share of images that contain each fused colour themselves
+        present = np.sqrt(((centers[:, :, None, :] - fused[None, None]) ** 2).sum(-1)) <= AGREEMENT_DELTA_E
+        present &= (mass > 0.05)[:, :, None]
+        agreement = (present.any(axis=1) * image_weight[:, None]).sum(axis=0) / image_weight.sum()
+
+        share = fused_mass / fused_mass.sum()
+        order = [j for j in np.argsort(-share) if share[j] > 0]
+        return {
+            "colors": [tuple(int(round(v)) for v in np.clip(fused_rgb[j], 0, 255)) for j in order],
+            "lab": fused[order],
+            "share": share[order],
+            "agreement": agreement[order],
+            "spread": float((spread * image_weight).sum() / image_weight.sum()),
+            "lab_samples": lab,
+            "sample_weights": weights * image_weight[:, None],
+        }
+
+    def mood_scores(self, lab: "np.ndarray", weights: "np.ndarray", palette_lab: "np.ndarray", palette_share: "np.ndarray") -> dict:
+        """Probability of each mood from lightness, chroma, contrast and hue variety"""
+        import numpy as np
+
+        w = weights.reshape(-1) / weights.sum()
+        lab = lab.reshape(-1, 3)
+        lightness = float((lab[:, 0] * w).sum())
+        contrast = float(np.sqrt(((lab[:, 0] - lightness) ** 2 * w).sum()))
+        chroma = float((np.hypot(lab[:, 1], lab[:, 2]) * w).sum())
+
+        # Hue variety: entropy of the chromatic palette colours' hues (0 = one hue, 1 = evenly spread)
+        palette_chroma = np.hypot(palette_lab[:, 1], palette_lab[:, 2])
+        chromatic = palette_chroma > 15
+        variety = 0.0
+        if chromatic.sum() > 1:
+            hues = (np.degrees(np.arctan2(palette_lab[chromatic, 2], palette_lab[chromatic, 1])) % 360 // 60).astype(int)
+            hist = np.bincount(hues, weights=palette_share[chromatic], minlength=6)
+            hist = hist[hist > 0] / hist.sum()
+            variety = float(-(hist * np.log(hist)).sum() / np.log(6))
+
+        def clip(x):
+            return min(1.0, max(0.0, x))
+
+        dark, light = clip((50 - lightness) / 30), clip((lightness - 50) / 30)
+        vivid = clip((chroma - 15) / 40)
+        strong = clip(contrast / 30)
+        scores = {
+            "luxury": 0.5 * dark + 0.3 * (1 - vivid) + 0.2 * strong,
+            "playful": 0.3 * light + 0.35 * vivid + 0.35 * variety,
+            "minimal": 0.4 * (1 - vivid) + 0.3 * (1 - variety) + 0.3 * light,
+            "bold": 0.45 * vivid + 0.35 * strong + 0.2 * (1 - variety),
+        }
+        # Softmax with a low temperature turns the blended scores into probabilities
+        exp = {mood: math.exp(score / 0.1) for mood, score in scores.items()}
+        total = sum(exp.values())
+        return {mood: round(exp[mood] / total, 3) for mood in MOODS}
+
     def analyze_brightness(self, rgb_color: tuple) -> str:
         """Determine if color is dark, medium, or light"""
         brightness = sum(rgb_color) / 3
-        
+
         if brightness < 85:
             return "dark"
         elif brightness < 170:
             return "medium"
         else:
             return "light"
-    
-    def predict_mood(self, dominant_color: tuple, palette: list) -> str:
-        """Predict brand mood based on color analysis"""
-        brightness = self.analyze_brightness(dominant_color)
-        
-        # Calculate color variance
-        palette_array = np.array(palette)
-        variance = np.std(palette_array)
-        
-        # Determine mood
-        if brightness == "dark" and variance < 50:
-            return "luxury"
-        elif brightness == "light" and variance > 80:
-            return "playful"
-        elif variance < 40:
-            return "minimal"
-        else:
-            return "bold"
-    
+
     def rgb_to_hex(self, rgb: tuple) -> str:
         """Convert RGB to hex color code"""
         return '#{:02x}{:02x}{:02x}'.format(rgb[0], rgb[1], rgb[2])
-    
+
     def analyze(self) -> dict:
         """Complete brand analysis"""
-        print(f"🎨 Analyzing brand style from: {self.logo_path}")
-        
-        # Extract colors
-        color_data = self.extract_color_palette()
-        palette = color_data["palette"]
-        dominant = color_data["dominant"]
-        
-        # Predict mood
-        mood = self.predict_mood(dominant, palette)
-        brightness = self.analyze_brightness(dominant)
-        
-        # Build brand profile
+        names = ", ".join(Path(s["path"]).name for s in self.sources)
+        print(f"🎨 Analyzing brand style from: {self.logo_path if len(self.sources) == 1 else names}")
+
+        collected = self.collect_samples()
+        try:
+            palette = self.fuse(collected)
+        except ValueError as e:
+            print(f"Error extracting colors: {e}")
+            return self._default_profile()
+
+        moods = self.mood_scores(palette["lab_samples"], palette["sample_weights"], palette["lab"], palette["share"])
+        ranked = sorted(moods.values(), reverse=True)
+        mood = max(moods, key=moods.get)
+        dominant = palette["colors"][0]
+
+        # Palette confidence: colours shared across images, clustered tightly, from most of the input
+        total_weight = sum(s["weight"] for s in self.sources)
+        coverage = sum(c["weight"] for c in collected if c["pixels"] is not None) / total_weight
+        agreement = float((palette["share"] * palette["agreement"]).sum())
+        compactness = 1.0 / (1.0 + palette["spread"] / 15.0)
+        palette_confidence = agreement * (0.5 + 0.5 * compactness)
+
         self.brand_profile = {
             "dominant_color": {
-                "rgb": dominant,
+                "rgb": list(dominant),
                 "hex": self.rgb_to_hex(dominant)
             },
             "palette": [
-                {"rgb": color, "hex": self.rgb_to_hex(color)} 
-                for color in palette
+                {
+                    "rgb": list(color),
+                    "hex": self.rgb_to_hex(color),
+                    "weight": round(float(share), 3),
+                    "agreement": round(float(agree), 3)
+                }
+                for color, share, agree in zip(palette["colors"], palette["share"], palette["agreement"])
             ],
             "mood": mood,
-            "brightness": brightness
+            "brightness": self.analyze_brightness(dominant),
+            "mood_scores": moods,
+            "confidence": {
+                "palette": round(palette_confidence, 3),
+                "mood": round(ranked[0] - ranked[1], 3),
+                "coverage": round(coverage, 3),
+                "overall": round(palette_confidence * coverage, 3)
+            },
+            "sources": [
+                {
+                    "path": c["path"],
+                    "role": c["role"],
+                    "weight": c["weight"],
+                    "samples": 0 if c["pixels"] is None else int(len(c["pixels"])),
+                    "skipped": c["skipped"]
+                }
+                for c in collected
+            ]
         }
-        
-        print(f"✅ Brand Mood: {mood.upper()}")
+
+        print(f"✅ Brand Mood: {mood.upper()} ({moods[mood]:.0%})")
         print(f"✅ Dominant Color: {self.rgb_to_hex(dominant)}")
-        
+        print(f"✅ Confidence: {self.brand_profile['confidence']['overall']:.0%} from {sum(c['pixels'] is not None for c in collected)}/{len(collected)} images")
+
         return self.brand_profile
-    
+
+    def _default_profile(self) -> dict:
+        """Neutral grey profile when no image could be read"""
+        palette = [(64, 64, 64), (128, 128, 128), (192, 192, 192), (255, 255, 255), (0, 0, 0)]
+        self.brand_profile = {
+            "dominant_color": {"rgb": list(palette[0]), "hex": self.rgb_to_hex(palette[0])},
+            "palette": [{"rgb": list(c), "hex": self.rgb_to_hex(c), "weight": 0.2, "agreement": 0.0} for c in palette],
+            "mood": "minimal",
+            "brightness": "dark",
+            "mood_scores": {mood: 0.25 for mood in MOODS},
+            "confidence": {"palette": 0.0, "mood": 0.0, "coverage": 0.0, "overall": 0.0},
+            "sources": [{"path": s["path"], "role": s["role"], "weight": s["weight"], "samples": 0, "skipped": "unreadable"} for s in self.sources]
+        }
+        return self.brand_profile
+
     def save_profile(self, output_path: str):
         """Save brand profile to JSON"""
         with open(output_path, 'w') as f:
@@ -111,13 +330,12 @@ class BrandAnalyzer:
 # Test function
 if __name__ == "__main__":
     import sys
-    
+
     if len(sys.argv) > 1:
-        logo_path = sys.argv[1]
-        analyzer = BrandAnalyzer(logo_path)
+        analyzer = BrandAnalyzer(sys.argv[1], images=sys.argv[2:])
         profile = analyzer.analyze()
-        
+
         print("\n📊 Brand Profile:")
         print(json.dumps(profile, indent=2))
     else:
-        print("Usage: python brand_analyzer.py <logo_path>")
+        print("Usage: python brand_analyzer.py <logo_path> [product/campaign images...]")
@@ -1,24 +1,40 @@
 
 
-import google.generativeai as genai
+import copy
 import os
 import json
-from dotenv import load_dotenv
 
-load_dotenv()
+from src.singleflight import SingleFlight
+
+# Shared by every writer so concurrent sessions coalesce identical requests
+caption_flights = SingleFlight("captions")
 
 
 class CaptionWriter:
     """Generates marketing captions using AI"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, quota=None, scheduler=None, lane: str = "interactive"):
+        # SDK imports are deferred so importing this module stays cheap
+        from dotenv import load_dotenv
+        load_dotenv()
+        
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             raise ValueError("Gemini API key not found!")
         
+        import google.generativeai as genai
         genai.configure(api_key=self.api_key)
+        self.quota = quota
+        self.scheduler = scheduler
+        self.lane = lane
         self.model = genai.GenerativeModel('gemini-1.5-flash')
     
+    def for_session(self, lane: str = "interactive") -> "CaptionWriter":
+        """Per-session view sharing this writer's Gemini model and quota"""
+        view = copy.copy(self)
+        view.lane = lane
+        return view
+    
     def generate_captions(
         self, 
         brand_name: str, 
@@ -29,6 +45,23 @@ class CaptionWriter:
     ) -> dict:
         """Generate marketing captions with variations"""
         
+        # Identical concurrent requests share one Gemini call
+        key = (brand_name, product_name, tone, target_audience, num_variations)
+        args = (brand_name, product_name, tone, target_audience, num_variations)
+        if self.scheduler is None:
+            return caption_flights.do(key, self._generate_captions, *args)
+        return caption_flights.do(key, self.scheduler.run, self.lane, self._generate_captions, *args)
+    
+    def _generate_captions(
+        self,
+        brand_name: str,
+        product_name: str,
+        tone: str,
+        target_audience: str,
+        num_variations: int
+    ) -> dict:
+        """Call Gemini once and parse the caption sets"""
+        
         prompt = f"""You are an expert marketing copywriter. Create {num_variations} different ad caption sets for:
 
 Brand: {brand_name}
@@ -61,6 +94,12 @@ Format your response as JSON:
 Make sure the tone matches: {tone}
 Be creative, persuasive, and authentic. No placeholder text."""
 
+        if self.quota is not None:
+            if not self.quota.available("gemini"):
+                print("⚠️ Gemini daily quota used up, using fallback captions")
+                return self._generate_fallback_captions(brand_name, product_name, tone, num_variations)
+            self.quota.record("gemini")
+        
         try:
             print(f"✍️ Generating {num_variations} caption variations...")
             response = self.model.generate_content(prompt)
@@ -130,7 +169,8 @@ Be creative, persuasive, and authentic. No placeholder text."""
             "captions": [
                 {**template, "variation": i + 1} 
                 for i in range(num)
-            ]
+            ],
+            "fallback": True
         }
     
     def format_caption_display(self, caption: dict) -> str:
@@ -0,0 +1,193 @@
+"""
+Creative Compositor - Overlays brand logo and caption copy onto generated creatives
+Uses: Pillow + NumPy (FREE, local processing, no network calls)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+# Layout per aspect ratio, as fractions of the image size
+LAYOUTS = {
+    "1:1": {"band": 0.34, "headline": 0.060, "sub": 0.032, "logo": 0.14, "margin": 0.05},
+    "9:16": {"band": 0.30, "headline": 0.075, "sub": 0.040, "logo": 0.20, "margin": 0.06},
+    "16:9": {"band": 0.38, "headline": 0.045, "sub": 0.024, "logo": 0.10, "margin": 0.04},
+}
+
+FONT_CANDIDATES = ["DejaVuSans-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf", "Arial.ttf", "arial.ttf"]
+
+
+@lru_cache(maxsize=64)
+def load_font(size: int, font_path: str = None):
+    """Load a TrueType font once per (path, size), falling back to Pillow's default"""
+    for candidate in ([font_path] if font_path else []) + FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=32)
+def compute_layout(width: int, height: int, aspect_ratio: str) -> dict:
+    """Pixel boxes and font sizes for one image size"""
+    spec = LAYOUTS.get(aspect_ratio, LAYOUTS["1:1"])
+    short_side = min(width, height)
+    margin = int(short_side * spec["margin"])
+    band_height = int(height * spec["band"])
+
+    return {
+        "margin": margin,
+        "band_top": height - band_height,
+        "band_height": band_height,
+        "headline_size": max(12, int(width * spec["headline"])),
+        "sub_size": max(10, int(width * spec["sub"])),
+        "logo_size": max(16, int(short_side * spec["logo"])),
+        "text_width": width - 2 * margin,
+    }
+
+
+@lru_cache(maxsize=32)
+def gradient_alpha(band_height: int, max_alpha: float = 0.85) -> np.ndarray:
+    """Vertical 0 -> max_alpha ramp used for the text scrim, shaped for broadcasting"""
+    ramp = np.linspace(0.0, max_alpha, band_height, dtype=np.float32) ** 0.8
+    ramp.setflags(write=False)
+    return ramp[:, None, None]
+
+
+def luminance(rgb: tuple) -> float:
+    """Relative luminance of an sRGB color (0-1)"""
+    channels = np.asarray(rgb, dtype=np.float32) / 255.0
+    linear = np.where(channels <= 0.03928, channels / 12.92, ((channels + 0.055) / 1.055) ** 2.4)
+    return float(linear @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32))
+
+
+def contrast_ratio(a: tuple, b: tuple) -> float:
+    """WCAG contrast ratio between two colors"""
+    la, lb = sorted((luminance(a), luminance(b)), reverse=True)
+    return (la + 0.05) / (lb + 0.05)
+
+
+class CreativeCompositor:
+    """Renders headline, CTA and logo overlays in brand colors"""
+
+    def __init__(self, brand_profile: dict, logo_path: str = None, font_path: str = None):
+        self.font_path = font_path
+        self.logo = Image.open(logo_path).convert("RGBA") if logo_path else None
+        self._logo_cache = {}
+
+        palette = [tuple(p["rgb"]) for p in brand_profile["palette"]]
+        dominant = tuple(brand_profile["dominant_color"]["rgb"])
+
+        # Scrim uses the dominant color, text whichever of white/black reads best on it
+        self.scrim_color = np.asarray(dominant, dtype=np.float32)
+        self.text_color = max([(255, 255, 255), (20, 20, 20)], key=lambda c: contrast_ratio(c, dominant))
+
+        # CTA button takes the palette color that stands out most from the scrim
+        self.cta_color = max(palette or [self.text_color], key=lambda c: contrast_ratio(c, dominant))
+        self.cta_text_color = max([(255, 255, 255), (20, 20, 20)], key=lambda c: contrast_ratio(c, self.cta_color))
+
+    def _resized_logo(self, size: int) -> Image.Image:
+        """Logo scaled to fit a size x size box, cached per size"""
+        if size not in self._logo_cache:
+            logo = self.logo.copy()
+            logo.thumbnail((size, size), Image.LANCZOS)
+            self._logo_cache[size] = logo
+        return self._logo_cache[size]
+
+    def _wrap(self, text: str, font, max_width: int, max_lines: int = 3) -> list:
+        """Greedy word wrap measured with the real font"""
+        lines, current = [], ""
+        for word in text.split():
+            candidate = f"{current} {word}".strip()
+            if font.getlength(candidate) <= max_width or not current:
+                current = candidate
+            else:
+                lines.append(current)
+                current = word
+        if current:
+            lines.append(current)
+        return lines[:max_lines]
+
+    def _apply_scrim(self, image: Image.Image, layout: dict) -> Image.Image:
+        """Blend a brand-colored gradient over the bottom band in one NumPy pass"""
+        pixels = np.asarray(image.convert("RGB"), dtype=np.float32)
+        top = layout["band_top"]
+        alpha = gradient_alpha(layout["band_height"])
+
+        band = pixels[top:top + layout["band_height"]]
+        pixels[top:top + layout["band_height"]] = band * (1.0 - alpha) + self.scrim_color * alpha
+        return Image.fromarray(pixels.astype(np.uint8))
+
+    def compose(self, image: Image.Image, caption: dict, aspect_ratio: str) -> Image.Image:
+        """Render caption and logo on top of one creative"""
+        width, height = image.size
+        layout = compute_layout(width, height, aspect_ratio)
+        margin = layout["margin"]
+
+        canvas = self._apply_scrim(image, layout)
+        draw = ImageDraw.Draw(canvas)
+
+        headline_font = load_font(layout["headline_size"], self.font_path)
+        sub_font = load_font(layout["sub_size"], self.font_path)
+
+        # Lay out text bottom-up so the CTA always sits on the bottom margin
+        cta = caption.get("cta", "")
+        cta_box = draw.textbbox((0, 0), cta, font=sub_font)
+        pad = layout["sub_size"] // 2
+        cta_w, cta_h = cta_box[2] - cta_box[0] + 2 * pad, cta_box[3] - cta_box[1] + 2 * pad
+        cta_y = height - margin - cta_h
+
+        sub_lines = self._wrap(caption.get("subheadline", ""), sub_font, layout["text_width"], max_lines=2)
+        headline_lines = self._wrap(caption.get("headline", ""), headline_font, layout["text_width"])
+
+        y = cta_y - pad - len(sub_lines) * int(layout["sub_size"] * 1.25)
+        y -= len(headline_lines) * int(layout["headline_size"] * 1.2)
+        y = max(y, layout["band_top"])
+
+        for line in headline_lines:
+            draw.text((margin, y), line, font=headline_font, fill=self.text_color)
+            y += int(layout["headline_size"] * 1.2)
+        for line in sub_lines:
+            draw.text((margin, y), line, font=sub_font, fill=self.text_color)
+            y += int(layout["sub_size"] * 1.25)
+
+        if cta:
+            draw.rounded_rectangle(
+                [margin, cta_y, margin + cta_w, cta_y + cta_h],
+                radius=cta_h // 3,
+                fill=self.cta_color
+            )
+            draw.text((margin + pad - cta_box[0], cta_y + pad - cta_box[1]), cta, font=sub_font, fill=self.cta_text_color)
+
+        if self.logo is not None:
+            logo = self._resized_logo(layout["logo_size"])
+            canvas.paste(logo, (width - margin - logo.width, margin), logo)
+
+        return canvas
+
+    def compose_file(self, source_path: str, caption: dict, aspect_ratio: str, dest_path: str) -> str:
+        """Composite one saved creative into dest_path"""
+        with Image.open(source_path) as image:
+            composed = self.compose(image, caption, aspect_ratio)
+
+        Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+        composed.save(dest_path)
+        return str(dest_path)
+
+    def compose_batch(self, jobs: list, max_workers: int = None) -> list:
+        """Composite many (source, caption, ratio, dest) jobs on a thread pool
+
+        Pillow releases the GIL while decoding, resizing and encoding, so threads
+        keep every core busy without pickling images between processes.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(lambda job: self.compose_file(*job), jobs))
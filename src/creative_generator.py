@@ -3,15 +3,20 @@ Creative Generator - Generates marketing creatives using Hugging Face API
 Model: Stable Diffusion v1.5 (FREE tier: 1000 requests/month)
 """
 
-import requests
+import copy
 import os
-from io import BytesIO
+import threading
 from PIL import Image
 import time
-from dotenv import load_dotenv
-from huggingface_hub import InferenceClient
 
-load_dotenv()
+from src.backend_stats import HedgePolicy, LatencyTracker, ModelReadiness, TimeoutPolicy, default_readiness, default_timeouts, default_tracker
+from src.encoded_image import EncodedImage
+from src.quota import QuotaLedger, backend_bucket
+from src.singleflight import SingleFlight
+from src.variation_planner import VariationPlanner, derive_seed
+
+# Shared by every generator so concurrent sessions coalesce identical requests
+image_flights = SingleFlight("image", clone=lambda image: image.copy())
 
 
 class CreativeGenerator:
@@ -29,13 +34,104 @@ class CreativeGenerator:
         "16:9": (1344, 768),    # SDXL landscape
     }
     
-    def __init__(self, api_key: str = None):
+    VARIATION_MODIFIERS = [
+        "centered composition",
+        "lifestyle scene with product",
+        "close-up product shot"
+    ]
+    
+    # Extra modifiers used when a slot has to be regenerated as a duplicate
+    REGENERATION_MODIFIERS = [
+        "alternate camera angle",
+        "different background setting",
+        "dramatic side lighting"
+    ]
+    
+    def __init__(
+        self,
+        api_key: str = None,
+        hedging: bool = False,
+        hedge_policy: HedgePolicy = None,
+        latency: LatencyTracker = None,
+        readiness: ModelReadiness = None,
+        quota: QuotaLedger = None,
+        scheduler=None,
+        lane: str = "interactive",
+        timeout_policy: TimeoutPolicy = None,
+        request_deadline: float = 180.0
+    ):
+        # SDK imports are deferred until a backend is actually called
+        from dotenv import load_dotenv
+        load_dotenv()
+        
         self.api_key = api_key or os.getenv("HUGGINGFACE_API_KEY")
         if not self.api_key:
             raise ValueError("HuggingFace API key not found!")
         
-        self.client = InferenceClient(token=self.api_key)
+        self._client = None
+        self._init_lock = threading.RLock()
         self.model = self.MODELS["primary"]
+        
+        # Opt-in hedging: race the next backend when the current one is unusually slow
+        self.hedging = hedging
+        self.hedge_policy = hedge_policy or HedgePolicy()
+        self.latency = latency or default_tracker
+        self.readiness = readiness or default_readiness
+        self._executor = None
+        
+        # Per-call timeouts and retry budgets follow each backend's recent latency and errors;
+        # the deadline bounds one image request across the whole fallback chain
+        self.timeout_policy = timeout_policy or default_timeouts
+        self.request_deadline = request_deadline
+        
+        # Usage is counted per attempt; exhausted or rerouted buckets drop out of the chain
+        self.quota = quota
+        self.excluded_buckets = set()
+        
+        # Optional shared PriorityScheduler gating upstream calls by lane
+        self.scheduler = scheduler
+        self.lane = lane
+        
+        # Optional callback for typed progress events (fallbacks, retry waits)
+        self.events = None
+    
+    def for_session(self, lane: str = "interactive", excluded_buckets: set = None, events=None) -> "CreativeGenerator":
+        """Per-session view sharing this generator's HTTP client, pools and stats"""
+        
+        # Create pooled resources before copying so every view shares the same ones
+        self.client
+        if self.hedging:
+            self._hedge_executor()
+        
+        with self._init_lock:
+            view = copy.copy(self)
+        view.lane = lane
+        view.excluded_buckets = set(excluded_buckets or ())
+        view.events = events
+        return view
+    
+    def _emit(self, event):
+        """Report a progress event to this view's session (coalesced followers get a replay)"""
+        if self.events is not None:
+            self.events(event)
+    
+    @property
+    def client(self):
+        """HuggingFace InferenceClient, created on first use"""
+        with self._init_lock:
+            if self._client is None:
+                from huggingface_hub import InferenceClient
+                self._client = InferenceClient(token=self.api_key)
+        return self._client
+    
+    def _timed_client(self, timeout: float):
+        """The shared client with a per-call timeout (the connection pool is still shared)"""
+        client = self.client
+        if not hasattr(client, "timeout"):
+            return client
+        timed = copy.copy(client)
+        timed.timeout = timeout
+        return timed
     
     def build_prompt(self, brand_profile: dict, product_name: str, tone: str) -> str:
         """Build AI prompt using brand colors and style"""
@@ -65,90 +161,457 @@ class CreativeGenerator:
         
         return prompt.replace("\n", " ").strip()
     
-    def generate_image(self, prompt: str, aspect_ratio: str = "1:1", retries: int = 3) -> Image:
-        """Generate image using HuggingFace API with Pollinations.ai fallback"""
+    def backend_chain(self, size: tuple = None) -> list:
+        """Backends in fallback order (primary, fallback, Pollinations), warm ones first
         
-        # Adjust dimensions based on model (SDXL needs higher res)
-        width, height = self.ASPECT_RATIOS[aspect_ratio]
+        An explicit size leaves out the SD 1.5 fallback, which only renders at 512px.
+        """
+        chain = [
+            backend for backend in [self.MODELS["primary"], self.MODELS["fallback"], "pollinations"]
+            if not (size and backend == self.MODELS["fallback"])
+            and backend_bucket(backend) not in self.excluded_buckets
+            and (self.quota is None or self.quota.available(backend))
+        ]
+        return self.readiness.order(chain)
+    
+    def warm_up(self, timeout: float = 120.0, poll_interval: float = 10.0, background: bool = False):
+        """Probe every backend concurrently and record which ones are warm
         
-        # Try primary model first, then fallback, then Pollinations
-        models_to_try = [self.MODELS["primary"], self.MODELS["fallback"], "pollinations"]
+        Cold HuggingFace models get one tiny 1-step request so the Inference API
+        starts loading them, then their status is polled until loaded or timeout.
+        """
+        
+        if background:
+            thread = threading.Thread(
+                target=self.warm_up,
+                kwargs={"timeout": timeout, "poll_interval": poll_interval},
+                name="warm-up",
+                daemon=True
+            )
+            thread.start()
+            return thread
+        
+        print("🔥 Warming up image backends...")
+        deadline = time.monotonic() + timeout
+        chain = self.backend_chain()
+        
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(chain)) as pool:
+            states = dict(zip(chain, pool.map(lambda model: self._probe(model, deadline, poll_interval), chain)))
+        
+        for model, state in states.items():
+            print(f"   {'✅' if state == 'ready' else '⏳' if state == 'loading' else '❌'} {model}: {state}")
+        
+        return states
+    
+    def _probe(self, model: str, deadline: float, poll_interval: float) -> str:
+        """Check (and if needed trigger) one backend until it is warm or the deadline passes"""
         
-        for model in models_to_try:
+        if model == "pollinations":
+            try:
+                import requests
+                response = requests.head("https://pollinations.ai", timeout=10)
+                state = "ready" if response.status_code < 500 else "unavailable"
+            except Exception:
+                state = "unavailable"
+            self.readiness.mark(model, state)
+            return state
+        
+        triggered = False
+        while True:
+            try:
+                status = self.client.get_model_status(model)
+            except Exception as e:
+                print(f"❌ Probe failed for {model}: {e}")
+                self.readiness.mark(model, "unavailable")
+                return "unavailable"
+            
+            if status.loaded:
+                self.readiness.mark(model, "ready")
+                return "ready"
+            if status.state == "TooBig":
+                self.readiness.mark(model, "unavailable")
+                return "unavailable"
+            
+            self.readiness.mark(model, "loading")
+            
+            remaining = deadline - time.monotonic()
+            if not triggered and remaining > 0:
+                triggered = True
+                try:
+                    if self.quota is not None:
+                        self.quota.record(model)
+                    # Without a timeout the client retries a loading model's 503 forever
+                    self._timed_client(remaining).post(
+                        json={"inputs": "warm-up", "parameters": {"width": 256, "height": 256, "num_inference_steps": 1}},
+                        model=model,
+                        task="text-to-image"
+                    )
+                    self.readiness.mark(model, "ready")
+                    return "ready"
+                except Exception:
+                    pass  # 503 or a timeout while loading is the expected answer
+                remaining = deadline - time.monotonic()
+            
+            if remaining <= 0:
+                return "loading"
+            time.sleep(min(poll_interval, remaining))
+    
+    def backend_size(self, model: str, aspect_ratio: str, size: tuple = None) -> tuple:
+        """Request dimensions for one backend"""
+        
+        # Use smaller dimensions for v1.5 fallback
+        if model == self.MODELS["fallback"]:
+            return {"1:1": (512, 512), "9:16": (512, 910), "16:9": (910, 512)}[aspect_ratio]
+        
+        # SDXL and Pollinations take the full-resolution size
+        return size or self.ASPECT_RATIOS[aspect_ratio]
+    
+    def generate_image(
+        self,
+        prompt: str,
+        aspect_ratio: str = "1:1",
+        retries: int = None,
+        seed: int = None,
+        size: tuple = None,
+        share_key=None
+    ) -> EncodedImage:
+        """Generate image using HuggingFace API with Pollinations.ai fallback
+        
+        retries=None lets each backend's retry budget adapt to its recent error rate.
+        share_key, if given, replaces the seed when matching concurrent duplicates: a
+        request joining an in-flight one receives its image, rendered with the leader's
+        seed (recorded in image.info["seed"]), and the leader's fallback/retry events.
+        """
+        
+        # Same prompt -> same seed, so retries and re-runs are reproducible
+        if seed is None:
+            seed = derive_seed(prompt, aspect_ratio)
+        
+        # The deadline starts before any scheduler wait, so queueing counts against it too
+        deadline = time.monotonic() + self.request_deadline if self.request_deadline else None
+        
+        # Identical concurrent requests (same prompt, size and seed or share key) share one upstream
+        # call, but only within one routing: a different lane or quota reroute makes its own call
+        key = (
+            prompt, aspect_ratio, seed if share_key is None else share_key, size,
+            self.lane, frozenset(self.excluded_buckets)
+        )
+        led = []
+        
+        def lead(*args):
+            led.append(True)
+            return self._generate_traced(*args)
+        
+        image = image_flights.do(key, self._scheduled, lead, prompt, aspect_ratio, retries, seed, size, deadline)
+        trace = image.info.pop("events", ())
+        if not led:
+            # Followers' sessions still see how their image was produced
+            for event in trace:
+                self._emit(copy.copy(event))
+        return image
+    
+    def _generate_traced(self, *args) -> EncodedImage:
+        """Leader side of a request: emit events live and keep them for coalesced followers"""
+        trace = []
+        
+        def record(event):
+            self._emit(event)
+            trace.append(event)
+        
+        image = self.for_session(self.lane, self.excluded_buckets, record)._generate_image(*args)
+        image.info["events"] = trace
+        return image
+    
+    def _scheduled(self, fn, *args):
+        """Run an upstream call through the priority scheduler when one is configured"""
+        if self.scheduler is None:
+            return fn(*args)
+        return self.scheduler.run(self.lane, fn, *args)
+    
+    def _generate_image(self, prompt: str, aspect_ratio: str, retries: int, seed: int, size: tuple = None, deadline: float = None) -> EncodedImage:
+        """Walk the backend chain for one request (hedged when enabled)"""
+        # Event dataclasses load with the first request rather than with the module
+        from src.events import BackendFallback
+        
+        if self.hedging:
+            image = self._generate_hedged(prompt, aspect_ratio, retries, seed, size, deadline)
+            return self._seeded(image if image is not None else self._placeholder(aspect_ratio, size), seed)
+        
+        # Try primary model first, then fallback, then Pollinations
+        chain = self.backend_chain(size)
+        for index, model in enumerate(chain):
             print(f"🎨 Trying model: {model}...")
             
+            image = self._call_backend(model, prompt, aspect_ratio, retries, seed, size, deadline=deadline)
+            if image is not None:
+                return self._seeded(image, seed)
+            
+            if deadline is not None and time.monotonic() >= deadline:
+                print(f"⌛ Request deadline ({self.request_deadline:.0f}s) reached, giving up on remaining models")
+                self._emit(BackendFallback(model, "placeholder", "deadline", aspect_ratio))
+                break
+            
+            print(f"⚠️ Failed with {model}, switching to next model...")
+            next_model = chain[index + 1] if index + 1 < len(chain) else "placeholder"
+            self._emit(BackendFallback(model, next_model, "failed", aspect_ratio))
+        
+        return self._seeded(self._placeholder(aspect_ratio, size), seed)
+    
+    @staticmethod
+    def _seeded(image: EncodedImage, seed: int) -> EncodedImage:
+        """Record the seed an image was rendered with (coalesced callers may have asked for another)"""
+        image.info["seed"] = seed
+        return image
+    
+    def _call_backend(
+        self,
+        model: str,
+        prompt: str,
+        aspect_ratio: str,
+        retries: int,
+        seed: int,
+        size: tuple = None,
+        cancel: threading.Event = None,
+        deadline: float = None,
+        calls: list = None
+    ) -> EncodedImage:
+        """Run the retry loop against one backend; None if it never succeeded (or ran out of time)
+        
+        calls, if given, gets one entry per upstream call made (each is billed, even if cancelled later).
+        """
+        from src.events import RetryWait
+        
+        width, height = self.backend_size(model, aspect_ratio, size)
+        if retries is None:
+            retries = self.timeout_policy.retries_for(model, self.latency)
+        
+        # A cancelled hedge stops between attempts and wakes up from retry sleeps;
+        # a wait that would run past the deadline ends the loop instead
+        def pause(seconds, reason="error"):
+            if attempt + 1 >= retries:
+                return False
+            if deadline is not None and time.monotonic() + seconds >= deadline:
+                return True
+            self._emit(RetryWait(model, attempt + 1, retries, seconds, reason))
+            if cancel is not None:
+                return cancel.wait(seconds)
+            time.sleep(seconds)
+            return False
+        
+        def failed(error=None):
+            timed_out = error is not None and (isinstance(error, TimeoutError) or "timed out" in str(error).lower())
+            self.latency.record_error(model, timed_out=timed_out)
+        
+        for attempt in range(retries):
+            if cancel is not None and cancel.is_set():
+                return None
+            
+            timeout = self.timeout_policy.timeout_for(model, self.latency)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                timeout = min(timeout, remaining)
+            
+            started = time.perf_counter()
+            if self.quota is not None:
+                self.quota.record(model)
+            if calls is not None:
+                calls.append(model)
+            
             # Special handling for Pollinations.ai (No API Key needed)
             if model == "pollinations":
-                for attempt in range(retries):
-                    try:
-                        print(f"   Attempt {attempt + 1}/{retries} (Pollinations)...")
-                        # Pollinations uses GET request with URL parameters
-                        encoded_prompt = requests.utils.quote(prompt)
-                        # Random seed to ensure variation
-                        import random
-                        seed = random.randint(0, 10000)
-                        image_url = f"https://pollinations.ai/p/{encoded_prompt}?width={width}&height={height}&model=flux&seed={seed}"
-                        
-                        response = requests.get(image_url, timeout=60)
-                        
-                        if response.status_code == 200:
-                            image = Image.open(BytesIO(response.content))
-                            print(f"✅ Generated {aspect_ratio} creative successfully with Pollinations!")
-                            return image
-                        else:
-                            print(f"❌ Pollinations error {response.status_code}")
-                            time.sleep(2)
-                            continue
-                    except Exception as e:
-                        print(f"❌ Error with Pollinations: {e}")
-                        time.sleep(2)
-                        continue
-                
-                # If Pollinations fails after retries, continue to next model (if any)
-                continue
-
-            # Hugging Face Logic
-            # Use smaller dimensions for v1.5 fallback
-            if model == self.MODELS["fallback"]:
-                if aspect_ratio == "1:1": width, height = 512, 512
-                elif aspect_ratio == "9:16": width, height = 512, 910
-                elif aspect_ratio == "16:9": width, height = 910, 512
-            
-            for attempt in range(retries):
                 try:
-                    print(f"   Attempt {attempt + 1}/{retries}...")
+                    print(f"   Attempt {attempt + 1}/{retries} (Pollinations)...")
+                    import requests
+                    # Pollinations uses GET request with URL parameters
+                    encoded_prompt = requests.utils.quote(prompt)
+                    image_url = f"https://pollinations.ai/p/{encoded_prompt}?width={width}&height={height}&model=flux&seed={seed}"
                     
-                    # Use InferenceClient for robust generation
-                    image = self.client.text_to_image(
-                        prompt,
-                        model=model,
-                        width=width,
-                        height=height,
-                        num_inference_steps=30,
-                        guidance_scale=7.5
-                    )
+                    response = requests.get(image_url, timeout=timeout)
                     
-                    print(f"✅ Generated {aspect_ratio} creative successfully with {model}!")
-                    return image
-                        
+                    if response.status_code == 200:
+                        # Keep the server's bytes (usually JPEG) instead of decoding and re-encoding
+                        image = EncodedImage(response.content, info={"backend": model})
+                        self.latency.record(model, time.perf_counter() - started)
+                        self.readiness.mark(model, "ready")
+                        print(f"✅ Generated {aspect_ratio} creative successfully with Pollinations!")
+                        return image
+                    else:
+                        print(f"❌ Pollinations error {response.status_code}")
+                        failed()
+                        if pause(2):
+                            return None
+                        continue
                 except Exception as e:
-                    print(f"❌ Error generating image: {e}")
-                    if "503" in str(e) or "loading" in str(e).lower():
-                        print(f"⏳ Model {model} loading, waiting 15 seconds...")
-                        time.sleep(15)
+                    print(f"❌ Error with Pollinations: {e}")
+                    failed(e)
+                    if pause(2):
+                        return None
+                    continue
+            
+            # Hugging Face Logic
+            try:
+                print(f"   Attempt {attempt + 1}/{retries}...")
+                
+                # Same payload as InferenceClient.text_to_image, but keep the raw response bytes
+                data = self._timed_client(timeout).post(
+                    json={
+                        "inputs": prompt,
+                        "parameters": {
+                            "width": width,
+                            "height": height,
+                            "num_inference_steps": 30,
+                            "guidance_scale": 7.5,
+                            "seed": seed
+                        }
+                    },
+                    model=model,
+                    task="text-to-image"
+                )
+                image = EncodedImage(data, info={"backend": model})
+                self.latency.record(model, time.perf_counter() - started)
+                self.readiness.mark(model, "ready")
+                
+                print(f"✅ Generated {aspect_ratio} creative successfully with {model}!")
+                return image
+                    
+            except Exception as e:
+                print(f"❌ Error generating image: {e}")
+                if "503" in str(e) or "loading" in str(e).lower() or "not loaded" in str(e).lower():
+                    self.readiness.mark(model, "loading")
+                    
+                    # Don't keep the user waiting on a cold model if another backend is warm
+                    if self.readiness.any_ready([b for b in self.backend_chain(size) if b != model]):
+                        print(f"⏳ Model {model} loading, moving on to a warm backend...")
+                        return None
+                    
+                    print(f"⏳ Model {model} loading, waiting 15 seconds...")
+                    cancelled = pause(15, "loading")
+                else:
+                    failed(e)
+                    cancelled = pause(2)
+                if cancelled:
+                    return None
+        
+        if self.readiness.state(model) != "loading":
+            self.readiness.mark(model, "unavailable")
+        return None
+    
+    def _generate_hedged(self, prompt: str, aspect_ratio: str, retries: int, seed: int, size: tuple = None, deadline: float = None) -> EncodedImage:
+        """Race the next backend against a slow one; first success wins, losers are cancelled"""
+        from concurrent.futures import FIRST_COMPLETED, wait
+        from src.events import BackendFallback
+        
+        chain = self.backend_chain(size)
+        if not chain:
+            return None
+        pool = self._hedge_executor()
+        pending = {}
+        charged = {}
+        next_index = 0
+        hedge_allowed = True
+        self.hedge_policy.record_request()
+        
+        def launch(model, hedge=False):
+            cancel = threading.Event()
+            calls = []
+            future = pool.submit(self._call_backend, model, prompt, aspect_ratio, retries, seed, size, cancel, deadline, calls)
+            pending[future] = (model, cancel, time.monotonic())
+            charged[future] = calls
+            if hedge:
+                # Counted once the call returns, so calls finishing after a cancel are included
+                future.add_done_callback(lambda _: self.hedge_policy.record_spend(model, len(calls)))
+        
+        print(f"🎨 Trying model: {chain[0]} (hedged)...")
+        launch(chain[0])
+        next_index = 1
+        
+        try:
+            while pending:
+                timeout = None
+                model, _, started = min(pending.values(), key=lambda p: p[2])
+                can_hedge = hedge_allowed and next_index < len(chain)
+                if can_hedge:
+                    # Hedge once the oldest in-flight backend exceeds its learned latency percentile
+                    delay = self.hedge_policy.delay_for(model, self.latency)
+                    timeout = max(0.0, delay - (time.monotonic() - started))
+                if deadline is not None:
+                    remaining = max(0.0, deadline - time.monotonic())
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                if not done and deadline is not None and time.monotonic() >= deadline:
+                    print(f"⌛ Request deadline ({self.request_deadline:.0f}s) reached, cancelling in-flight backends")
+                    self._emit(BackendFallback(model, "placeholder", "deadline", aspect_ratio))
+                    return None
+                
+                if not done and not can_hedge:
+                    continue
+                
+                if not done:
+                    if self.hedge_policy.try_acquire(chain[next_index], self.quota):
+                        print(f"🏁 {model} slower than p{int(self.hedge_policy.percentile * 100)}, hedging with {chain[next_index]}...")
+                        self._emit(BackendFallback(model, chain[next_index], "slow", aspect_ratio))
+                        launch(chain[next_index], hedge=True)
+                        next_index += 1
                     else:
-                        time.sleep(2)
+                        print("⏳ Hedge budget exhausted, waiting on in-flight backends...")
+                        hedge_allowed = False
+                    continue
+                
+                for future in done:
+                    model, _, _ = pending.pop(future)
+                    image = future.result()
+                    if image is not None:
+                        return image
+                    print(f"⚠️ Failed with {model}, switching to next model...")
+                
+                # Plain fallback when nothing is left in flight (and there is time left to use it)
+                if not pending and deadline is not None and time.monotonic() >= deadline:
+                    print(f"⌛ Request deadline ({self.request_deadline:.0f}s) reached, giving up on remaining models")
+                    self._emit(BackendFallback(model, "placeholder", "deadline", aspect_ratio))
+                    return None
+                if not pending and next_index < len(chain):
+                    print(f"🎨 Trying model: {chain[next_index]}...")
+                    self._emit(BackendFallback(model, chain[next_index], "failed", aspect_ratio))
+                    launch(chain[next_index])
+                    next_index += 1
             
-            print(f"⚠️ Failed with {model}, switching to next model...")
+            self._emit(BackendFallback(model, "placeholder", "failed", aspect_ratio))
+            return None
+        finally:
+            # Losers stop at their next check; a call already on the wire still finishes and is billed
+            for future, (model, cancel, _) in pending.items():
+                cancel.set()
+                future.cancel()
+                calls = charged[future]
+                future.add_done_callback(lambda _, model=model, calls=calls: self.hedge_policy.record_waste(model, len(calls)))
+    
+    def _hedge_executor(self):
+        """Thread pool shared by hedged requests, created on first use"""
+        with self._init_lock:
+            if self._executor is None:
+                # Shared by all sessions; each hedged request holds at most one thread per backend
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+        return self._executor
+    
+    def _placeholder(self, aspect_ratio: str, size: tuple = None) -> EncodedImage:
+        """Gray 'Generation Failed' image (at the requested size) when every backend failed"""
         
         # Return blank image if all models and retries fail
         print("⚠️ Failed to generate image with all models, returning placeholder")
-        placeholder = Image.new('RGB', (512, 512), color=(50, 50, 50))
+        width, height = size or self.ASPECT_RATIOS[aspect_ratio]
+        placeholder = Image.new('RGB', (width, height), color=(50, 50, 50))
         from PIL import ImageDraw
         draw = ImageDraw.Draw(placeholder)
         text = f"Generation Failed\nCheck Internet"
-        draw.text((100, 256), text, fill=(255,255,255))
-        return placeholder
+        draw.text((width // 5, height // 2), text, fill=(255,255,255))
+        placeholder.info["backend"] = "placeholder"
+        return EncodedImage.from_pil(placeholder)
     
     def generate_creative_set(
         self, 
@@ -156,45 +619,190 @@ class CreativeGenerator:
         product_name: str, 
         tone: str,
         num_variations: int = 3,
-        aspect_ratios: list = None
+        aspect_ratios: list = None,
+        session_id: str = None,
+        dedup: bool = True,
+        max_regenerations: int = 2,
+        oversample: int = 1,
+        top_k: int = 1
     ) -> list:
-        """Generate multiple creatives with different variations"""
+        """Generate multiple creatives with different variations (all images kept in memory)"""
+        
+        return list(self.iter_creatives(
+            brand_profile, product_name, tone,
+            num_variations=num_variations,
+            aspect_ratios=aspect_ratios,
+            session_id=session_id,
+            dedup=dedup,
+            max_regenerations=max_regenerations,
+            oversample=oversample,
+            top_k=top_k
+        ))
+    
+    def iter_creatives(
+        self,
+        brand_profile: dict,
+        product_name: str,
+        tone: str,
+        num_variations: int = 3,
+        aspect_ratios: list = None,
+        session_id: str = None,
+        dedup: bool = True,
+        max_regenerations: int = 2,
+        oversample: int = 1,
+        top_k: int = 1,
+        memo=None,
+        reuse: bool = True
+    ):
+        """Yield creatives one at a time so callers can persist and drop each image
+        
+        With oversample > 1 every slot renders that many candidates (distinct seeds)
+        and only the top_k by brand score are kept. With a StepCache as memo, slots
+        whose inputs match an earlier run are served from it instead of the backends
+        (unless reuse is off); every creative carries its slot's cache_key so the
+        caller can store it.
+        """
+        
+        from src.brand_scorer import BrandScorer
         
         if aspect_ratios is None:
             aspect_ratios = ["1:1", "9:16", "16:9"]
         
         base_prompt = self.build_prompt(brand_profile, product_name, tone)
-        creatives = []
         
         print(f"\n🎯 Base Prompt: {base_prompt}\n")
         
-        # Generate variations
-        variation_modifiers = [
-            "centered composition",
-            "lifestyle scene with product",
-            "close-up product shot"
-        ]
+        # Every session gets its own seeds; without one, seeds follow the prompt
+        planner = VariationPlanner(session_id or derive_seed(base_prompt))
+        modifiers = self.VARIATION_MODIFIERS[:num_variations]
+        
+        # Only perceptual hashes are remembered, never earlier images
+        deduplicator = None
+        if dedup:
+            from src.image_dedup import CreativeDeduplicator
+            deduplicator = CreativeDeduplicator()
         
+        scorer = BrandScorer(brand_profile)
+        candidates = max(oversample, top_k)
         creative_id = 1
-        for i in range(min(num_variations, len(variation_modifiers))):
-            modifier = variation_modifiers[i]
-            prompt = f"{base_prompt}, {modifier}"
+        
+        for slot in planner.plan(modifiers, aspect_ratios):
+            prompt = f"{base_prompt}, {slot['modifier']}"
+            seeds = [planner.candidate_seed(slot["variation"], slot["aspect_ratio"], i) for i in range(candidates)]
+            cache_key = None
+            if memo is not None:
+                cache_key = memo.key(
+                    "image", prompt=prompt, variation=slot["variation"], aspect_ratio=slot["aspect_ratio"],
+                    size=self.ASPECT_RATIOS[slot["aspect_ratio"]], candidates=candidates, top_k=top_k,
+                    dedup=dedup, max_regenerations=max_regenerations
+                )
+                cached = memo.get_images(cache_key) if reuse else None
+                if cached is not None:
+                    for image, entry in cached:
+                        creative = {**entry["creative"], "id": creative_id, "image": image, "cache_key": cache_key, "reused": True}
+                        creative_id += 1
+                        # Still registered with the deduplicator so later fresh slots are compared against it
+                        if deduplicator is not None:
+                            self.deduplicate(creative, deduplicator, planner, max_regenerations)
+                            if creative["regenerated"]:
+                                creative["reused"] = False
+                                creative["brand_score"] = scorer.score(creative["image"])
+                        print(f"♻️ Reusing creative {creative['id']} ({slot['aspect_ratio']}) from an earlier session")
+                        yield creative
+                    continue
             
-            for ratio in aspect_ratios:
-                image = self.generate_image(prompt, ratio)
-                
-                creatives.append({
+            images = self._generate_candidates(prompt, slot["aspect_ratio"], seeds)
+            
+            # One vectorized pass scores the whole candidate batch
+            ranked = sorted(
+                zip(scorer.score_batch(images), [image.info.get("seed", seed) for seed, image in zip(seeds, images)], images),
+                key=lambda candidate: candidate[0]["score"],
+                reverse=True
+            )
+            for _, _, image in ranked[top_k:]:
+                image.close()
+            if candidates > 1:
+                print(f"🏅 Kept {top_k}/{candidates} candidates for slot {slot['id']} (best score {ranked[0][0]['score']:.2f})")
+            
+            for score, seed, image in ranked[:top_k]:
+                creative = {
                     "id": creative_id,
-                    "variation": i + 1,
-                    "aspect_ratio": ratio,
+                    "variation": slot["variation"],
+                    "aspect_ratio": slot["aspect_ratio"],
                     "prompt": prompt,
-                    "image": image
-                })
-                
+                    "seed": seed,
+                    "backend": image.info.get("backend"),
+                    "brand_score": score,
+                    "candidates": candidates,
+                    "image": image,
+                    "cache_key": cache_key
+                }
                 creative_id += 1
-                time.sleep(2)  # Rate limiting
+                
+                if deduplicator is not None:
+                    self.deduplicate(creative, deduplicator, planner, max_regenerations)
+                    if creative["regenerated"]:
+                        creative["brand_score"] = scorer.score(creative["image"])
+                
+                yield creative
+            
+            time.sleep(2)  # Rate limiting
+    
+    def _generate_candidates(self, prompt: str, aspect_ratio: str, seeds: list) -> list:
+        """Render one prompt with several seeds, concurrently when there is more than one
+        
+        Candidates coalesce by position, so a session running the same brief as one
+        already in flight shares its images instead of paying for its own seeds.
+        """
+        
+        if len(seeds) == 1:
+            return [self.generate_image(prompt, aspect_ratio, seed=seeds[0], share_key=("candidate", 0))]
+        
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(seeds), thread_name_prefix="candidate") as pool:
+            return list(pool.map(
+                lambda index: self.generate_image(prompt, aspect_ratio, seed=seeds[index], share_key=("candidate", index)),
+                range(len(seeds))
+            ))
+    
+    def deduplicate(self, creative: dict, dedup, planner: VariationPlanner, max_regenerations: int = 2) -> dict:
+        """Regenerate a near-duplicate or placeholder slot with a new seed and modifier"""
+        
+        ratio = creative["aspect_ratio"]
+        result = dedup.check(creative["image"], group=ratio)
+        creative["regenerated"] = 0
+        original_prompt = creative["prompt"]
+        
+        while (result["duplicate_of"] or result["placeholder"]) and creative["regenerated"] < max_regenerations:
+            reason = "placeholder" if result["placeholder"] else f"duplicate of #{result['duplicate_of']}"
+            attempt = creative["regenerated"] + 1
+            modifier = self.REGENERATION_MODIFIERS[(creative["id"] + attempt) % len(self.REGENERATION_MODIFIERS)]
+            seed = planner.reseed(creative["variation"], ratio, attempt)
+            
+            print(f"♻️ Creative {creative['id']} is a {reason}, regenerating ({attempt}/{max_regenerations})...")
+            prompt = f"{original_prompt}, {modifier}"
+            image = self.generate_image(prompt, ratio, seed=seed, share_key=("retry", attempt))
+            
+            creative["image"].close()
+            creative.update({
+                "prompt": prompt,
+                "seed": image.info.get("seed", seed),
+                "backend": image.info.get("backend"),
+                "image": image,
+                "regenerated": attempt
+            })
+            result = dedup.check(image, group=ratio)
+        
+        creative["phash"] = result["hash"]
+        if result["placeholder"]:
+            creative["flag"] = "placeholder"
+        elif result["duplicate_of"]:
+            creative["flag"] = f"duplicate of #{result['duplicate_of']}"
+        else:
+            creative["flag"] = None
+            dedup.register(creative["id"], result, group=ratio)
         
-        return creatives
+        return creative
 
 
 # Test function
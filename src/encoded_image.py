@@ -0,0 +1,84 @@
+"""
+Encoded Image - Keeps backend image bytes exactly as received
+Uses: Pillow only when a stage needs pixels (dedup, resize, overlay)
+"""
+
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+
+# Magic numbers -> (format, file extension)
+SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "PNG", ".png"),
+    (b"\xff\xd8\xff", "JPEG", ".jpg"),
+    (b"GIF87a", "GIF", ".gif"),
+    (b"GIF89a", "GIF", ".gif"),
+]
+
+
+def sniff_format(data: bytes) -> tuple:
+    """(format, extension) from the leading bytes, or (None, '.bin')"""
+    for magic, fmt, ext in SIGNATURES:
+        if data.startswith(magic):
+            return fmt, ext
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "WEBP", ".webp"
+    return None, ".bin"
+
+
+class EncodedImage:
+    """Image bytes passed through untouched, decoded lazily and at most once"""
+
+    def __init__(self, data: bytes, info: dict = None):
+        self.data = data
+        self.format, self.extension = sniff_format(data)
+        self.info = dict(info or {})
+        self._size = None
+        self._decoded = None
+
+    @classmethod
+    def from_pil(cls, image: Image.Image, format: str = "PNG") -> "EncodedImage":
+        """Encode a locally drawn image once (placeholders, re-rendered pixels)"""
+        buffer = BytesIO()
+        image.save(buffer, format=format)
+        return cls(buffer.getvalue(), info=image.info)
+
+    @property
+    def size(self) -> tuple:
+        """(width, height) read from the header without decoding pixels"""
+        if self._size is None:
+            if self._decoded is not None:
+                self._size = self._decoded.size
+            else:
+                with Image.open(BytesIO(self.data)) as header:
+                    self._size = header.size
+        return self._size
+
+    def to_pil(self) -> Image.Image:
+        """Decoded pixels, cached until close()"""
+        if self._decoded is None:
+            self._decoded = Image.open(BytesIO(self.data))
+            self._decoded.load()
+        return self._decoded
+
+    def convert(self, mode: str) -> Image.Image:
+        """Pillow-compatible convert() for stages that need pixels"""
+        return self.to_pil().convert(mode)
+
+    def save(self, path) -> Path:
+        """Write the original bytes; the suffix is replaced to match the real format"""
+        path = Path(path).with_suffix(self.extension)
+        path.write_bytes(self.data)
+        return path
+
+    def copy(self) -> "EncodedImage":
+        """Independent handle sharing the same immutable bytes"""
+        return EncodedImage(self.data, info=self.info)
+
+    def close(self):
+        """Drop decoded pixels (the encoded bytes stay)"""
+        if self._decoded is not None:
+            self._decoded.close()
+            self._decoded = None
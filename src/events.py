@@ -0,0 +1,122 @@
+"""
+Pipeline Events - Typed progress events emitted while a session runs
+Uses: stdlib dataclasses; consumers get objects, wire formats get to_dict()
+"""
+
+from dataclasses import asdict, dataclass
+
+from src.metrics import metrics
+
+
+@dataclass
+class PipelineEvent:
+    """Base class; session is filled in by the PipelineSession that emits the event"""
+
+    name = "event"
+
+    def to_dict(self) -> dict:
+        """{"event": name, ...fields} for JSON, SSE and logs"""
+        return {"event": self.name, **asdict(self)}
+
+
+@dataclass
+class StageStarted(PipelineEvent):
+    stage: str
+    session: str = None
+
+    name = "stage_started"
+
+
+@dataclass
+class StageFinished(PipelineEvent):
+    stage: str
+    wall_s: float
+    cpu_s: float
+    session: str = None
+
+    name = "stage_finished"
+
+
+@dataclass
+class CreativeGenerated(PipelineEvent):
+    """A creative was written to the session folder; index/total drive progress bars"""
+
+    creative_id: int
+    aspect_ratio: str
+    path: str
+    index: int
+    total: int
+    backend: str = None
+    brand_score: float = None
+    reused: bool = False
+    session: str = None
+
+    name = "creative_generated"
+
+
+@dataclass
+class BackendFallback(PipelineEvent):
+    """An image request moved on to (or was hedged with) the next backend"""
+
+    from_backend: str
+    to_backend: str
+    reason: str
+    aspect_ratio: str = None
+    session: str = None
+
+    name = "backend_fallback"
+
+
+@dataclass
+class RetryWait(PipelineEvent):
+    """A backend call failed and the next attempt starts after seconds"""
+
+    backend: str
+    attempt: int
+    retries: int
+    seconds: float
+    reason: str
+    session: str = None
+
+    name = "retry_wait"
+
+
+@dataclass
+class CaptionReady(PipelineEvent):
+    variations: int
+    path: str
+    session: str = None
+
+    name = "caption_ready"
+
+
+@dataclass
+class ZipReady(PipelineEvent):
+    path: str
+    bytes: int
+    session: str = None
+
+    name = "zip_ready"
+
+
+def record_metrics(event: PipelineEvent):
+    """Count every event in the process-wide metrics registry"""
+    metrics.incr(f"events.{event.name}")
+    if isinstance(event, BackendFallback):
+        metrics.incr(f"fallback.{event.from_backend}.{event.reason}")
+    elif isinstance(event, RetryWait):
+        metrics.incr(f"retry_wait.{event.backend}")
+        metrics.incr("retry_wait.ms", int(event.seconds * 1000))
+
+
+class ConsoleProgress:
+    """CLI progress lines for the events the step-by-step log doesn't already show"""
+
+    def __call__(self, event: PipelineEvent):
+        if isinstance(event, CreativeGenerated):
+            score = f", brand score {event.brand_score:.2f}" if event.brand_score is not None else ""
+            print(f"🖼️ [{event.index}/{event.total}] {event.path} ready{score}")
+        elif isinstance(event, StageFinished):
+            print(f"⏱️ {event.stage} finished in {event.wall_s:.2f}s")
+        elif isinstance(event, ZipReady):
+            print(f"📦 ZIP ready: {event.path} ({event.bytes / 1024:.0f} KB)")
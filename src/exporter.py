@@ -0,0 +1,163 @@
+"""
+Platform Exporter - Fans creatives out to every platform placement size from declarative presets
+Uses: Pillow + the normalizer's crop/resample in a process pool; no extra generation calls
+"""
+
+import math
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+# name -> placement; max_kb is the platform's upload limit (display networks cap banners at 150 KB)
+EXPORT_PRESETS = {
+    "instagram_square": {"platform": "instagram", "size": (1080, 1080), "format": "JPEG", "max_kb": 8192},
+    "instagram_portrait": {"platform": "instagram", "size": (1080, 1350), "format": "JPEG", "max_kb": 8192},
+    "instagram_story": {"platform": "instagram", "size": (1080, 1920), "format": "JPEG", "max_kb": 8192},
+    "facebook_feed": {"platform": "facebook", "size": (1200, 628), "format": "JPEG", "max_kb": 8192},
+    "linkedin_post": {"platform": "linkedin", "size": (1200, 627), "format": "JPEG", "max_kb": 5120},
+    "x_post": {"platform": "x", "size": (1600, 900), "format": "JPEG", "max_kb": 5120},
+    "pinterest_pin": {"platform": "pinterest", "size": (1000, 1500), "format": "JPEG", "max_kb": 10240},
+    "youtube_thumbnail": {"platform": "youtube", "size": (1280, 720), "format": "JPEG", "max_kb": 2048},
+    "display_medium_rectangle": {"platform": "display", "size": (300, 250), "format": "JPEG", "max_kb": 150},
+    "display_leaderboard": {"platform": "display", "size": (728, 90), "format": "JPEG", "max_kb": 150},
+    "display_skyscraper": {"platform": "display", "size": (160, 600), "format": "JPEG", "max_kb": 150},
+    "display_mobile_banner": {"platform": "display", "size": (320, 50), "format": "PNG", "max_kb": 150},
+}
+
+PRESET_GROUPS = {
+    "social": [name for name, p in EXPORT_PRESETS.items() if p["platform"] != "display"],
+    "display": [name for name, p in EXPORT_PRESETS.items() if p["platform"] == "display"],
+    "all": list(EXPORT_PRESETS),
+}
+
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+
+# Overlays are laid out for their own ratio; only reuse them for placements of (almost) that shape
+COMPOSITE_RATIO_TOLERANCE = 0.03
+
+
+def resolve_presets(names: list) -> dict:
+    """Preset names and/or group names -> {name: preset}, in declaration order"""
+    wanted = set()
+    for name in names or []:
+        if name in PRESET_GROUPS:
+            wanted.update(PRESET_GROUPS[name])
+        elif name in EXPORT_PRESETS:
+            wanted.add(name)
+        else:
+            raise ValueError(f"Unknown export preset: {name} (choose from {', '.join([*PRESET_GROUPS, *EXPORT_PRESETS])})")
+    return {name: preset for name, preset in EXPORT_PRESETS.items() if name in wanted}
+
+
+def encode_within(image: Image.Image, image_format: str, max_bytes: int) -> tuple:
+    """Encode at the best quality that fits max_bytes: (bytes, quality or None, fits)"""
+
+    def encode(quality=None, img=image):
+        buffer = BytesIO()
+        if image_format == "PNG":
+            img.save(buffer, format="PNG", optimize=True)
+        else:
+            img.save(buffer, format=image_format, quality=quality, optimize=image_format == "JPEG", progressive=image_format == "JPEG")
+        return buffer.getvalue()
+
+    if image_format == "PNG":
+        data = encode()
+        if len(data) > max_bytes:
+            # Banner art survives a 256-colour palette far better than a blown size limit
+            data = encode(img=image.quantize(256, method=Image.Quantize.MEDIANCUT))
+        return data, None, len(data) <= max_bytes
+
+    best = encode(92)
+    if len(best) <= max_bytes:
+        return best, 92, True
+
+    # Binary search for the highest quality under the limit
+    low, high, fitting = 30, 91, None
+    while low <= high:
+        quality = (low + high) // 2
+        data = encode(quality)
+        if len(data) <= max_bytes:
+            fitting, low = (data, quality), quality + 1
+        else:
+            high = quality - 1
+    if fitting is not None:
+        return fitting[0], fitting[1], True
+    data = encode(30)
+    return data, 30, False
+
+
+def render_export(job: tuple) -> dict:
+    """Crop, resize and encode one (source, preset_name, preset, dest) job; runs in a pool process"""
+    # NumPy and the normalizer (OpenCV) load in pool processes, not when main imports this module
+    import numpy as np
+    from src.normalizer import center_crop_box, resample
+
+    source, preset_name, preset, dest = job
+    target = tuple(preset["size"])
+
+    with Image.open(source) as image:
+        original = image.size
+        box = center_crop_box(original, target)
+        pixels = np.asarray(image.convert("RGB").crop(box))
+
+    resized = Image.fromarray(resample(pixels, target))
+    data, quality, fits = encode_within(resized, preset["format"], preset["max_kb"] * 1024)
+
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.write_bytes(data)
+    return {
+        "preset": preset_name,
+        "platform": preset["platform"],
+        "path": str(dest),
+        "size": list(target),
+        "format": preset["format"],
+        "bytes": len(data),
+        "quality": quality,
+        "within_limit": fits,
+        "upscaled": target[0] > box[2] - box[0] or target[1] > box[3] - box[1],
+    }
+
+
+def ratio_distance(size: tuple, target: tuple) -> float:
+    """How far two shapes are apart (0 = same aspect ratio), symmetric in both directions"""
+    return abs(math.log((size[0] / size[1]) / (target[0] / target[1])))
+
+
+class PlatformExporter:
+    """Plans one export per (variation, preset) from the closest-ratio creative and renders them"""
+
+    def __init__(self, presets: dict, pool=None):
+        self.presets = presets
+        self.pool = pool
+
+    def plan(self, creatives: list, session_folder: Path) -> list:
+        """(creative, job) pairs; exports land in session_folder/exports/<platform>/"""
+        by_variation = {}
+        for creative in creatives:
+            by_variation.setdefault(creative["variation"], []).append(creative)
+
+        planned = []
+        for variation, group in sorted(by_variation.items()):
+            for name, preset in self.presets.items():
+                target = tuple(preset["size"])
+                creative = min(group, key=lambda c: ratio_distance(c["size"], target))
+                use_composite = "composited_path" in creative and ratio_distance(creative["size"], target) <= COMPOSITE_RATIO_TOLERANCE
+                source = creative["composited_path"] if use_composite else creative["filepath"]
+                dest = session_folder / "exports" / preset["platform"] / f"creative_{creative['id']}_{name}{EXTENSIONS[preset['format']]}"
+                planned.append((creative, (str(source), name, preset, str(dest))))
+        return planned
+
+    def render(self, jobs: list) -> list:
+        """Render jobs on the process pool (inline for a single job or without a pool)"""
+        if self.pool is None or len(jobs) < 2:
+            return [render_export(job) for job in jobs]
+        return list(self.pool.map(render_export, jobs))
+
+
+def export_pool(max_workers: int = None):
+    """Process pool for exports; spawned workers are safe to start from threaded servers"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
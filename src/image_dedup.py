@@ -0,0 +1,56 @@
+"""
+Creative Deduplicator - Detects near-identical and placeholder creatives
+Uses: perceptual difference hash (Pillow + NumPy, local processing)
+"""
+
+import numpy as np
+from PIL import Image
+
+
+class CreativeDeduplicator:
+    """Tracks perceptual hashes of a creative set and flags wasted slots"""
+
+    def __init__(self, hash_size: int = 8, max_distance: int = 6, flat_std: float = 12.0):
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self.flat_std = flat_std
+        self.seen = {}
+
+    def dhash(self, image: Image.Image) -> int:
+        """Difference hash: compares neighbouring pixels of a tiny grayscale copy"""
+        gray = image.convert("L").resize((self.hash_size + 1, self.hash_size), Image.LANCZOS)
+        pixels = np.asarray(gray, dtype=np.int16)
+        bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+        return int("".join("1" if b else "0" for b in bits), 2)
+
+    def hamming(self, a: int, b: int) -> int:
+        """Number of differing bits between two hashes"""
+        return bin(a ^ b).count("1")
+
+    def is_placeholder(self, image: Image.Image) -> bool:
+        """Detect the 'Generation Failed' placeholder or any near-flat image"""
+        if image.info.get("backend") == "placeholder":
+            return True
+
+        small = np.asarray(image.convert("L").resize((64, 64)), dtype=np.float32)
+        return float(small.std()) < self.flat_std
+
+    def check(self, image: Image.Image, group: str = "") -> dict:
+        """Hash an image and compare it with everything registered in its group"""
+        image_hash = self.dhash(image)
+        duplicate_of = None
+
+        for creative_id, (seen_group, seen_hash) in self.seen.items():
+            if seen_group == group and self.hamming(image_hash, seen_hash) <= self.max_distance:
+                duplicate_of = creative_id
+                break
+
+        return {
+            "hash": f"{image_hash:0{self.hash_size * self.hash_size // 4}x}",
+            "duplicate_of": duplicate_of,
+            "placeholder": self.is_placeholder(image)
+        }
+
+    def register(self, creative_id: int, result: dict, group: str = ""):
+        """Remember an accepted creative so later ones are compared against it"""
+        self.seen[creative_id] = (group, int(result["hash"], 16))
@@ -0,0 +1,194 @@
+"""
+Job Queue - Leased pipeline jobs shared by worker processes
+Uses: SQLite (stdlib) in WAL mode by default; other brokers implement JobBroker
+"""
+
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class JobBroker:
+    """Interface every queue backend implements
+
+    A worker leases a job for lease_seconds and must heartbeat before the lease
+    runs out; a lease that expires (crashed or stuck worker) makes the job
+    available again until max_attempts is reached.
+    """
+
+    def enqueue(self, payload: dict, priority: int = 0, available_at: float = None) -> str:
+        raise NotImplementedError
+
+    def lease(self, worker_id: str, lease_seconds: float) -> dict:
+        """Claim the next due job, or None"""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a lease; False if the worker no longer owns the job"""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        raise NotImplementedError
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Record a failed attempt; the job is retried until max_attempts"""
+        raise NotImplementedError
+
+    def defer(self, job_id: str, worker_id: str, available_at: float, reason: str) -> bool:
+        """Put a job back without spending an attempt (e.g. quota window exhausted)"""
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> dict:
+        raise NotImplementedError
+
+    def active_payloads(self) -> list:
+        """Payloads of jobs that are still queued or leased"""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class SQLiteBroker(JobBroker):
+    """Queue in one SQLite file; safe for many processes on one machine"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL,
+            lease_owner TEXT,
+            lease_expires REAL,
+            created REAL NOT NULL,
+            updated REAL NOT NULL,
+            result TEXT,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, available_at, priority);
+    """
+
+    def __init__(self, path: str = "output/.queue.db", max_attempts: int = 3):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Fresh autocommit connection per call, so brokers can be shared across threads"""
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def _row(self, row) -> dict:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, payload: dict, priority: int = 0, available_at: float = None) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, payload, status, priority, available_at, created, updated) VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, json.dumps(payload), priority, available_at or now, now, now)
+            )
+        return job_id
+
+    def lease(self, worker_id: str, lease_seconds: float) -> dict:
+        now = time.time()
+        with self._connect() as db:
+            try:
+                # IMMEDIATE takes the write lock up front, so two workers never claim the same row
+                db.execute("BEGIN IMMEDIATE")
+
+                # Leases that ran out belong to crashed workers: retry, or give up after max_attempts
+                db.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'lease expired after final attempt', lease_owner = NULL, updated = ? "
+                    "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, now, self.max_attempts)
+                )
+                db.execute(
+                    "UPDATE jobs SET status = 'queued', error = 'lease expired', lease_owner = NULL, updated = ? "
+                    "WHERE status = 'leased' AND lease_expires < ?",
+                    (now, now)
+                )
+
+                row = db.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' AND available_at <= ? ORDER BY priority DESC, available_at, created LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    db.execute("COMMIT")
+                    return None
+
+                db.execute(
+                    "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated = ? WHERE id = ?",
+                    (worker_id, now + lease_seconds, now, row["id"])
+                )
+                job = self._row(db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+                db.execute("COMMIT")
+                return job
+            except Exception:
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+                raise
+
+    def _update_owned(self, job_id: str, worker_id: str, assignments: str, params: tuple) -> bool:
+        """Apply an update only while worker_id still holds the lease"""
+        with self._connect() as db:
+            cursor = db.execute(
+                f"UPDATE jobs SET {assignments}, updated = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                params + (time.time(), job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        return self._update_owned(job_id, worker_id, "lease_expires = ?", (time.time() + lease_seconds,))
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        return self._update_owned(job_id, worker_id, "status = 'done', lease_owner = NULL, result = ?, error = NULL", (json.dumps(result, default=str),))
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return self._update_owned(
+            job_id, worker_id,
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, lease_owner = NULL, error = ?",
+            (self.max_attempts, error)
+        )
+
+    def defer(self, job_id: str, worker_id: str, available_at: float, reason: str) -> bool:
+        return self._update_owned(
+            job_id, worker_id,
+            "status = 'queued', lease_owner = NULL, attempts = attempts - 1, available_at = ?, error = ?",
+            (available_at, reason)
+        )
+
+    def get(self, job_id: str) -> dict:
+        with self._connect() as db:
+            return self._row(db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def active_payloads(self) -> list:
+        with self._connect() as db:
+            rows = db.execute("SELECT payload FROM jobs WHERE status IN ('queued', 'leased')").fetchall()
+        return [json.loads(row["payload"]) for row in rows]
+
+    def stats(self) -> dict:
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {"queued": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
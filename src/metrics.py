@@ -0,0 +1,33 @@
+"""
+Metrics - Process-wide counters for the generation pipeline
+Uses: stdlib only, read by the CLI and the Streamlit sidebar
+"""
+
+import threading
+
+
+class Metrics:
+    """Thread-safe named counters"""
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1):
+        """Add amount to a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def get(self, name: str) -> int:
+        """Current value of a counter"""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict:
+        """Copy of every counter"""
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+
+# Shared registry for the whole process
+metrics = Metrics()
@@ -0,0 +1,175 @@
+"""
+Profiler - Per-stage timings and optional cProfile/sampling traces of a pipeline run
+Uses: stdlib cProfile/pstats plus a sampling thread that writes flamegraph folded stacks
+"""
+
+import io
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Project frames that only dispatch or idle; a stack with nothing else is a parked worker
+_DISPATCH_FILES = {"scheduler.py", "profiler.py", "retention.py"}
+
+
+class StageTimer:
+    """Wall and CPU seconds per pipeline stage (cheap enough to run on every session)"""
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block; CPU is this thread's own time (pool work shows as wall only)"""
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.stages.append({
+                "stage": name,
+                "wall_s": round(time.perf_counter() - wall, 4),
+                "cpu_s": round(time.thread_time() - cpu, 4),
+            })
+
+    def total(self) -> dict:
+        """Summed wall/CPU over all stages"""
+        return {
+            "wall_s": round(sum(s["wall_s"] for s in self.stages), 4),
+            "cpu_s": round(sum(s["cpu_s"] for s in self.stages), 4),
+        }
+
+
+class StackSampler:
+    """Samples every thread's stack at a fixed interval and counts folded stacks"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self._project_files = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self._fold(frame)
+                if stack:
+                    self.samples[f"{names.get(ident, ident)};{stack}"] += 1
+
+    def _fold(self, frame) -> str:
+        """root;...;leaf frame labels, or None for idle pool threads"""
+        labels, busy = [], False
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename not in self._project_files:
+                path = Path(code.co_filename)
+                self._project_files[code.co_filename] = (path.stem, path.is_relative_to(ROOT) and path.name not in _DISPATCH_FILES)
+            stem, ours = self._project_files[code.co_filename]
+            labels.append(f"{stem}:{code.co_name}")
+            busy = busy or ours
+            frame = frame.f_back
+        return ";".join(reversed(labels)) if busy else None
+
+    def write_folded(self, path) -> Path:
+        """Brendan Gregg folded format: feed to flamegraph.pl, speedscope or inferno"""
+        path = Path(path)
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class PipelineProfiler:
+    """cProfile of the pipeline thread plus sampled stacks of every worker thread"""
+
+    def __init__(self, interval: float = 0.005):
+        # Only --profile runs pay for cProfile/pstats; importing main stays cheap
+        import cProfile
+        self.sampler = StackSampler(interval)
+        self.profile = cProfile.Profile()
+        self.profiled = False
+
+    def __enter__(self):
+        try:
+            self.profile.enable()
+            self.profiled = True
+        except ValueError:
+            # Only one cProfile can run per thread; the sampler still covers everything
+            self.profiled = False
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.sampler.stop()
+        if self.profiled:
+            self.profile.disable()
+        return False
+
+    def top_functions(self, limit: int = 25) -> str:
+        """pstats table sorted by cumulative time"""
+        if not self.profiled:
+            return "(cProfile unavailable: another profiler was active)"
+        import pstats
+        buffer = io.StringIO()
+        pstats.Stats(self.profile, stream=buffer).sort_stats("cumulative").print_stats(limit)
+        return buffer.getvalue()
+
+    def write(self, folder, timings: StageTimer) -> dict:
+        """Write profile.pstats, profile.folded and PROFILE.md into a session folder"""
+        folder = Path(folder)
+        paths = {"folded": str(self.sampler.write_folded(folder / "profile.folded"))}
+        if self.profiled:
+            self.profile.dump_stats(folder / "profile.pstats")
+            paths["pstats"] = str(folder / "profile.pstats")
+
+        total = timings.total()
+        rows = "\n".join(
+            f"| {s['stage']} | {s['wall_s']:.3f} | {s['cpu_s']:.3f} | "
+            f"{100 * s['wall_s'] / total['wall_s'] if total['wall_s'] else 0:.1f}% |"
+            for s in timings.stages
+        )
+        report = f"""# ⏱️ Pipeline Profile
+
+| Stage | Wall (s) | CPU (s) | Share of wall |
+|-------|----------|---------|---------------|
+{rows}
+| **total** | {total['wall_s']:.3f} | {total['cpu_s']:.3f} | 100% |
+
+CPU is the pipeline thread's own time; work on pools (hedged requests, resizing,
+compositing) shows up as wall time here and in the sampled stacks.
+
+- `profile.folded`: sampled stacks of every busy thread ({sum(self.sampler.samples.values())} samples),
+  e.g. `flamegraph.pl profile.folded > profile.svg` or drop into speedscope.app
+- `profile.pstats`: cProfile of the pipeline thread, e.g. `snakeviz profile.pstats`
+
+## Top functions (cumulative)
+
+```
+{self.top_functions()}
+```
+"""
+        with open(folder / "PROFILE.md", "w", encoding="utf-8") as f:
+            f.write(report)
+        paths["report"] = str(folder / "PROFILE.md")
+        return paths
@@ -0,0 +1,174 @@
+"""
+Quota Ledger - Persistent per-backend usage counters and job budget planning
+Uses: a JSON file in the output folder (stdlib only), safe across threads and processes
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: the in-process lock still applies
+    fcntl = None
+
+
+# Free-tier budgets advertised in the README (None = unlimited, still counted)
+DEFAULT_LIMITS = {
+    "huggingface": {"limit": 1000, "window": "month"},
+    "gemini": {"limit": 1500, "window": "day"},
+    "pollinations": {"limit": None, "window": "day"},
+}
+
+
+class QuotaExceeded(Exception):
+    """A job does not fit the remaining budget and should run after retry_at"""
+
+    def __init__(self, message: str, retry_at: str = None):
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
+def backend_bucket(backend: str) -> str:
+    """Quota bucket for a backend name (every HF model shares one budget)"""
+    if backend in DEFAULT_LIMITS:
+        return backend
+    return "huggingface"
+
+
+def window_key(window: str, now: datetime = None) -> str:
+    """Identifier of the current day/month window (UTC)"""
+    now = now or datetime.now(timezone.utc)
+    return now.strftime("%Y-%m") if window == "month" else now.strftime("%Y-%m-%d")
+
+
+def window_reset(window: str, now: datetime = None) -> str:
+    """ISO timestamp when the current window ends"""
+    now = now or datetime.now(timezone.utc)
+    if window == "month":
+        year, month = (now.year + 1, 1) if now.month == 12 else (now.year, now.month + 1)
+        reset = datetime(year, month, 1, tzinfo=timezone.utc)
+    else:
+        reset = datetime(now.year, now.month, now.day, tzinfo=timezone.utc) + timedelta(days=1)
+    return reset.isoformat()
+
+
+class QuotaLedger:
+    """Counts calls per backend and window, persisted to disk"""
+
+    def __init__(self, path: str = "output/.quota.json", limits: dict = None):
+        self.path = Path(path)
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """Serialize read-modify-write across threads and (on POSIX) processes"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path.with_suffix(".lock"), "w") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> dict:
+        """Read the ledger (empty if missing or corrupt)"""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, data: dict):
+        """Atomically replace the ledger file"""
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def record(self, backend: str, count: int = 1):
+        """Count calls against a backend's current window"""
+        bucket = backend_bucket(backend)
+        key = window_key(self.limits[bucket]["window"])
+
+        with self._locked():
+            data = self._load()
+            windows = data.setdefault(bucket, {})
+            windows[key] = windows.get(key, 0) + count
+            # Only the current window matters; drop older ones
+            data[bucket] = {key: windows[key]}
+            self._save(data)
+
+    def used(self, backend: str) -> int:
+        """Calls made in the current window"""
+        bucket = backend_bucket(backend)
+        key = window_key(self.limits[bucket]["window"])
+        with self._locked():
+            return self._load().get(bucket, {}).get(key, 0)
+
+    def remaining(self, backend: str) -> int:
+        """Calls left in the current window, or None if unlimited"""
+        limit = self.limits[backend_bucket(backend)]["limit"]
+        if limit is None:
+            return None
+        return max(0, limit - self.used(backend))
+
+    def available(self, backend: str, count: int = 1) -> bool:
+        """True if count more calls fit"""
+        remaining = self.remaining(backend)
+        return remaining is None or remaining >= count
+
+    def estimate_job(self, num_variations: int, aspect_ratios: list, oversample: int = 1) -> dict:
+        """Expected calls for one pipeline run (first attempts only)"""
+        return {
+            "huggingface": num_variations * len(aspect_ratios) * oversample,
+            "gemini": 1,
+        }
+
+    def plan_job(self, needs: dict) -> dict:
+        """Decide whether a job fits, must reroute to other backends, or has to wait
+
+        Images can reroute from HuggingFace to Pollinations; captions have no second
+        provider, so a Gemini shortfall means deferring (or accepting template copy).
+        """
+        plan = {"fits": True, "reroute": [], "defer_until": None, "reasons": []}
+
+        if not self.available("huggingface", needs.get("huggingface", 0)):
+            plan["reasons"].append(f"HuggingFace has {self.remaining('huggingface')} requests left")
+            if self.available("pollinations", needs.get("huggingface", 0)):
+                plan["reroute"].append("huggingface")
+            else:
+                plan["fits"] = False
+                plan["defer_until"] = window_reset(self.limits["huggingface"]["window"])
+
+        if not self.available("gemini", needs.get("gemini", 0)):
+            plan["fits"] = False
+            plan["reasons"].append(f"Gemini has {self.remaining('gemini')} requests left")
+            reset = window_reset(self.limits["gemini"]["window"])
+            plan["defer_until"] = max(plan["defer_until"] or reset, reset)
+
+        return plan
+
+    def snapshot(self) -> dict:
+        """Used/limit/remaining and reset time per backend"""
+        with self._locked():
+            data = self._load()
+
+        report = {}
+        for bucket, spec in self.limits.items():
+            used = data.get(bucket, {}).get(window_key(spec["window"]), 0)
+            report[bucket] = {
+                "used": used,
+                "limit": spec["limit"],
+                "remaining": None if spec["limit"] is None else max(0, spec["limit"] - used),
+                "window": spec["window"],
+                "resets": window_reset(spec["window"]),
+            }
+        return report
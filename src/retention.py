@@ -0,0 +1,230 @@
+"""
+Retention - Deletes old session folders and ZIPs under age, count and size budgets
+Uses: stdlib only; runs in small incremental passes on a background thread
+"""
+
+import os
+import stat
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.metrics import metrics
+
+
+class RetentionPolicy:
+    """Limits on what output/ keeps (None disables a limit)"""
+
+    def __init__(self, max_age_days: float = 30, max_sessions: int = 200, max_bytes: int = 5 * 1024**3, grace_seconds: float = 300):
+        self.max_age_days = max_age_days
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        # Sessions and blobs this fresh are never touched (a run may still be writing them)
+        self.grace_seconds = grace_seconds
+
+
+class SessionJanitor:
+    """Applies a RetentionPolicy to an output folder, skipping pinned sessions"""
+
+    def __init__(self, output_dir: str, policy: RetentionPolicy = None, blobs=None):
+        self.output_dir = Path(output_dir)
+        self.policy = policy or RetentionPolicy()
+        self.blobs = blobs
+        self._pins = {}
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def pin(self, session_folder, ttl: float = None):
+        """Keep a session: until unpin() (running jobs) or for ttl seconds (caches, open pages)"""
+        name = Path(session_folder).name
+        with self._lock:
+            count, expires = self._pins.get(name, (0, 0.0))
+            if ttl is None:
+                count += 1
+            else:
+                expires = max(expires, time.time() + ttl)
+            self._pins[name] = (count, expires)
+
+    def unpin(self, session_folder):
+        """Release a pin taken without ttl"""
+        name = Path(session_folder).name
+        with self._lock:
+            count, expires = self._pins.get(name, (0, 0.0))
+            self._pins[name] = (max(0, count - 1), expires)
+
+    @contextmanager
+    def pinned(self, session_folder):
+        """Pin a session for the duration of a block"""
+        self.pin(session_folder)
+        try:
+            yield
+        finally:
+            self.unpin(session_folder)
+
+    def is_pinned(self, name: str) -> bool:
+        """True if a running job or a live cache entry references the session"""
+        with self._lock:
+            count, expires = self._pins.get(name, (0, 0.0))
+            if not count and expires < time.time():
+                self._pins.pop(name, None)
+                return False
+            return True
+
+    def sessions(self) -> list:
+        """Sessions on disk, oldest first: name, paths (folder and/or ZIP), mtime, bytes"""
+        found = {}
+        for path in self.output_dir.iterdir() if self.output_dir.exists() else []:
+            # Dotfiles are shared state (.blobs, .quota.json, locks), never sessions
+            if path.name.startswith("."):
+                continue
+            if path.is_dir():
+                found.setdefault(path.name, []).append(path)
+            elif path.suffix == ".zip":
+                found.setdefault(path.stem, []).append(path)
+
+        sessions = []
+        for name, paths in found.items():
+            files = [p for path in paths for p in ([path] if path.is_file() else path.rglob("*")) if p.is_file()]
+            infos = [f.stat() for f in files]
+            sessions.append({
+                "name": name,
+                "paths": paths,
+                "mtime": max([p.stat().st_mtime for p in paths] + [i.st_mtime for i in infos]),
+                # Bytes freed by deleting it: files not shared beyond this session and the blob store
+                "bytes": sum(i.st_size for i in infos if i.st_nlink <= 2),
+            })
+        return sorted(sessions, key=lambda s: s["mtime"])
+
+    def select(self, sessions: list, now: float = None) -> list:
+        """Sessions the policy wants gone, oldest first"""
+        now = now or time.time()
+        policy = self.policy
+        doomed = set()
+
+        if policy.max_age_days is not None:
+            cutoff = now - policy.max_age_days * 86400
+            doomed.update(s["name"] for s in sessions if s["mtime"] < cutoff)
+
+        if policy.max_sessions is not None and len(sessions) > policy.max_sessions:
+            doomed.update(s["name"] for s in sessions[:len(sessions) - policy.max_sessions])
+
+        if policy.max_bytes is not None:
+            total = sum(s["bytes"] for s in sessions if s["name"] not in doomed)
+            for s in sessions:
+                if total <= policy.max_bytes:
+                    break
+                if s["name"] not in doomed:
+                    doomed.add(s["name"])
+                    total -= s["bytes"]
+
+        return [
+            s for s in sessions
+            if s["name"] in doomed and now - s["mtime"] > policy.grace_seconds and not self.is_pinned(s["name"])
+        ]
+
+    def collect(self, max_deletions: int = None, dry_run: bool = False) -> dict:
+        """One retention pass; max_deletions keeps background passes short"""
+        with self._run_lock:
+            sessions = self.sessions()
+            doomed = self.select(sessions)
+            pinned = [s["name"] for s in sessions if self.is_pinned(s["name"])]
+            if max_deletions is not None:
+                doomed = doomed[:max_deletions]
+
+            reclaimed = 0
+            if dry_run:
+                reclaimed = sum(s["bytes"] for s in doomed)
+            else:
+                released = set()
+                for session in doomed:
+                    for path in session["paths"]:
+                        reclaimed += self._remove(path, released)
+                reclaimed += self.sweep_blobs(released)
+
+            if reclaimed and not dry_run:
+                metrics.incr("retention.sessions_deleted", len(doomed))
+                metrics.incr("retention.reclaimed_bytes", reclaimed)
+
+            return {
+                "deleted": [s["name"] for s in doomed],
+                "reclaimed_bytes": reclaimed,
+                "pinned": pinned,
+                "remaining_sessions": len(sessions) - len(doomed),
+                "dry_run": dry_run,
+            }
+
+    def sweep_blobs(self, released: set = None) -> int:
+        """Delete blobs no session links to any more; returns bytes freed
+
+        released holds (device, inode) of blobs whose last session link was just
+        removed by this pass; those go at once, other orphans only after the grace period.
+        """
+        released = released or set()
+        if self.blobs is None or not self.blobs.root.exists():
+            return 0
+
+        reclaimed = 0
+        cutoff = time.time() - self.policy.grace_seconds
+        for blob in self.blobs.root.rglob("*"):
+            try:
+                info = blob.stat()
+                # ctime moves whenever a link is added, so a blob just being shared is left alone
+                orphaned = info.st_ctime < cutoff or (info.st_dev, info.st_ino) in released
+                if blob.is_file() and info.st_nlink == 1 and orphaned:
+                    reclaimed += self._remove(blob)
+            except FileNotFoundError:
+                continue
+        return reclaimed
+
+    def _remove(self, path: Path, released: set = None) -> int:
+        """Delete a file or tree; returns bytes actually freed (last links only)"""
+        freed = 0
+        paths = [path] if path.is_file() else sorted(path.rglob("*"), reverse=True) + [path]
+        for p in paths:
+            try:
+                if p.is_dir():
+                    try:
+                        p.rmdir()
+                    except OSError:
+                        pass  # Something new appeared inside; leave it for the next pass
+                    continue
+                info = p.stat()
+                try:
+                    p.unlink()
+                except PermissionError:
+                    # Read-only blob links (Windows refuses to delete them)
+                    os.chmod(p, stat.S_IWRITE)
+                    p.unlink()
+                if info.st_nlink == 1:
+                    freed += info.st_size
+                elif info.st_nlink == 2 and released is not None:
+                    released.add((info.st_dev, info.st_ino))
+            except FileNotFoundError:
+                continue
+        return freed
+
+    def start(self, interval: float = 600, batch: int = 20):
+        """Run small collection passes every interval seconds on a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    report = self.collect(max_deletions=batch)
+                    if report["deleted"]:
+                        print(f"🧹 Retention: removed {len(report['deleted'])} sessions, reclaimed {report['reclaimed_bytes'] / 1e6:.1f} MB")
+                except Exception as e:
+                    print(f"⚠️ Retention pass failed: {e}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="retention", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the background thread after its current pass"""
+        self._stop.set()
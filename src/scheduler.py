@@ -0,0 +1,116 @@
+"""
+Priority Scheduler - Weighted fair queuing of backend calls across priority lanes
+Uses: stdlib threads; interactive work jumps ahead while batch work keeps a guaranteed share
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from src.metrics import metrics
+
+
+# Share of dispatch slots when every lane is backlogged (interactive 8 : batch 1)
+DEFAULT_WEIGHTS = {"interactive": 8, "batch": 1}
+
+
+class _Task:
+    """A queued call with its fair-queuing finish tag"""
+
+    def __init__(self, fn, args, kwargs, finish_tag: float):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.finish_tag = finish_tag
+        self.enqueued = time.monotonic()
+        self.future = Future()
+
+
+class PriorityScheduler:
+    """Runs at most max_concurrent backend calls, picking lanes by weighted fair queuing
+
+    Each task is tagged with a virtual finish time of max(now, lane's last tag) + 1/weight,
+    and the worker always takes the smallest tag. A heavy lane can therefore never starve
+    a light one: batch still gets 1 slot in every (sum of weights) while interactive is busy.
+    """
+
+    def __init__(self, max_concurrent: int = 4, weights: dict = None):
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self._queues = {lane: deque() for lane in self.weights}
+        self._last_tag = {lane: 0.0 for lane in self.weights}
+        self._virtual_time = 0.0
+        self._stats = {lane: {"dispatched": 0, "completed": 0, "wait_total": 0.0, "wait_max": 0.0} for lane in self.weights}
+        self._cond = threading.Condition()
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"scheduler-{i}", daemon=True)
+            for i in range(max_concurrent)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, lane: str, fn, *args, **kwargs) -> Future:
+        """Queue fn on a lane and return its Future"""
+        if lane not in self.weights:
+            raise ValueError(f"Unknown lane '{lane}' (expected one of {', '.join(self.weights)})")
+
+        with self._cond:
+            tag = max(self._virtual_time, self._last_tag[lane]) + 1.0 / self.weights[lane]
+            self._last_tag[lane] = tag
+            task = _Task(fn, args, kwargs, tag)
+            self._queues[lane].append(task)
+            self._cond.notify()
+        return task.future
+
+    def run(self, lane: str, fn, *args, **kwargs):
+        """Queue fn and block until it has run"""
+        return self.submit(lane, fn, *args, **kwargs).result()
+
+    def _next_task(self):
+        """Pop the lane head with the smallest finish tag (caller holds the lock)"""
+        heads = [(queue[0].finish_tag, lane) for lane, queue in self._queues.items() if queue]
+        if not heads:
+            return None, None
+        _, lane = min(heads)
+        task = self._queues[lane].popleft()
+        self._virtual_time = task.finish_tag
+        return lane, task
+
+    def _worker(self):
+        """Dispatch loop run by each worker thread"""
+        while True:
+            with self._cond:
+                lane, task = self._next_task()
+                while task is None:
+                    self._cond.wait()
+                    lane, task = self._next_task()
+
+                waited = time.monotonic() - task.enqueued
+                stats = self._stats[lane]
+                stats["dispatched"] += 1
+                stats["wait_total"] += waited
+                stats["wait_max"] = max(stats["wait_max"], waited)
+
+            if not task.future.set_running_or_notify_cancel():
+                continue
+            try:
+                task.future.set_result(task.fn(*task.args, **task.kwargs))
+            except BaseException as e:
+                task.future.set_exception(e)
+            finally:
+                with self._cond:
+                    stats["completed"] += 1
+                metrics.incr(f"scheduler.{lane}.completed")
+
+    def stats(self) -> dict:
+        """Queue depth and wait times per lane"""
+        with self._cond:
+            return {
+                lane: {
+                    "queued": len(self._queues[lane]),
+                    "completed": s["completed"],
+                    "avg_wait_s": round(s["wait_total"] / s["dispatched"], 3) if s["dispatched"] else 0.0,
+                    "max_wait_s": round(s["wait_max"], 3),
+                }
+                for lane, s in self._stats.items()
+            }
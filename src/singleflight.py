@@ -0,0 +1,71 @@
+"""
+Single Flight - Coalesces concurrent identical backend requests into one upstream call
+Uses: stdlib only; callers waiting on the same key all receive the one result
+"""
+
+import copy
+import threading
+
+from src.metrics import metrics
+
+
+class _Flight:
+    """One in-flight upstream call and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; duplicates wait and share the result"""
+
+    def __init__(self, name: str, clone=copy.deepcopy):
+        self.name = name
+        self.clone = clone
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Call fn(*args, **kwargs) unless an identical call is already running"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+
+        metrics.incr(f"{self.name}.calls")
+
+        if not leader:
+            metrics.incr(f"{self.name}.coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return self.clone(flight.result)
+
+        metrics.incr(f"{self.name}.upstream")
+        try:
+            flight.result = fn(*args, **kwargs)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                shared = flight.followers > 0
+            flight.done.set()
+
+        # With followers the original stays untouched so each caller may mutate its own copy
+        return self.clone(flight.result) if shared else flight.result
+
+    def stats(self) -> dict:
+        """Calls made, upstream calls sent and upstream calls saved"""
+        return {
+            "calls": metrics.get(f"{self.name}.calls"),
+            "upstream": metrics.get(f"{self.name}.upstream"),
+            "saved": metrics.get(f"{self.name}.coalesced"),
+        }
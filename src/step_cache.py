@@ -0,0 +1,110 @@
+"""
+Step Cache - Memoized pipeline steps keyed by their inputs, for incremental re-generation
+Uses: stdlib only; small JSON entries on disk, image bytes stay in the blob store
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from src.encoded_image import EncodedImage
+
+# Bump when a step's output changes for the same inputs (new analyzer, prompt format, ...)
+CACHE_VERSION = 3
+
+# The pipeline as a dependency graph: each step's key hashes these inputs. Upstream
+# outputs (profile, prompt) enter by value, so an edit misses only the steps below it.
+#   logo + brand images -> profile -> prompt -> image slots (not their session seeds)
+#   brand / product / tone / audience -> captions
+STEP_INPUTS = {
+    "profile": ("logo_sha256", "image_sha256s"),
+    "image": ("prompt", "variation", "aspect_ratio", "size", "candidates", "top_k", "dedup", "max_regenerations"),
+    "captions": ("brand_name", "product_name", "tone", "target_audience", "num_variations"),
+}
+
+
+class StepCache:
+    """Results of deterministic pipeline steps, one small JSON file per (step, key)"""
+
+    def __init__(self, root: str = "output/.cache", blobs=None):
+        self.root = Path(root)
+        self.blobs = blobs
+
+    def key(self, step: str, **inputs) -> str:
+        """Hash of a step's declared inputs"""
+        missing = set(STEP_INPUTS[step]) - set(inputs)
+        if missing:
+            raise ValueError(f"{step} step is missing inputs: {', '.join(sorted(missing))}")
+        payload = json.dumps([CACHE_VERSION, step, {name: inputs[name] for name in STEP_INPUTS[step]}], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, step: str, key: str) -> Path:
+        return self.root / step / key[:2] / f"{key}.json"
+
+    def get(self, step: str, key: str):
+        """Cached value, or None; a hit refreshes the entry's age for pruning"""
+        path = self._path(step, key)
+        try:
+            with open(path) as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # Pruned or replaced since the read; the value is still good
+        return value
+
+    def put(self, step: str, key: str, value) -> bool:
+        """Store a value atomically; best-effort, a failed write only costs a future hit
+        
+        Concurrent sessions may write the same key, so every call gets its own temp file.
+        """
+        path = self._path(step, key)
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+            with os.fdopen(fd, "w") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Could not cache {step} step: {e}")
+            if tmp_path is not None:
+                Path(tmp_path).unlink(missing_ok=True)
+            return False
+
+    def forget(self, step: str, key: str):
+        self._path(step, key).unlink(missing_ok=True)
+
+    def get_images(self, key: str) -> list:
+        """(EncodedImage, metadata) for every creative of a cached image slot, or None
+
+        Entries only point at blobs; once retention sweeps a blob the slot is
+        simply generated again.
+        """
+        entries = self.get("image", key)
+        if entries is None or self.blobs is None:
+            return None
+        try:
+            return [
+                (EncodedImage(self.blobs.read(e["sha256"], e["extension"]), info={"backend": e.get("backend")}), e)
+                for e in entries
+            ]
+        except FileNotFoundError:
+            self.forget("image", key)
+            return None
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Delete entries not used for max_age_seconds; returns how many"""
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for path in self.root.rglob("*.json") if self.root.exists() else []:
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
@@ -0,0 +1,62 @@
+"""
+Form Submission - The web front end's submit path, shared by app.py and the load test
+Uses: stdlib only; uploads go to temp files, the pipeline runs on a worker thread and
+its events are handed back on the calling (script) thread
+"""
+
+import queue
+import tempfile
+import threading
+from pathlib import Path
+
+
+def save_upload(data: bytes, prefix: str, suffix: str) -> Path:
+    """Write one uploaded file to its own temp file so concurrent sessions don't clash"""
+    with tempfile.NamedTemporaryFile(prefix=prefix, suffix=suffix or ".png", delete=False) as f:
+        f.write(data)
+        return Path(f.name)
+
+
+def run_submission(studio, form: dict, logo: tuple, brand_files: list = None, on_event=None, poll: float = 0.2) -> dict:
+    """Run one form submission and return the pipeline result (its error is re-raised)
+
+    logo and each of brand_files are (bytes, suffix) uploads. form holds the remaining
+    run_pipeline arguments. on_event is called with every progress event on this thread,
+    which is where Streamlit may draw. Temp uploads are removed once the run ends.
+    """
+    temp_logo_path = save_upload(logo[0], "logo_", logo[1])
+    temp_image_paths = [save_upload(data, "brand_", suffix) for data, suffix in brand_files or []]
+
+    events = queue.Queue()
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = studio.run_pipeline(
+                logo_path=str(temp_logo_path),
+                priority="interactive",
+                progress=events.put,
+                brand_images=[str(p) for p in temp_image_paths],
+                **form
+            )
+        except Exception as e:
+            outcome["error"] = e
+
+    pipeline = threading.Thread(target=run, name="pipeline", daemon=True)
+    pipeline.start()
+    try:
+        while pipeline.is_alive() or not events.empty():
+            try:
+                event = events.get(timeout=poll)
+            except queue.Empty:
+                continue
+            if on_event is not None:
+                on_event(event)
+    finally:
+        pipeline.join()
+        for path in [temp_logo_path, *temp_image_paths]:
+            path.unlink(missing_ok=True)
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
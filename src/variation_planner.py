@@ -0,0 +1,56 @@
+"""
+Variation Planner - Assigns deterministic seeds to every creative slot
+Uses: hashlib (stdlib), so the same session always renders the same set
+"""
+
+import hashlib
+
+
+# Seeds stay inside the signed 32-bit range accepted by SDXL and Pollinations
+MAX_SEED = 2**31 - 1
+
+
+def derive_seed(*parts) -> int:
+    """Derive a stable seed from any sequence of values"""
+    key = ":".join(str(part) for part in parts)
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % MAX_SEED
+
+
+class VariationPlanner:
+    """Plans creative slots (variation x aspect ratio) with reproducible seeds"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+
+    def seed_for(self, variation: int, aspect_ratio: str) -> int:
+        """Seed for one (session, variation, ratio) slot"""
+        return derive_seed(self.session_id, variation, aspect_ratio)
+
+    def reseed(self, variation: int, aspect_ratio: str, attempt: int) -> int:
+        """Fresh but still reproducible seed for regenerating a slot"""
+        return derive_seed(self.session_id, variation, aspect_ratio, "retry", attempt)
+
+    def candidate_seed(self, variation: int, aspect_ratio: str, index: int) -> int:
+        """Seed of the index-th oversampled candidate; candidate 0 is the slot's own seed"""
+        if index == 0:
+            return self.seed_for(variation, aspect_ratio)
+        return derive_seed(self.session_id, variation, aspect_ratio, "candidate", index)
+
+    def plan(self, modifiers: list, aspect_ratios: list) -> list:
+        """Build the ordered list of creative slots to render"""
+        slots = []
+        creative_id = 1
+
+        for i, modifier in enumerate(modifiers):
+            for ratio in aspect_ratios:
+                slots.append({
+                    "id": creative_id,
+                    "variation": i + 1,
+                    "aspect_ratio": ratio,
+                    "modifier": modifier,
+                    "seed": self.seed_for(i + 1, ratio)
+                })
+                creative_id += 1
+
+        return slots
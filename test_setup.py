@@ -8,16 +8,24 @@ from pathlib import Path
 print("🧪 AI Creative Studio - Component Test\n")
 print("="*50)
 
-# Test 1: Import all modules
-print("\n✓ TEST 1: Module Imports")
-try:
-    from src.brand_analyzer import BrandAnalyzer
-    from src.creative_generator import CreativeGenerator
-    from src.caption_writer import CaptionWriter
-    print("  ✅ All modules imported successfully")
-except ImportError as e:
-    print(f"  ❌ Import failed: {e}")
+# Test 1: Check dependencies (find_spec locates packages without importing the heavy SDKs)
+print("\n✓ TEST 1: Dependencies")
+import importlib.util
+
+required_packages = ["PIL", "numpy", "dotenv", "requests", "huggingface_hub", "google.generativeai"]
+missing = []
+for package in required_packages:
+    try:
+        found = importlib.util.find_spec(package) is not None
+    except ModuleNotFoundError:
+        found = False
+    if not found:
+        missing.append(package)
+
+if missing:
+    print(f"  ❌ Missing packages: {', '.join(missing)}")
     sys.exit(1)
+print("  ✅ All dependencies installed")
 
 # Test 2: Check demo assets
 print("\n✓ TEST 2: Demo Assets")
@@ -34,6 +42,7 @@ else:
 # Test 3: Brand Analyzer
 print("\n✓ TEST 3: Brand Analyzer")
 try:
+    from src.brand_analyzer import BrandAnalyzer
     analyzer = BrandAnalyzer("demo_assets/sample_logo.png")
     profile = analyzer.analyze()
     
@@ -0,0 +1,215 @@
+"""
+Pipeline Worker - Pulls pipeline jobs from a shared queue and runs them, one process per core
+Uses: src.job_queue brokers (SQLite by default), multiprocessing for local fan-out
+"""
+
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from main import CreativeStudio
+from src.job_queue import JobBroker, SQLiteBroker
+from src.quota import QuotaExceeded
+
+# run_pipeline arguments a queued job may set; anything else in the payload is ignored
+PIPELINE_ARGS = {
+    "logo_path", "brand_name", "product_name", "tone", "target_audience", "num_variations",
+    "aspect_ratios", "composite", "package", "oversample", "captions", "reuse", "exports", "brand_images"
+}
+
+
+class PipelineWorker:
+    """Leases jobs, keeps the lease alive while the pipeline runs, records the outcome"""
+
+    def __init__(self, broker: JobBroker, studio: CreativeStudio, worker_id: str = None, lease_seconds: float = 60, poll_interval: float = 2.0):
+        self.broker = broker
+        self.studio = studio
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.processed = 0
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Finish the current job, then exit the loop"""
+        self._stop.set()
+
+    def run(self, max_jobs: int = None, exit_when_idle: bool = False):
+        """Work until stopped (or max_jobs done / queue empty)"""
+        print(f"👷 Worker {self.worker_id} polling {getattr(self.broker, 'path', 'broker')}")
+        while not self._stop.is_set():
+            if max_jobs is not None and self.processed >= max_jobs:
+                break
+            job = self.broker.lease(self.worker_id, self.lease_seconds)
+            if job is None:
+                if exit_when_idle:
+                    break
+                self._stop.wait(self.poll_interval)
+                continue
+            self.process(job)
+            self.processed += 1
+
+    def process(self, job: dict) -> bool:
+        """Run one leased job; True if it completed"""
+        print(f"▶️ {self.worker_id}: job {job['id']} (attempt {job['attempts']})")
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job["id"], done), name=f"heartbeat-{job['id']}", daemon=True)
+        heartbeat.start()
+
+        try:
+            kwargs = {k: v for k, v in job["payload"].items() if k in PIPELINE_ARGS}
+            result = self.studio.run_pipeline(**kwargs, defer_on_quota=True, priority="batch")
+        except QuotaExceeded as e:
+            retry_at = datetime.fromisoformat(e.retry_at).timestamp() if e.retry_at else time.time() + 3600
+            self.broker.defer(job["id"], self.worker_id, retry_at, f"quota: {e}")
+            print(f"⏸️ {self.worker_id}: job {job['id']} deferred until {e.retry_at}")
+            return False
+        except Exception as e:
+            if self.broker.fail(job["id"], self.worker_id, f"{type(e).__name__}: {e}") and self.broker.get(job["id"])["status"] == "failed":
+                release_uploads(job["payload"])
+            print(f"❌ {self.worker_id}: job {job['id']} failed: {e}")
+            return False
+        finally:
+            done.set()
+            heartbeat.join()
+
+        completed = self.broker.complete(job["id"], self.worker_id, {
+            "session_folder": result["session_folder"],
+            "zip_path": result["zip_path"],
+            "num_creatives": result["num_creatives"],
+            "worker": self.worker_id,
+        })
+        if completed:
+            release_uploads(job["payload"])
+            print(f"✅ {self.worker_id}: job {job['id']} -> {result['session_folder']}")
+        else:
+            # Lease expired mid-run and another worker took over; its session wins
+            print(f"⚠️ {self.worker_id}: lost the lease on {job['id']}, result discarded")
+        return completed
+
+    def _heartbeat(self, job_id: str, done: threading.Event):
+        """Renew the lease three times per lease period until the job finishes"""
+        while not done.wait(self.lease_seconds / 3):
+            if not self.broker.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                print(f"⚠️ {self.worker_id}: lease on {job_id} was taken over")
+                return
+
+
+def enqueue_job(broker: JobBroker, output_dir: str, logo_path: str, priority: int = 0, brand_images: list = None, **params) -> str:
+    """Queue a pipeline run; images are copied into the shared output so every worker can read them"""
+    uploads = Path(output_dir) / ".uploads"
+    uploads.mkdir(parents=True, exist_ok=True)
+    
+    def share(path):
+        shared = uploads / f"{uuid.uuid4().hex[:12]}{Path(path).suffix or '.img'}"
+        shutil.copyfile(path, shared)
+        return str(shared)
+    
+    payload = {"logo_path": share(logo_path), **params}
+    if brand_images:
+        payload["brand_images"] = [share(path) for path in brand_images]
+    return broker.enqueue(payload, priority=priority)
+
+
+def upload_paths(payload: dict) -> list:
+    """Files enqueue_job copied into .uploads for one job"""
+    paths = [payload.get("logo_path"), *(payload.get("brand_images") or [])]
+    return [Path(p) for p in paths if p and Path(p).parent.name == ".uploads"]
+
+
+def release_uploads(payload: dict):
+    """Delete a finished job's uploaded images (retention never looks inside .uploads)"""
+    for path in upload_paths(payload):
+        path.unlink(missing_ok=True)
+
+
+def default_studio(output_dir: str) -> CreativeStudio:
+    """Studio for one worker process (batch lane, its own clients)"""
+    from src.scheduler import PriorityScheduler
+    return CreativeStudio(output_dir=output_dir, scheduler=PriorityScheduler(max_concurrent=2))
+
+
+def worker_main(queue_path: str, output_dir: str, lease_seconds: float, poll_interval: float, exit_when_idle: bool = False, studio_factory=default_studio):
+    """Entry point of one worker process"""
+    worker = PipelineWorker(SQLiteBroker(queue_path), studio_factory(output_dir), lease_seconds=lease_seconds, poll_interval=poll_interval)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    worker.run(exit_when_idle=exit_when_idle)
+
+
+def run_workers(queue_path: str, output_dir: str, processes: int, lease_seconds: float = 60, poll_interval: float = 2.0, exit_when_idle: bool = False, studio_factory=default_studio) -> list:
+    """Start worker processes and wait for them; returns their exit codes"""
+    workers = [
+        multiprocessing.Process(
+            target=worker_main,
+            args=(queue_path, output_dir, lease_seconds, poll_interval, exit_when_idle, studio_factory),
+            name=f"pipeline-worker-{i}"
+        )
+        for i in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping workers after their current jobs...")
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            process.join()
+    return [process.exitcode for process in workers]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AI Creative Studio - Queue workers")
+    parser.add_argument("--queue", default="output/.queue.db", help="SQLite queue file (shared by all workers)")
+    parser.add_argument("--output", default="output", help="Shared output store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Start worker processes")
+    run.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    run.add_argument("--lease", type=float, default=60, help="Seconds before a silent worker's job is retried")
+    run.add_argument("--poll", type=float, default=2.0)
+    run.add_argument("--exit-when-idle", action="store_true", help="Exit once the queue is drained")
+
+    enqueue = commands.add_parser("enqueue", help="Queue a pipeline run")
+    enqueue.add_argument("--logo", required=True)
+    enqueue.add_argument("--brand", required=True)
+    enqueue.add_argument("--product", required=True)
+    enqueue.add_argument("--images", nargs="+", metavar="PATH", help="Product shots / past campaigns for the brand profile")
+    enqueue.add_argument("--tone", default="luxury")
+    enqueue.add_argument("--audience", default="general consumers")
+    enqueue.add_argument("--variations", type=int, default=3)
+    enqueue.add_argument("--oversample", type=int, default=1)
+    enqueue.add_argument("--zip", action="store_true", help="Package the session when done")
+    enqueue.add_argument("--priority", type=int, default=0)
+
+    commands.add_parser("status", help="Show queue counts")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run_workers(args.queue, args.output, args.processes, args.lease, args.poll, args.exit_when_idle)
+    elif args.command == "enqueue":
+        job_id = enqueue_job(
+            SQLiteBroker(args.queue), args.output, args.logo, args.priority, args.images,
+            brand_name=args.brand, product_name=args.product, tone=args.tone,
+            target_audience=args.audience, num_variations=args.variations,
+            oversample=args.oversample, package=args.zip
+        )
+        print(f"📥 Queued job {job_id}")
+    else:
+        for status, count in SQLiteBroker(args.queue).stats().items():
+            print(f"   {status}: {count}")